@@ -1,7 +1,30 @@
 from sqlalchemy import create_engine, Table, Column, String, Integer, Float, Date, MetaData, text
+import os
+import sys
 import pandas as pd
 from datetime import datetime, timedelta
 
+# 저장소 루트의 공용 Candle_Store 패키지 (EFB가 기록한 로컬 분봉)
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')))
+from Candle_Store.Candle_Store import load_candles_frame
+
+# EFB의 계층형 보관 읽기 (hot upbit_minute_data + archive 테이블 + cold 파일)
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'EFB',
+                                             'EFB(Extracting_From_Bithumb).rev0.04')))
+from Manage_DB.Tiered_Archive import load_minute_data
+
+# ✅ 가격 데이터를 읽을 곳: 'db'(UPBIT_MINUTE_DATA_2 조회), 'store'(로컬 Candle_Store, 메모리 매핑),
+#    'tiered'(EFB 원본 분봉을 hot/archive/cold 계층에서 조회: 20일 지난 분봉까지 필요할 때, 1분봉만)
+PRICE_SOURCE = 'db'
+
+# ✅ 백테스트할 봉 단위: '1m'(UPBIT_MINUTE_DATA_2) 또는 대시보드가 지표를 기록한 롤업 테이블(UPBIT_CANDLE_<timeframe>_2)의
+#    '5m', '15m', '1h', '1d'. 시간 창(n분)은 봉 길이의 배수여야 끝 시각의 봉과 맞춰짐
+TIMEFRAME = '1m'
+
+
+def signal_table_name(timeframe):
+    return 'UPBIT_MINUTE_DATA_2' if timeframe == '1m' else f'UPBIT_CANDLE_{timeframe.upper()}_2'
+
 
 # ✅ DB 연결 (SQLAlchemy 사용)
 def get_db_connection():
@@ -57,14 +80,42 @@ def categorize_confidence(df):
     return df
 
 
+# ✅ 로컬 Candle_Store에서 가격 데이터 조회 (KST 범위 -> 저장소의 UTC 범위로 변환)
+def load_price_data_from_store(markets, start_time, end_time, timeframe='1m'):
+    kst_offset = timedelta(hours=9)
+    price_data = load_candles_frame(markets, start_time - kst_offset, end_time - kst_offset + timedelta(minutes=1),
+                                    timeframe=timeframe)
+    price_data['CANDLE_DATE_TIME_KST'] = price_data['CANDLE_DATE_TIME_UTC'] + kst_offset
+    return price_data[['MARKET', 'CANDLE_DATE_TIME_KST', 'CANDLE_ACC_TRADE_PRICE']]
+
+
+# ✅ EFB 계층형 보관(hot/archive/cold)에서 가격 데이터 조회 (KST 범위 -> UTC 범위로 변환)
+def load_price_data_from_tiers(conn, markets, start_time, end_time, timeframe='1m'):
+    if timeframe != '1m':
+        raise ValueError(f"계층형 보관에는 1분봉만 있습니다: {timeframe}")
+    kst_offset = timedelta(hours=9)
+    frames = []
+    for market in markets:
+        data = load_minute_data(conn, market, start_time - kst_offset, end_time - kst_offset + timedelta(minutes=1))
+        frames.append(pd.DataFrame({
+            'MARKET': market,
+            'CANDLE_DATE_TIME_KST': data['candle_date_time_utc'] + kst_offset,
+            'CANDLE_ACC_TRADE_PRICE': data['candle_acc_trade_price'].astype(float),
+        }))
+    if not frames:
+        return pd.DataFrame(columns=['MARKET', 'CANDLE_DATE_TIME_KST', 'CANDLE_ACC_TRADE_PRICE'])
+    return pd.concat(frames, ignore_index=True)
+
+
 # ✅ 백테스트 함수 (다중 n, m 지원)
 # ✅ 백테스트 함수 (최적화 버전)
-def backtest_upbit_data(conn, engine, n_minutes_list, m_percent_list):
+def backtest_upbit_data(conn, engine, n_minutes_list, m_percent_list, price_source=PRICE_SOURCE, timeframe=TIMEFRAME):
     try:
-        query = """
+        table_name = signal_table_name(timeframe)
+        query = f"""
             SELECT MARKET, CANDLE_DATE_TIME_KST, CONFIDENCE, OPINION, 
                    CANDLE_ACC_TRADE_PRICE, CANDLE_ACC_TRADE_VOLUME
-            FROM UPBIT_MINUTE_DATA_2
+            FROM {table_name}
         """
         df = pd.read_sql(query, con=engine)
 
@@ -80,15 +131,20 @@ def backtest_upbit_data(conn, engine, n_minutes_list, m_percent_list):
         start_time = df['CANDLE_DATE_TIME_KST'].min()
         end_time = df['CANDLE_DATE_TIME_KST'].max() + timedelta(minutes=max(n_minutes_list))
 
-        price_query = f"""
-            SELECT MARKET, CANDLE_DATE_TIME_KST, CANDLE_ACC_TRADE_PRICE
-            FROM UPBIT_MINUTE_DATA_2
-            WHERE CANDLE_DATE_TIME_KST BETWEEN TO_TIMESTAMP('{start_time}', 'YYYY-MM-DD HH24:MI:SS')
-            AND TO_TIMESTAMP('{end_time}', 'YYYY-MM-DD HH24:MI:SS')
-        """
-        price_data = pd.read_sql(price_query, con=engine)
-        price_data.columns = [col.upper() for col in price_data.columns]
-        price_data['CANDLE_DATE_TIME_KST'] = pd.to_datetime(price_data['CANDLE_DATE_TIME_KST'])
+        if price_source == 'store':
+            price_data = load_price_data_from_store(df['MARKET'].unique(), start_time, end_time, timeframe)
+        elif price_source == 'tiered':
+            price_data = load_price_data_from_tiers(conn, df['MARKET'].unique(), start_time, end_time, timeframe)
+        else:
+            price_query = f"""
+                SELECT MARKET, CANDLE_DATE_TIME_KST, CANDLE_ACC_TRADE_PRICE
+                FROM {table_name}
+                WHERE CANDLE_DATE_TIME_KST BETWEEN TO_TIMESTAMP('{start_time}', 'YYYY-MM-DD HH24:MI:SS')
+                AND TO_TIMESTAMP('{end_time}', 'YYYY-MM-DD HH24:MI:SS')
+            """
+            price_data = pd.read_sql(price_query, con=engine)
+            price_data.columns = [col.upper() for col in price_data.columns]
+            price_data['CANDLE_DATE_TIME_KST'] = pd.to_datetime(price_data['CANDLE_DATE_TIME_KST'])
 
         # ✅ 결과 저장용 리스트
         results = []
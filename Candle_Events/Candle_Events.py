@@ -0,0 +1,133 @@
+import json
+import os
+import socket
+import time
+from datetime import datetime
+
+# --------------------------------------------------
+#  분봉 기록 알림 (EFB -> 대시보드)
+#  - EFB가 분봉을 커밋할 때마다 "테이블 T의 종목 X에 시각 t까지 새 분봉이 있다"를 localhost UDP 데이터그램으로 보냄
+#  - 대시보드는 소켓에서 기다리다가(대기 중 CPU/DB 사용 없음) 알림이 오면 한 번에 모아 해당 종목만 지표를 갱신
+#  - 보내는 쪽은 받는 쪽이 없어도 막히거나 실패하지 않음 (UDP, 오류는 무시).
+#    데이터그램은 유실될 수 있으므로 받는 쪽은 일정 시간 알림이 없으면 한 번 전체 주기를 실행해야 함
+# --------------------------------------------------
+
+DEFAULT_HOST = os.environ.get("CANDLE_EVENT_HOST", "127.0.0.1")
+DEFAULT_PORT = int(os.environ.get("CANDLE_EVENT_PORT", 9109))
+
+# 데이터그램 하나의 최대 크기 (알림 하나는 100바이트 안팎)
+MAX_DATAGRAM = 65507
+
+
+def _encode(table, market, until):
+    return json.dumps({
+        'table': table,
+        'market': market,
+        'until': until.isoformat() if until is not None else None,
+    }).encode('utf-8')
+
+
+def _decode(payload):
+    event = json.loads(payload.decode('utf-8'))
+    until = event.get('until')
+    return event['table'], event.get('market'), datetime.fromisoformat(until) if until else None
+
+
+class CandleEventPublisher:
+    """
+    분봉 기록 알림을 보내는 쪽 (EFB).
+    """
+
+    def __init__(self, host=DEFAULT_HOST, port=DEFAULT_PORT):
+        self.address = (host, port)
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sent = 0
+        self.failed = 0
+
+    def publish(self, table, market, until):
+        """
+        Parameters:
+        table (str): 분봉이 기록된 테이블 (upbit_minute_data, upbit_candle_5m 등)
+        market (str 또는 None): 종목. None이면 테이블의 전 종목
+        until (datetime): 이 시각의 봉까지 커밋됨 (UTC)
+        """
+        try:
+            self.sock.sendto(_encode(table, market, until), self.address)
+            self.sent += 1
+        except OSError:
+            # 받는 쪽이 없거나 버퍼가 가득 찬 경우: 알림은 보조 수단이므로 수집을 멈추지 않음
+            self.failed += 1
+
+    def close(self):
+        self.sock.close()
+
+
+class CandleEventListener:
+    """
+    분봉 기록 알림을 받는 쪽 (대시보드). 같은 종목의 알림은 가장 늦은 시각 하나로 합칩니다.
+    """
+
+    def __init__(self, host=DEFAULT_HOST, port=DEFAULT_PORT, tables=None):
+        """
+        Parameters:
+        tables (iterable, optional): 받을 테이블 이름. None이면 모든 테이블
+        """
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.bind((host, port))
+        self.tables = {table.lower() for table in tables} if tables is not None else None
+        self.received = 0
+
+    def _receive(self, timeout):
+        # timeout초 안에 데이터그램 하나를 받아 (table, market, until)로 반환. 없으면 None
+        self.sock.settimeout(max(timeout, 0.0))
+        try:
+            payload, _ = self.sock.recvfrom(MAX_DATAGRAM)
+        except (socket.timeout, BlockingIOError):
+            return None
+        try:
+            event = _decode(payload)
+        except (ValueError, KeyError):
+            print("[WARN] 형식이 맞지 않는 분봉 알림을 무시합니다.")
+            return ()
+        self.received += 1
+        return event
+
+    def wait(self, timeout, settle=0.5, max_batch_sec=5.0):
+        """
+        알림이 올 때까지 최대 timeout초 기다린 뒤, 마지막 알림 후 settle초 동안 더 오는 알림을 함께 모읍니다.
+        (EFB가 한 주기에 여러 종목을 차례로 커밋하므로 한 번에 처리. 모으는 시간은 최대 max_batch_sec초)
+
+        Returns:
+        dict: {종목: 커밋된 마지막 봉 시각}. 전 종목 알림(market None)은 키 None.
+              timeout 안에 알림이 없으면 빈 dict
+        """
+        pending = {}
+        deadline = time.monotonic() + timeout
+        batch_deadline = None
+        while True:
+            now = time.monotonic()
+            if batch_deadline is None:
+                wait_sec = deadline - now
+            else:
+                wait_sec = min(settle, batch_deadline - now)
+            if wait_sec <= 0:
+                return pending
+
+            event = self._receive(wait_sec)
+            if event is None:
+                if batch_deadline is not None or time.monotonic() >= deadline:
+                    return pending
+                continue
+            if not event:
+                continue
+
+            table, market, until = event
+            if self.tables is not None and table.lower() not in self.tables:
+                continue
+            if market not in pending or (until is not None and (pending[market] is None or until > pending[market])):
+                pending[market] = until
+            if batch_deadline is None:
+                batch_deadline = time.monotonic() + max_batch_sec
+
+    def close(self):
+        self.sock.close()
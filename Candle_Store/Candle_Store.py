@@ -0,0 +1,275 @@
+import os
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+# --------------------------------------------------
+#  로컬 컬럼형 분봉 저장소 (EFB가 기록, 대시보드/백테스트가 읽기)
+#  - <root>/<market>/<YYYY-MM-DD>.npy : float64 (필드 6개, 1440분) 배열 하나
+#    -> 필드(행)마다 하루치 분봉이 연속된 메모리에 놓이는 컬럼형 구조
+#  - 분봉이 없는 분(거래 없음, 미수집)은 NaN
+#  - 읽기는 np.load(mmap_mode='r')로 메모리 매핑 (복사 없음)
+#  - 5m/15m/1h/1d 봉은 읽을 때 1분봉에서 합침 (resample_candles, EFB 롤업 테이블과 같은 OHLCV 규칙)
+#  - RETENTION_DAYS일보다 오래된 날 파일은 prune_candles로 삭제 (EFB가 upbit_minute_data에 유지하는 기간과 같음)
+# --------------------------------------------------
+
+DEFAULT_STORE_DIR = os.environ.get(
+    "CANDLE_STORE_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "Candle_Data"),
+)
+
+MINUTES_PER_DAY = 1440
+
+# 보관 기간(일): 오늘(UTC)을 포함해 이 기간에 걸친 날 파일만 남김
+RETENTION_DAYS = 20
+
+# 봉 단위 -> 분 (모두 1440의 약수이므로 봉이 날짜 경계를 넘지 않음)
+TIMEFRAME_MINUTES = {'1m': 1, '5m': 5, '15m': 15, '1h': 60, '1d': 1440}
+
+# 배열의 행 순서
+FIELDS = ('open', 'high', 'low', 'close', 'acc_trade_volume', 'acc_trade_price')
+
+# Upbit API 응답(EFB) 컬럼 -> 저장 필드
+API_COLUMNS = {
+    'opening_price': 'open',
+    'high_price': 'high',
+    'low_price': 'low',
+    'trade_price': 'close',
+    'candle_acc_trade_volume': 'acc_trade_volume',
+    'candle_acc_trade_price': 'acc_trade_price',
+}
+
+# 저장 필드 -> 대시보드 테이블(upbit_minute_data_2) 컬럼
+TABLE_COLUMNS = {
+    'open': 'OPENING_PRICE',
+    'high': 'HIGH_PRICE',
+    'low': 'LOW_PRICE',
+    'close': 'TRADE_PRICE',
+    'acc_trade_volume': 'CANDLE_ACC_TRADE_VOLUME',
+    'acc_trade_price': 'CANDLE_ACC_TRADE_PRICE',
+}
+
+
+def _day_path(root, market, day):
+    return os.path.join(root, market, f"{day}.npy")
+
+
+def _open_day_for_write(root, market, day):
+    """
+    하루치 파일을 r+ 메모리 매핑으로 연다. 없으면 NaN으로 채운 파일을 만든 뒤 교체(rename)하여
+    읽는 쪽이 초기화 전의 파일을 보지 않게 한다.
+    """
+    path = _day_path(root, market, day)
+    if not os.path.exists(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp.npy"
+        np.save(tmp_path, np.full((len(FIELDS), MINUTES_PER_DAY), np.nan))
+        os.replace(tmp_path, path)
+    return np.load(path, mmap_mode='r+')
+
+
+def append_candles(market, data, root=None):
+    """
+    Upbit API 형식의 분봉 DataFrame을 저장소에 기록한다. 같은 분이 이미 있으면 덮어쓴다.
+
+    Parameters:
+    market (str): 종목 코드
+    data (pd.DataFrame): candle_date_time_utc(UTC 문자열 또는 datetime)와 API_COLUMNS 컬럼을 가진 분봉
+
+    Returns:
+    int: 기록한 분봉 수
+    """
+    if data is None or data.empty:
+        return 0
+    root = root or DEFAULT_STORE_DIR
+
+    minutes = pd.to_datetime(data['candle_date_time_utc']).values.astype('datetime64[m]')
+    days = minutes.astype('datetime64[D]')
+    slots = (minutes - days).astype(np.int64)
+    values = np.vstack([data[column].to_numpy(dtype=np.float64) for column in API_COLUMNS])
+
+    for day in np.unique(days):
+        mask = days == day
+        array = _open_day_for_write(root, market, str(day))
+        array[:, slots[mask]] = values[:, mask]
+        array.flush()
+        del array
+    return len(data)
+
+
+def prune_candles(days=RETENTION_DAYS, root=None, now_utc=None):
+    """
+    최근 days일 범위(default_range)가 시작되는 날보다 이전 날 파일을 삭제하고, 비게 된 종목 폴더를 지운다.
+    다른 프로세스가 메모리 매핑 중이라 지울 수 없는 파일(Windows)은 건너뛰고 다음 호출에서 다시 시도한다.
+
+    Returns:
+    int: 삭제한 파일 수
+    """
+    root = root or DEFAULT_STORE_DIR
+    start, _ = default_range(days, now_utc)
+    cutoff = f"{start.date()}.npy"  # 파일 이름(YYYY-MM-DD.npy)은 문자열 순서가 날짜 순서
+
+    removed = 0
+    for market in list_markets(root):
+        market_dir = os.path.join(root, market)
+        for name in os.listdir(market_dir):
+            if not name.endswith('.npy') or name >= cutoff:
+                continue
+            try:
+                os.remove(os.path.join(market_dir, name))
+                removed += 1
+            except OSError:
+                continue
+        try:
+            os.rmdir(market_dir)  # 남은 파일이 있으면 실패하고 그대로 둠
+        except OSError:
+            pass
+    return removed
+
+
+def list_markets(root=None):
+    root = root or DEFAULT_STORE_DIR
+    if not os.path.isdir(root):
+        return []
+    return sorted(name for name in os.listdir(root) if os.path.isdir(os.path.join(root, name)))
+
+
+def iter_candle_days(market, start, end, root=None):
+    """
+    start <= 시각 < end 범위를 하루 단위 메모리 매핑 뷰로 돌려준다 (복사 없음, 파일이 없는 날은 건너뜀).
+
+    Yields:
+    tuple: (np.datetime64[m] 첫 분, np.ndarray (len(FIELDS), 분 수) 읽기 전용 memmap 뷰)
+    """
+    root = root or DEFAULT_STORE_DIR
+    start = np.datetime64(start, 'm')
+    end = np.datetime64(end, 'm')
+    day = start.astype('datetime64[D]')
+    while day < end:
+        path = _day_path(root, market, str(day))
+        if os.path.exists(path):
+            day_start = day.astype('datetime64[m]')
+            lo = max(int((start - day_start).astype(np.int64)), 0)
+            hi = min(int((end - day_start).astype(np.int64)), MINUTES_PER_DAY)
+            if lo < hi:
+                yield day_start + lo, np.load(path, mmap_mode='r')[:, lo:hi]
+        day += 1
+
+
+def _floor_minutes(value, minutes):
+    value = np.datetime64(value, 'm')
+    day = value.astype('datetime64[D]').astype('datetime64[m]')
+    return day + (value - day).astype(np.int64) // minutes * minutes
+
+
+def resample_candles(candles, minutes):
+    """
+    1분 간격(NaN 포함, dropna=False) 분봉을 minutes분 봉으로 합친다.
+    시가 = 첫 분봉 시가, 종가 = 마지막 분봉 종가, 고가/저가 = 최대/최소, 거래량/거래대금 = 합.
+    분봉이 하나도 없는 봉은 모든 필드가 NaN이다.
+
+    Parameters:
+    candles (dict): load_candles(..., dropna=False) 결과. 하루 단위 조각마다 봉 경계에 맞춰 시작/끝나야 함
+    """
+    times = candles['time']
+    if len(times) % minutes:
+        raise ValueError(f"{minutes}분 봉 경계에 맞지 않는 범위입니다: {len(times)}분")
+    bars = len(times) // minutes
+    block = np.vstack([np.asarray(candles[field], dtype=np.float64) for field in FIELDS]).reshape(len(FIELDS), bars, minutes)
+
+    present = ~np.isnan(block[FIELDS.index('close')])
+    has_any = present.any(axis=1)
+    first = present.argmax(axis=1)
+    last = minutes - 1 - present[:, ::-1].argmax(axis=1)
+    rows = np.arange(bars)
+
+    result = {'time': times[::minutes]}
+    with np.errstate(invalid='ignore'):
+        result['open'] = block[FIELDS.index('open'), rows, first]
+        result['close'] = block[FIELDS.index('close'), rows, last]
+        result['high'] = np.fmax.reduce(block[FIELDS.index('high')], axis=1)
+        result['low'] = np.fmin.reduce(block[FIELDS.index('low')], axis=1)
+        for field in ('acc_trade_volume', 'acc_trade_price'):
+            result[field] = np.nansum(block[FIELDS.index(field)], axis=1)
+    for field in FIELDS:
+        result[field] = np.where(has_any, result[field], np.nan)
+    return result
+
+
+def load_candles(market, start, end, root=None, dropna=True, timeframe='1m'):
+    """
+    종목 분봉(또는 timeframe 봉)을 필드별 numpy 배열로 읽는다.
+
+    Parameters:
+    start, end (datetime): UTC, start <= 시각 < end
+    dropna (bool): True면 분봉이 없는 분을 제외 (DB 조회 결과와 같은 행 구성).
+                   False면 1분 간격 그대로 NaN을 포함하여 반환하며,
+                   범위가 하루 안이면 반환 배열이 파일의 memmap 뷰 그대로(복사 없음)이다.
+    timeframe (str): '1m', '5m', '15m', '1h', '1d'. 1m이 아니면 start/end를 봉 경계로 맞춰
+                     start가 속한 봉부터 end 이전에 시작하는 봉까지 읽어 합친다.
+
+    Returns:
+    dict: {'time': datetime64[m] 배열, 'open': ..., 'high': ..., 'low': ..., 'close': ...,
+           'acc_trade_volume': ..., 'acc_trade_price': ...}
+    """
+    minutes = TIMEFRAME_MINUTES[timeframe]
+    if minutes > 1:
+        start = _floor_minutes(start, minutes)
+        end = _floor_minutes(np.datetime64(end, 'm') + minutes - 1, minutes)
+        candles = resample_candles(load_candles(market, start, end, root, dropna=False), minutes)
+        if dropna:
+            present = ~np.isnan(candles['close'])
+            candles = {key: values[present] for key, values in candles.items()}
+        return candles
+
+    parts = list(iter_candle_days(market, start, end, root))
+    if not parts:
+        block = np.empty((len(FIELDS), 0))
+        times = np.empty(0, dtype='datetime64[m]')
+    elif len(parts) == 1:
+        first, block = parts[0]
+        times = first + np.arange(block.shape[1])
+    else:
+        block = np.concatenate([part for _, part in parts], axis=1)
+        times = np.concatenate([first + np.arange(part.shape[1]) for first, part in parts])
+
+    if dropna:
+        present = ~np.isnan(block[FIELDS.index('close')])
+        if not present.all():
+            block = block[:, present]
+            times = times[present]
+
+    candles = {'time': times}
+    for i, field in enumerate(FIELDS):
+        candles[field] = block[i]
+    return candles
+
+
+def load_candles_frame(markets, start, end, root=None, timeframe='1m'):
+    """
+    여러 종목 분봉(또는 timeframe 봉)을 대시보드 테이블 컬럼명(MARKET, CANDLE_DATE_TIME_UTC, HIGH_PRICE, ...)의
+    DataFrame으로 읽는다 (fetch_data로 upbit_minute_data_2 / upbit_candle_<timeframe>_2를 조회한 것과 같은 형식).
+    """
+    frames = []
+    for market in markets:
+        candles = load_candles(market, start, end, root, timeframe=timeframe)
+        if len(candles['time']) == 0:
+            continue
+        frame = pd.DataFrame({column: candles[field] for field, column in TABLE_COLUMNS.items()})
+        frame.insert(0, 'CANDLE_DATE_TIME_UTC', candles['time'].astype('datetime64[ns]'))
+        frame.insert(0, 'MARKET', market)
+        frames.append(frame)
+
+    if not frames:
+        return pd.DataFrame(columns=['MARKET', 'CANDLE_DATE_TIME_UTC', *TABLE_COLUMNS.values()])
+    return pd.concat(frames, ignore_index=True)
+
+
+def default_range(days=20, now_utc=None):
+    """
+    최근 days일 범위 (start, end) — EFB가 upbit_minute_data에 유지하는 기간과 같음
+    """
+    now_utc = now_utc or datetime.utcnow()
+    end = now_utc.replace(second=0, microsecond=0) + timedelta(minutes=1)
+    return end - timedelta(days=days), end
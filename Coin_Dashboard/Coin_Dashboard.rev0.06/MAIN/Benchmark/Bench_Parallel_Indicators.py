@@ -0,0 +1,78 @@
+import os
+import sys
+import time
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd
+
+from Bench_Universe_Indicators import make_candles
+from Calculate_Indicator.Parallel_Calculator import (MIN_PARALLEL_ROWS, cal_universe_indicators_parallel, get_pool,
+                                                     last_partition_count, shutdown_pool)
+
+# --------------------------------------------------
+#  전체 재계산(지표 + 종목별 상태) 워커 수별 시간 비교
+#  - workers=1: 현재 프로세스에서 cal_universe_indicators + 종목별 상태 생성
+#  - workers=N: 종목 파티션을 프로세스 풀에 나눠 계산 (입력 캔들은 공유 메모리로 전달)
+#  결과 DataFrame이 workers=1과 같은지(비트 단위), 종목별 워터마크/EMA 시드가 같은지 함께 확인
+#  (기본은 MIN_PARALLEL_ROWS를 0으로 낮춰 작은 입력도 프로세스 풀로 계산하고, workers > 1이면 풀에 넘긴
+#   파티션 수(parts)가 0이 아닌지 확인. --min-rows로 운영 기준값을 줄 수 있음)
+#  (프로세스 풀은 미리 띄워 두고 측정: 실제 운영에서는 분마다 같은 풀을 재사용)
+# --------------------------------------------------
+
+
+def timed(df, workers, repeat, min_rows=0):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = cal_universe_indicators_parallel(df, workers=workers, with_states=True, min_rows=min_rows)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def same_states(actual, expected):
+    if actual.keys() != expected.keys():
+        return False
+    for market, state in expected.items():
+        other = actual[market]
+        if (other.watermark, other.ema_15, other.ema_360) != (state.watermark, state.ema_15, state.ema_360):
+            return False
+        if not other.tail.equals(state.tail):
+            return False
+    return True
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--markets', type=int, nargs='+', default=[100, 500])
+    parser.add_argument('--rows', type=int, default=2000, help='종목당 최대 캔들 수')
+    parser.add_argument('--workers', type=int, nargs='+',
+                        default=sorted({1, 2, 4, 8, os.cpu_count() or 1}))
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--min-rows', type=int, default=0,
+                        help=f'이보다 캔들이 적으면 현재 프로세스에서 계산 (운영 기준값 {MIN_PARALLEL_ROWS})')
+    args = parser.parse_args()
+
+    print(f"CPU 코어 {os.cpu_count()}개")
+    print(f"{'markets':>8} {'rows':>9} {'workers':>8} {'parts':>6} {'sec':>8} {'speedup':>8} {'identical':>10}")
+    try:
+        for n_markets in args.markets:
+            df = make_candles(n_markets, args.rows)
+            base_sec, (expected, expected_states) = timed(df, 1, args.repeat)
+            for workers in args.workers:
+                if workers > 1:
+                    get_pool(workers).submit(int).result()  # 워커 프로세스 미리 띄우기
+                sec, (actual, states) = timed(df, workers, args.repeat, args.min_rows)
+                parts = last_partition_count()
+                if workers > 1 and len(df) >= args.min_rows:
+                    assert parts > 0, f"workers={workers}인데 프로세스 풀을 사용하지 않았습니다."
+                try:
+                    pd.testing.assert_frame_equal(actual, expected, check_exact=True)
+                    identical = same_states(states, expected_states)
+                except AssertionError as e:
+                    print(e)
+                    identical = False
+                print(f"{n_markets:>8} {len(df):>9} {workers:>8} {parts:>6} {sec:>8.3f} {base_sec / sec:>7.1f}x {str(identical):>10}")
+    finally:
+        shutdown_pool()
@@ -0,0 +1,224 @@
+import os
+import sys
+import time
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pandas as pd
+
+from Calculate_Indicator.SIGNAL_Generator import generate_trade_signal, trade_signal_arrays
+
+# --------------------------------------------------
+#  generate_trade_signal 실행 시간 비교 (행 수별)
+#  - legacy: 이전 구현 (행별 apply + 임시 컬럼 17개 추가/삭제)
+#  - frame: 현재 generate_trade_signal (DataFrame 입력, Score/Signal/Confidence만 추가)
+#  - arrays: trade_signal_arrays (지표 배열 입력)
+#  세 결과가 같은지(Signal 일치, Score/Confidence 비트 단위 일치) 함께 확인
+# --------------------------------------------------
+
+INDICATOR_COLUMNS = ['EMA_15', 'EMA_360', 'VWAP', 'BALL_HIGH', 'BALL_LOW', 'RSI_360', 'STO_K', 'STO_D']
+
+
+def legacy_generate_trade_signal(df):
+    """
+    이전 generate_trade_signal 구현 그대로 (비교 기준)
+    """
+    # --------------------------------------------------
+    # 1) 필수 컬럼 존재 여부 확인
+    # --------------------------------------------------
+    required_columns = {
+        'EMA_15', 'EMA_360',
+        'VWAP', 'BALL_HIGH', 'BALL_LOW',
+        'RSI_360',
+        'STO_K', 'STO_D'
+    }
+    if not required_columns.issubset(df.columns):
+        missing = required_columns - set(df.columns)
+        raise ValueError(f"입력 데이터에 다음 필수 컬럼이 누락되었습니다: {missing}")
+    
+    # --------------------------------------------------
+    # 2) 가중치 (수정)
+    # --------------------------------------------------
+    base_weights = {
+        'EMA': 0.3,         # 기존 0.4 -> 0.3
+        'Bollinger': 0.2,   # 기존 0.3 -> 0.2
+        'RSI': 0.3,         # 기존 0.2 -> 0.3
+        'Stochastic': 0.2   # 기존 0.1 -> 0.2
+    }
+    
+    # --------------------------------------------------
+    # 3) "연속형" 지표 계산 (이전과 동일)
+    # --------------------------------------------------
+    
+    # (A) EMA 연속 신호
+    df['ema_ratio'] = (df['EMA_15'] - df['EMA_360']) / df['EMA_360']
+    df['ema_signal'] = df['ema_ratio'].clip(-1, 1)
+    
+    # (B) Bollinger 신호
+    df['BALL_MID'] = (df['BALL_HIGH'] + df['BALL_LOW']) / 2.0
+    df['bollinger_ratio'] = (df['VWAP'] - df['BALL_MID']) / (df['BALL_HIGH'] - df['BALL_MID'])
+    df['bollinger_signal'] = df['bollinger_ratio'].clip(-1, 1)
+    
+    # (C) RSI 신호
+    df['rsi_signal'] = (50 - df['RSI_360']) / 50
+    df['rsi_signal'] = df['rsi_signal'].clip(-1, 1)
+    
+    # (D) Stochastic
+    df['stoch_diff'] = df['STO_K'] - df['STO_D']
+    df['stochastic_signal'] = (df['stoch_diff'] / 100).clip(-1, 1)
+    
+    # --------------------------------------------------
+    # 4) 이벤트 구간(임계 구간)에서의 가중치 강화
+    # --------------------------------------------------
+    
+    # (A) RSI: 과매수/과매도 상태에서 가중치 2배
+    def rsi_adaptive_factor(rsi_value):
+        if rsi_value < 30 or rsi_value > 70:
+            return 2.0
+        else:
+            return 1.0
+    
+    # (B) Bollinger: 밴드 상/하단 벗어나면 가중치 2배
+    def bollinger_adaptive_factor(row):
+        if row['VWAP'] > row['BALL_HIGH'] or row['VWAP'] < row['BALL_LOW']:
+            return 2.0
+        else:
+            return 1.0
+    
+    # (C) EMA 이벤트 (골든/데드 크로스 보너스)
+    df['ema_prev_diff'] = (df['EMA_15'].shift(1) - df['EMA_360'].shift(1))
+    df['ema_curr_diff'] = (df['EMA_15'] - df['EMA_360'])
+    
+    def ema_event_bonus(row):
+        if (row['ema_prev_diff'] <= 0) and (row['ema_curr_diff'] > 0):
+            # 골든크로스
+            return +0.3
+        elif (row['ema_prev_diff'] >= 0) and (row['ema_curr_diff'] < 0):
+            # 데드크로스
+            return -0.3
+        else:
+            return 0.0
+    
+    # 행별 적용
+    df['rsi_factor'] = df['RSI_360'].apply(rsi_adaptive_factor)
+    df['boll_factor'] = df.apply(bollinger_adaptive_factor, axis=1)
+    df['ema_event_score'] = df.apply(ema_event_bonus, axis=1)
+    
+    # --------------------------------------------------
+    # 5) 서브 점수 계산
+    # --------------------------------------------------
+    df['ema_score'] = (df['ema_signal'] 
+                       * base_weights['EMA']
+                       + df['ema_event_score'])
+    
+    df['bollinger_score'] = (df['bollinger_signal']
+                             * base_weights['Bollinger']
+                             * df['boll_factor'])
+    
+    df['rsi_score'] = (df['rsi_signal']
+                       * base_weights['RSI']
+                       * df['rsi_factor'])
+    
+    df['stochastic_score'] = (df['stochastic_signal']
+                              * base_weights['Stochastic'])
+    
+    # --------------------------------------------------
+    # 6) 최종 Score
+    # --------------------------------------------------
+    df['Score'] = (df['ema_score']
+                   + df['bollinger_score']
+                   + df['rsi_score']
+                   + df['stochastic_score'])
+    
+    # --------------------------------------------------
+    # 7) Signal 결정
+    #    (조금 더 부드럽게: 임계값 ±0.3)
+    # --------------------------------------------------
+    conditions = [
+        df['Score'] >  0.3,
+        df['Score'] < -0.3
+    ]
+    choices = ['Long', 'Short']
+    df['Signal'] = np.select(conditions, choices, default='Hold')
+    
+    # --------------------------------------------------
+    # 8) Confidence
+    # --------------------------------------------------
+    df['Confidence'] = df['Score'].abs() * 100
+    df.loc[df['Signal'] == 'Hold', 'Confidence'] = 0
+    
+    # --------------------------------------------------
+    # 9) 필요시 정리
+    # --------------------------------------------------
+    drop_cols = [
+        'ema_ratio', 'ema_signal',
+        'bollinger_ratio', 'bollinger_signal',
+        'rsi_signal',
+        'stoch_diff', 'stochastic_signal',
+        'ema_prev_diff', 'ema_curr_diff',
+        'ema_event_score',
+        'rsi_factor', 'boll_factor',
+        'ema_score', 'bollinger_score', 'rsi_score', 'stochastic_score',
+        'BALL_MID'
+    ]
+    df.drop(columns=drop_cols, inplace=True)
+    
+    return df
+
+
+def make_indicators(rows, seed=0):
+    """
+    지표 값 분포를 흉내낸 임의 데이터 (NaN, 밴드 폭 0, EMA 크로스 포함)
+    """
+    rng = np.random.default_rng(seed)
+    price = 100 + np.cumsum(rng.normal(0, 0.1, rows))
+    df = pd.DataFrame({
+        'EMA_15': price + rng.normal(0, 0.5, rows),
+        'EMA_360': price + rng.normal(0, 0.5, rows),
+        'VWAP': price + rng.normal(0, 1.0, rows),
+        'BALL_HIGH': price + 2,
+        'BALL_LOW': price - 2,
+        'RSI_360': rng.uniform(0, 100, rows),
+        'STO_K': rng.uniform(0, 100, rows),
+        'STO_D': rng.uniform(0, 100, rows),
+    })
+    for column in INDICATOR_COLUMNS:
+        df.loc[rng.random(rows) < 0.001, column] = np.nan
+    df.loc[rng.random(rows) < 0.001, 'BALL_HIGH'] = df['BALL_LOW']
+    return df
+
+
+def timed(func):
+    start = time.perf_counter()
+    result = func()
+    return time.perf_counter() - start, result
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', default='10000,100000,1000000')
+    parser.add_argument('--legacy-max', type=int, default=1_000_000, help='이 행 수까지만 legacy 측정')
+    args = parser.parse_args()
+
+    print(f"{'rows':>9} {'legacy(s)':>10} {'frame(s)':>9} {'arrays(s)':>10} {'speedup':>8} {'match':>6}")
+    for rows in map(int, args.rows.split(',')):
+        df = make_indicators(rows)
+        frame_sec, frame = timed(lambda: generate_trade_signal(df.copy()))
+        arrays_sec, (signal, confidence, score) = timed(
+            lambda: trade_signal_arrays(*(df[column].to_numpy() for column in INDICATOR_COLUMNS)))
+
+        match = (np.array_equal(frame['Signal'].to_numpy(), signal)
+                 and np.array_equal(frame['Score'].to_numpy(), score, equal_nan=True)
+                 and np.array_equal(frame['Confidence'].to_numpy(), confidence, equal_nan=True))
+        legacy_text, speedup_text = '-', '-'
+        if rows <= args.legacy_max:
+            legacy_sec, legacy = timed(lambda: legacy_generate_trade_signal(df.copy()))
+            match = match and list(legacy.columns) == list(frame.columns) and all(
+                np.array_equal(legacy[column].to_numpy(), frame[column].to_numpy(),
+                               equal_nan=column != 'Signal')
+                for column in ('Score', 'Signal', 'Confidence')
+            )
+            legacy_text, speedup_text = f"{legacy_sec:.2f}", f"{legacy_sec / frame_sec:.0f}x"
+        print(f"{rows:>9} {legacy_text:>10} {frame_sec:>9.3f} {arrays_sec:>10.3f} {speedup_text:>8} {str(match):>6}")
@@ -0,0 +1,180 @@
+import os
+import sys
+import json
+import time
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pandas as pd
+
+from Calculate_Indicator.Indactors_Pacakge import cal_ema, cal_ball, cal_rsi, cal_sto, generate_trade_signal
+from Calculate_Indicator.BALL_Calculator import BallStream
+from Calculate_Indicator.RSI_Calculator import RsiStream
+from Calculate_Indicator.STO_Calculator import StoStream
+from Calculate_Indicator.Streaming_Window import EmaState, RollingMax, RollingMean, RollingMin, RollingVariance
+from Calculate_Indicator.Indicator_State import IndicatorState, INPUT_COLUMNS, WARMUP_ROWS
+from Indication_Updator import calculate_group_indicators, calculate_incremental_indicators
+
+# --------------------------------------------------
+#  스트리밍 지표 검증 / 시간 비교
+#  1) 스트리밍 값 == pandas 일괄 계산 값 (비트 단위, 중간에 to_dict -> JSON -> from_dict로 재시작)
+#     - 기본 연산: rolling mean / var / std / min / max, ewm(adjust=False)
+#     - 지표: cal_ema / cal_ball / cal_rsi / cal_sto
+#  2) 증분 계산: 이전 방식(tail + 새 캔들에 pandas rolling) vs 스트리밍 상태 갱신
+#     분마다 새 캔들 1개씩 넣을 때 캔들당 계산 시간과, 전체 재계산 결과와의 최대 상대 오차
+#     (이전 방식은 매번 EMA를 직전 값으로 다시 시작하므로 VWAP이 NaN인 캔들 뒤에서 전체 재계산과 어긋남)
+# --------------------------------------------------
+
+
+def make_candles(n_rows, seed=0):
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.002, n_rows)))
+    close[n_rows // 3:n_rows // 3 + 300] = close[n_rows // 3]  # 가격이 멈춘 구간 (같은 값 연속)
+    volume = rng.uniform(0.1, 10, n_rows)
+    volume[rng.random(n_rows) < 0.01] = 0  # 거래가 없는 분: VWAP = NaN
+    df = pd.DataFrame({
+        'MARKET': 'KRW-TEST',
+        'CANDLE_DATE_TIME_UTC': pd.date_range('2024-01-01', periods=n_rows, freq='min'),
+        'HIGH_PRICE': close * (1 + rng.uniform(0, 0.003, n_rows)),
+        'LOW_PRICE': close * (1 - rng.uniform(0, 0.003, n_rows)),
+        'TRADE_PRICE': close,
+        'CANDLE_ACC_TRADE_VOLUME': volume,
+        'CANDLE_ACC_TRADE_PRICE': volume * close,
+    })
+    with np.errstate(divide='ignore', invalid='ignore'):
+        df['VWAP'] = df['CANDLE_ACC_TRADE_PRICE'] / df['CANDLE_ACC_TRADE_VOLUME']
+    return df
+
+
+def run_stream(stream, rows, restart_at):
+    """
+    rows를 하나씩 넣고, restart_at 번째에서 상태를 JSON으로 저장/복원한 뒤 이어서 넣는다.
+    """
+    outputs = []
+    for i, args in enumerate(rows):
+        if i == restart_at:
+            stream = type(stream).from_dict(json.loads(json.dumps(stream.to_dict())))
+        outputs.append(stream.update(*args))
+    return np.array(outputs, dtype=float)
+
+
+def check(name, streamed, batch):
+    identical = np.array_equal(streamed, np.asarray(batch, dtype=float), equal_nan=True)
+    print(f"{name:>22} {str(identical):>10}")
+    return identical
+
+
+def verify_streams(df):
+    vwap = df['VWAP']
+    values = [(value,) for value in vwap]
+    restart = len(df) // 2
+    print(f"{'stream':>22} {'identical':>10}")
+    results = [
+        check('rolling mean(14, 1)', run_stream(RollingMean(14, 1), values, restart),
+              vwap.rolling(14, min_periods=1).mean()),
+        check('rolling mean(224)', run_stream(RollingMean(224), values, restart), vwap.rolling(224).mean()),
+        check('rolling var(224)', run_stream(RollingVariance(224), values, restart), vwap.rolling(224).var()),
+        check('rolling min(224)', run_stream(RollingMin(224), values, restart), vwap.rolling(224).min()),
+        check('rolling max(224)', run_stream(RollingMax(224), values, restart), vwap.rolling(224).max()),
+        check('cal_ema(112)', run_stream(EmaState(112), values, restart), cal_ema(vwap, 112)),
+        check('cal_ema(224)', run_stream(EmaState(224), values, restart), cal_ema(vwap, 224)),
+        check('cal_rsi(14)', run_stream(RsiStream(14), values, restart), cal_rsi(vwap, period=14)),
+    ]
+    ball = run_stream(BallStream(224, 2), values, restart)
+    upper, lower = cal_ball(vwap, window=224, num_std_dev=2)
+    results += [check('cal_ball high', ball[:, 0], upper), check('cal_ball low', ball[:, 1], lower)]
+
+    sto_rows = list(df[['HIGH_PRICE', 'LOW_PRICE', 'TRADE_PRICE']].itertuples(index=False, name=None))
+    sto = run_stream(StoStream(224, 14, 3), sto_rows, restart)
+    sto_df = cal_sto(df[['HIGH_PRICE', 'LOW_PRICE', 'TRADE_PRICE']], period=224, smooth_k=14, smooth_d=3)
+    results += [check('cal_sto K', sto[:, 0], sto_df['STO_K']), check('cal_sto D', sto[:, 1], sto_df['STO_D'])]
+    return all(results)
+
+
+def legacy_incremental_indicators(state, new_rows):
+    """
+    이전 calculate_incremental_indicators 구현 그대로 (tail + 새 캔들에 pandas rolling, 비교 기준)
+    """
+    n_tail = len(state.tail)
+    frame = pd.concat([state.tail, new_rows[INPUT_COLUMNS]], ignore_index=True)
+
+    for column, span, seed in (('EMA_15', 112, state.ema_15), ('EMA_360', 224, state.ema_360)):
+        seeded = pd.concat([pd.Series([seed], dtype=float), new_rows['VWAP']], ignore_index=True)
+        frame[column] = np.nan
+        frame.loc[n_tail - 1:, column] = cal_ema(seeded, span).values
+
+    frame['BALL_HIGH'], frame['BALL_LOW'] = cal_ball(frame['VWAP'], window=224, num_std_dev=2)
+    frame['RSI_360'] = cal_rsi(frame['VWAP'], period=14)
+
+    sto_df = cal_sto(frame[['HIGH_PRICE', 'LOW_PRICE', 'TRADE_PRICE']], period=224, smooth_k=14, smooth_d=3)
+    frame['STO_K'] = sto_df['STO_K']
+    frame['STO_D'] = sto_df['STO_D']
+
+    frame = generate_trade_signal(frame)
+
+    result = new_rows.reset_index(drop=True).copy()
+    for column in ['EMA_15', 'EMA_360', 'BALL_HIGH', 'BALL_LOW', 'RSI_360', 'STO_K', 'STO_D']:
+        result[column] = frame[column].iloc[n_tail:].values
+    result['OPINION'] = frame['Signal'].iloc[n_tail:].values
+    result['CONFIDENCE'] = frame['Confidence'].iloc[n_tail:].values
+
+    vwap_max = pd.Series([state.vwap_max, new_rows['VWAP'].max()], dtype=float).max()
+    vwap_min = pd.Series([state.vwap_min, new_rows['VWAP'].min()], dtype=float).min()
+    result.fillna({
+        'EMA_15': state.vwap_first, 'EMA_360': state.vwap_first,
+        'BALL_HIGH': vwap_max, 'BALL_LOW': vwap_min,
+        'RSI_360': 50, 'STO_K': 50, 'STO_D': 50
+    }, inplace=True)
+    return result
+
+
+def run_incremental(func, history, new_candles, use_stream):
+    state = IndicatorState('KRW-TEST')
+    state.advance(calculate_group_indicators(history))
+    frames = []
+    elapsed = 0.0
+    for i in range(len(new_candles)):
+        if use_stream and i == len(new_candles) // 2:
+            # 재시작: INDICATOR_STATE에 저장한 JSON에서 스트리밍 상태 복원
+            state.stream = type(state.ensure_stream()).from_dict(json.loads(json.dumps(state.stream.to_dict())))
+        rows = new_candles.iloc[i:i + 1].reset_index(drop=True)
+        start = time.perf_counter()
+        rows = func(state, rows)
+        elapsed += time.perf_counter() - start
+        state.advance(rows)
+        frames.append(rows)
+    return elapsed / len(new_candles), pd.concat(frames, ignore_index=True)
+
+
+def max_relative_error(result, full):
+    errors = {}
+    for column in ['EMA_15', 'EMA_360', 'BALL_HIGH', 'BALL_LOW', 'RSI_360', 'STO_K', 'STO_D', 'CONFIDENCE']:
+        a, b = result[column].to_numpy(dtype=float), full[column].to_numpy(dtype=float)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            errors[column] = float(np.nanmax(np.where(a == b, 0.0, np.abs(a - b) / np.abs(b))))
+    return max(errors.values()), (result['OPINION'].to_numpy() != full['OPINION'].to_numpy()).sum()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=20000, help='일괄 계산 검증용 캔들 수')
+    parser.add_argument('--candles', type=int, default=500, help='증분 계산으로 넣을 새 캔들 수')
+    args = parser.parse_args()
+
+    df = make_candles(args.rows)
+    streams_ok = verify_streams(df)
+
+    history, new_candles = df.iloc[:-args.candles], df.iloc[-args.candles:]
+    full = calculate_group_indicators(df).iloc[-args.candles:].reset_index(drop=True)
+
+    print()
+    print(f"incremental ({args.candles} updates of 1 new candle, tail {WARMUP_ROWS} rows)")
+    print(f"{'':>16} {'ms/candle':>10} {'max rel err vs full':>20} {'OPINION diff':>13}")
+    for name, func, use_stream in (('pandas rolling', legacy_incremental_indicators, False),
+                                   ('streaming', calculate_incremental_indicators, True)):
+        sec, result = run_incremental(func, history, new_candles, use_stream)
+        error, opinion_diff = max_relative_error(result, full)
+        print(f"{name:>16} {sec * 1000:>10.3f} {error:>20.2e} {opinion_diff:>13}")
+    print(f"all streams identical to pandas: {streams_ok}")
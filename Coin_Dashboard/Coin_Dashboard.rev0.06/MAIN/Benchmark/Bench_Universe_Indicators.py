@@ -0,0 +1,123 @@
+import os
+import sys
+import time
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pandas as pd
+
+from Calculate_Indicator.Indactors_Pacakge import cal_ema, cal_ball, cal_rsi, cal_sto, generate_trade_signal
+from Calculate_Indicator.Indicator_Registry import IndicatorGraph
+from Calculate_Indicator.Universe_Calculator import cal_universe_indicators
+
+# --------------------------------------------------
+#  전체 재계산 지표 계산 시간 비교 (종목 수별)
+#  - groupby: 이전 방식 (종목별로 cal_ema / cal_ball / cal_rsi / cal_sto 후 concat)
+#  - universe: cal_universe_indicators (전 종목 배열에서 지표 레지스트리 DAG를 한 번 계산)
+#  두 결과가 같은지(행 순서, 컬럼, 값 비트 단위) 함께 확인
+# --------------------------------------------------
+
+
+def make_candles(n_markets, n_rows, seed=0):
+    """
+    종목마다 길이가 다른 (일부는 윈도우 224보다 짧은) 무작위 캔들을 시간순으로 섞어 만든다.
+    """
+    rng = np.random.default_rng(seed)
+    frames = []
+    for i in range(n_markets):
+        length = int(rng.integers(n_rows // 10, n_rows + 1)) if i % 5 else int(rng.integers(1, 224))
+        close = 100 * np.exp(np.cumsum(rng.normal(0, 0.002, length)))
+        volume = rng.uniform(0.1, 10, length)
+        volume[rng.random(length) < 0.01] = 0  # 거래가 없는 분: VWAP = NaN
+        frames.append(pd.DataFrame({
+            'MARKET': f"KRW-M{i:03d}",
+            'CANDLE_DATE_TIME_UTC': pd.date_range('2024-01-01', periods=length, freq='min'),
+            'HIGH_PRICE': close * (1 + rng.uniform(0, 0.003, length)),
+            'LOW_PRICE': close * (1 - rng.uniform(0, 0.003, length)),
+            'TRADE_PRICE': close,
+            'CANDLE_ACC_TRADE_VOLUME': volume,
+            'CANDLE_ACC_TRADE_PRICE': volume * close,
+        }))
+    df = pd.concat(frames, ignore_index=True).sort_values('CANDLE_DATE_TIME_UTC', kind='stable', ignore_index=True)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        df['VWAP'] = df['CANDLE_ACC_TRADE_PRICE'] / df['CANDLE_ACC_TRADE_VOLUME']
+    return df
+
+
+def legacy_group_indicators(group):
+    """
+    이전 calculate_group_indicators 구현 그대로 (비교 기준)
+    """
+    group = group.copy()
+
+    group['EMA_15'] = cal_ema(group['VWAP'], 112)
+    group['EMA_360'] = cal_ema(group['VWAP'], 224)
+
+    if len(group['VWAP']) >= 224:
+        group['BALL_HIGH'], group['BALL_LOW'] = cal_ball(group['VWAP'], window=224, num_std_dev=2)
+    else:
+        group['BALL_HIGH'], group['BALL_LOW'] = np.nan, np.nan
+
+    group['RSI_360'] = cal_rsi(group['VWAP'], period=14)
+
+    sto_df = cal_sto(group[['HIGH_PRICE', 'LOW_PRICE', 'TRADE_PRICE']], period=224, smooth_k=14, smooth_d=3)
+    group['STO_K'] = sto_df['STO_K']
+    group['STO_D'] = sto_df['STO_D']
+
+    group = generate_trade_signal(group)
+    group['OPINION'] = group['Signal']
+    group['CONFIDENCE'] = group['Confidence']
+
+    group.fillna({
+        'EMA_15': group['VWAP'].iloc[0] if len(group) > 0 else 0,
+        'EMA_360': group['VWAP'].iloc[0] if len(group) > 0 else 0,
+        'BALL_HIGH': group['VWAP'].max() if len(group) > 0 else float('nan'),
+        'BALL_LOW': group['VWAP'].min() if len(group) > 0 else float('nan'),
+        'RSI_360': 50,
+        'STO_K': 50,
+        'STO_D': 50
+    }, inplace=True)
+
+    return group
+
+
+def groupby_indicators(df):
+    return pd.concat([legacy_group_indicators(group) for _, group in df.groupby('MARKET')], ignore_index=True)
+
+
+def timed(func, df, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(df)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--markets', type=int, nargs='+', default=[4, 20, 100, 500])
+    parser.add_argument('--rows', type=int, default=2000, help='종목당 최대 캔들 수')
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    graph = IndicatorGraph()
+    print(f"지표 DAG 노드 {len(graph.order)}개 (중복 제거 후):")
+    for line in graph.describe():
+        print(f"  {line}")
+
+    print(f"{'markets':>8} {'rows':>9} {'groupby(s)':>11} {'universe(s)':>12} {'speedup':>8} {'identical':>10}")
+    for n_markets in args.markets:
+        df = make_candles(n_markets, args.rows)
+        groupby_sec, expected = timed(groupby_indicators, df, args.repeat)
+        universe_sec, actual = timed(cal_universe_indicators, df, args.repeat)
+        try:
+            pd.testing.assert_frame_equal(actual, expected, check_exact=True)
+            identical = True
+        except AssertionError as e:
+            print(e)
+            identical = False
+        print(f"{n_markets:>8} {len(df):>9} {groupby_sec:>11.3f} {universe_sec:>12.3f} "
+              f"{groupby_sec / universe_sec:>7.1f}x {str(identical):>10}")
@@ -1,4 +1,5 @@
 import pandas as pd
+from Calculate_Indicator.Streaming_Window import RollingMean, RollingVariance
 
 def cal_ball(data, window, num_std_dev):
     """
@@ -26,3 +27,35 @@ def cal_ball(data, window, num_std_dev):
     lower_band = rolling_mean - (rolling_std * num_std_dev)
 
     return upper_band, lower_band
+
+
+class BallStream:
+    """
+    볼린저 밴드 스트리밍 계산. 캔들 1개마다 O(1)로 갱신하며,
+    처음부터 넣으면 cal_ball(data, window, num_std_dev)과 같은 값을 반환합니다.
+    """
+
+    def __init__(self, window, num_std_dev, mean=None, variance=None):
+        self.window = window
+        self.num_std_dev = num_std_dev
+        self.mean = mean or RollingMean(window)
+        self.variance = variance or RollingVariance(window, ddof=1)
+
+    def update(self, value):
+        """
+        Returns:
+        tuple: (상단 밴드, 하단 밴드). 윈도우가 차기 전에는 NaN
+        """
+        rolling_mean = self.mean.update(value)
+        self.variance.update(value)
+        rolling_std = self.variance.std()
+        return rolling_mean + (rolling_std * self.num_std_dev), rolling_mean - (rolling_std * self.num_std_dev)
+
+    def to_dict(self):
+        return {'window': self.window, 'num_std_dev': self.num_std_dev,
+                'mean': self.mean.to_dict(), 'variance': self.variance.to_dict()}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data['window'], data['num_std_dev'],
+                   RollingMean.from_dict(data['mean']), RollingVariance.from_dict(data['variance']))
@@ -0,0 +1,353 @@
+import math
+
+import numpy as np
+import pandas as pd
+from pandas.api.indexers import BaseIndexer
+
+from Calculate_Indicator.BALL_Calculator import BallStream
+from Calculate_Indicator.RSI_Calculator import RsiStream
+from Calculate_Indicator.STO_Calculator import StoStream
+from Calculate_Indicator.Streaming_Window import EmaState
+
+# --------------------------------------------------
+#  지표 레지스트리 + 공유 중간값 DAG
+#  - 지표마다 이름, 파라미터, 출력 컬럼(DB 컬럼명), 출력별 계산 노드, NaN 대체 규칙, 스트리밍 상태를 선언
+#  - 계산 노드는 (연산, 입력 노드, 파라미터)로 식별되어, 여러 지표가 같은 중간값
+#    (VWAP diff, 같은 윈도우의 rolling 평균/표준편차 등)을 쓰면 DAG에서 한 번만 계산
+#  - 여러 종목을 종목 순으로 이어 붙인 배열에서 계산하며, 롤링/EMA/diff는 종목 경계를 넘지 않음
+#
+#  DB 컬럼명은 기존 테이블과의 호환을 위해 그대로 둡니다. 실제 기간은 아래 파라미터가 기준입니다.
+#  (EMA_15 = EMA span 112, EMA_360 = EMA span 224, RSI_360 = RSI period 14)
+#
+#  지표 추가: INDICATORS에 Indicator를 하나 더 넣으면 DB 컬럼 추가, 전체/증분 계산, 기록까지 반영됩니다.
+#  이미 있는 중간값을 쓰는 지표는 그 노드를 다시 계산하지 않습니다.
+# --------------------------------------------------
+
+
+class Node:
+    """
+    DAG의 계산 노드. key가 같은 노드는 같은 값이므로 한 번만 계산합니다.
+    """
+
+    def __init__(self, op, *inputs, **params):
+        self.op = op
+        self.inputs = inputs
+        self.params = params
+        self.key = (op, tuple(node.key for node in inputs), tuple(sorted(params.items())))
+
+    def __repr__(self):
+        args = [repr(node) for node in self.inputs] + [f"{key}={value}" for key, value in sorted(self.params.items())]
+        return f"{self.op}({', '.join(args)})"
+
+
+def column(name):
+    return Node('column', name=name)
+
+
+def diff(node):
+    return Node('diff', node)
+
+
+def clip(node, lower=None, upper=None):
+    return Node('clip', node, lower=lower, upper=upper)
+
+
+def neg(node):
+    return Node('neg', node)
+
+
+def rolling(node, method, window, min_periods, **kwargs):
+    return Node('rolling', node, method=method, window=window, min_periods=min_periods, **kwargs)
+
+
+def ewm(node, span):
+    return Node('ewm', node, span=span)
+
+
+def op(name, *inputs, **params):
+    return Node(name, *inputs, **params)
+
+
+class _SegmentWindowIndexer(BaseIndexer):
+    # 각 행이 속한 종목의 시작 행(segment_start) 앞으로 넘어가지 않는 길이 window_size의 뒤쪽 윈도우
+
+    def get_window_bounds(self, num_values=0, min_periods=None, center=None, closed=None, step=None):
+        end = np.arange(1, num_values + 1, dtype=np.int64)
+        start = np.maximum(end - self.window_size, self.segment_start).astype(np.int64)
+        return start, end
+
+
+class Segments:
+    """
+    종목 순으로 이어 붙인 배열의 종목 구간 정보.
+    offsets: 길이 (종목 수 + 1), i번째 종목은 [offsets[i], offsets[i + 1]) 행
+    """
+
+    def __init__(self, offsets):
+        self.offsets = np.asarray(offsets, dtype=np.intp)
+        self.starts = self.offsets[:-1]
+        self.lengths = np.diff(self.offsets)
+        self.ids = np.repeat(np.arange(len(self.lengths)), self.lengths)
+        self.row_start = np.repeat(self.starts, self.lengths)
+
+    def per_row(self, values):
+        # 종목별 값 하나씩을 행 단위로 펼침
+        return np.repeat(values, self.lengths)
+
+
+def _rsi(avg_gain, avg_loss):
+    # cal_rsi와 같은 순서로 계산
+    rs = avg_gain / avg_loss
+    rsi = 100 - (100 / (1 + rs))
+    rsi = np.where(avg_loss == 0, 100, rsi)
+    rsi = np.where(avg_gain == 0, 0, rsi)
+    return pd.Series(rsi, dtype=float)
+
+
+def _stochastic_raw(close, low_min, high_max):
+    # cal_sto와 같은 순서로 계산 (분모 0은 NaN)
+    denominator = (high_max - low_min).replace(0, np.nan)
+    return 100 * ((close - low_min) / denominator)
+
+
+# 노드 연산: (입력 값 목록, 파라미터, Segments, 원본 DataFrame) -> pd.Series
+def _evaluate_rolling(values, params, segments):
+    indexer = _SegmentWindowIndexer(window_size=params['window'], segment_start=segments.row_start)
+    window = values.rolling(indexer, min_periods=params['min_periods'])
+    if params['method'] == 'std':
+        return window.std(ddof=params.get('ddof', 1))
+    return getattr(window, params['method'])()
+
+
+def _evaluate_diff(values, segments):
+    delta = values.diff()
+    delta.iloc[segments.starts] = np.nan  # 종목별 첫 행은 직전 값이 없음
+    return delta
+
+
+OPS = {
+    'column': lambda inputs, params, segments, frame: frame[params['name']].astype(float).reset_index(drop=True),
+    'diff': lambda inputs, params, segments, frame: _evaluate_diff(inputs[0], segments),
+    'clip': lambda inputs, params, segments, frame: inputs[0].clip(lower=params['lower'], upper=params['upper']),
+    'neg': lambda inputs, params, segments, frame: -inputs[0],
+    'rolling': lambda inputs, params, segments, frame: _evaluate_rolling(inputs[0], params, segments),
+    'ewm': lambda inputs, params, segments, frame: inputs[0].groupby(segments.ids, sort=False)
+                                                            .ewm(span=params['span'], adjust=False).mean()
+                                                            .reset_index(drop=True),
+    'add': lambda inputs, params, segments, frame: inputs[0] + inputs[1],
+    'sub': lambda inputs, params, segments, frame: inputs[0] - inputs[1],
+    'scale': lambda inputs, params, segments, frame: inputs[0] * params['factor'],
+    'rsi': lambda inputs, params, segments, frame: _rsi(*inputs),
+    'stochastic_raw': lambda inputs, params, segments, frame: _stochastic_raw(*inputs),
+}
+
+
+class Indicator:
+    """
+    지표 선언.
+
+    - name: 지표 이름 (스트리밍 상태 저장 키)
+    - params: 파라미터 dict
+    - outputs: {출력 컬럼: 계산 노드} (build(params)가 만듦)
+    - fill: {출력 컬럼: NaN 대체 규칙} - 'first'(종목 첫 VWAP), 'max'/'min'(종목 VWAP 최대/최소) 또는 숫자
+    - stream: 스트리밍 상태 클래스. stream(**params)로 만들고 update(*stream_inputs 값)이 outputs 순서의 값을 반환,
+              to_dict() / stream.from_dict()로 저장/복원
+    - stream_inputs: 스트리밍 상태에 넣는 입력 컬럼
+    - seeded: True이면 점화식 지표(EMA)로, 증분 계산 시작 시 tail을 다시 넣지 않고 마지막 출력 값에서 이어서 계산
+    """
+
+    def __init__(self, name, params, build, fill, stream, stream_inputs, seeded=False):
+        self.name = name
+        self.params = params
+        self.outputs = build(**params)
+        self.fill = fill
+        self.stream = stream
+        self.stream_inputs = stream_inputs
+        self.seeded = seeded
+
+    @property
+    def columns(self):
+        return list(self.outputs)
+
+    def make_stream(self):
+        return self.stream(**self.params)
+
+
+def _ema_outputs(column_name):
+    return lambda span: {column_name: ewm(column('VWAP'), span)}
+
+
+def _bollinger_outputs(window, num_std_dev):
+    vwap = column('VWAP')
+    mean = rolling(vwap, 'mean', window, window)
+    spread = op('scale', rolling(vwap, 'std', window, window, ddof=1), factor=num_std_dev)
+    return {'BALL_HIGH': op('add', mean, spread), 'BALL_LOW': op('sub', mean, spread)}
+
+
+def _rsi_outputs(period):
+    delta = diff(column('VWAP'))
+    avg_gain = rolling(clip(delta, lower=0), 'mean', period, 1)
+    avg_loss = rolling(neg(clip(delta, upper=0)), 'mean', period, 1)
+    return {'RSI_360': op('rsi', avg_gain, avg_loss)}
+
+
+def _stochastic_outputs(period, smooth_k, smooth_d):
+    low_min = rolling(column('LOW_PRICE'), 'min', period, period)
+    high_max = rolling(column('HIGH_PRICE'), 'max', period, period)
+    sto_k = rolling(op('stochastic_raw', column('TRADE_PRICE'), low_min, high_max), 'mean', smooth_k, 1)
+    return {'STO_K': sto_k, 'STO_D': rolling(sto_k, 'mean', smooth_d, 1)}
+
+
+INDICATORS = [
+    Indicator('ema_fast', {'span': 112}, _ema_outputs('EMA_15'), {'EMA_15': 'first'},
+              stream=EmaState, stream_inputs=('VWAP',), seeded=True),
+    Indicator('ema_slow', {'span': 224}, _ema_outputs('EMA_360'), {'EMA_360': 'first'},
+              stream=EmaState, stream_inputs=('VWAP',), seeded=True),
+    Indicator('bollinger', {'window': 224, 'num_std_dev': 2}, _bollinger_outputs,
+              {'BALL_HIGH': 'max', 'BALL_LOW': 'min'},
+              stream=BallStream, stream_inputs=('VWAP',)),
+    Indicator('rsi', {'period': 14}, _rsi_outputs, {'RSI_360': 50},
+              stream=RsiStream, stream_inputs=('VWAP',)),
+    Indicator('stochastic', {'period': 224, 'smooth_k': 14, 'smooth_d': 3}, _stochastic_outputs,
+              {'STO_K': 50, 'STO_D': 50},
+              stream=StoStream, stream_inputs=('HIGH_PRICE', 'LOW_PRICE', 'TRADE_PRICE')),
+]
+
+# 지표 출력 컬럼 (레지스트리 순서)
+INDICATOR_COLUMNS = [name for indicator in INDICATORS for name in indicator.columns]
+
+# 매매 신호 컬럼 (trade_signal_arrays 결과)
+SIGNAL_COLUMNS = {'OPINION': 'VARCHAR2(26)', 'CONFIDENCE': 'NUMBER'}
+
+# 매매 신호 계산에 쓰는 지표 컬럼 (trade_signal_arrays 인자 순서)
+SIGNAL_INPUTS = ['EMA_15', 'EMA_360', 'VWAP', 'BALL_HIGH', 'BALL_LOW', 'RSI_360', 'STO_K', 'STO_D']
+
+
+def output_column_types():
+    """
+    지표 테이블에 있어야 하는 컬럼과 타입 (add_missing_columns 인자)
+    """
+    return {**{name: 'NUMBER' for name in INDICATOR_COLUMNS}, **SIGNAL_COLUMNS}
+
+
+def input_columns():
+    """
+    지표 계산에 필요한 원본 컬럼 (스트리밍 입력 + 계산 노드의 column 입력, 선언 순서)
+    """
+    names = []
+
+    def visit(node):
+        if node.op == 'column':
+            names.append(node.params['name'])
+        for child in node.inputs:
+            visit(child)
+
+    for indicator in INDICATORS:
+        names.extend(indicator.stream_inputs)
+        for node in indicator.outputs.values():
+            visit(node)
+    return list(dict.fromkeys(names))
+
+
+def lookback(node):
+    """
+    노드의 한 행 값을 계산하는 데 필요한 직전 행 수 (입력 경로 중 최대).
+
+    - diff: 1, rolling: window - 1 (입력 노드의 lookback에 더함)
+    - ewm 같은 점화식은 유한한 직전 행으로 같은 값을 낼 수 없으므로 math.inf
+      (증분 계산에서는 seeded 지표로 선언해 마지막 출력 값에서 이어서 계산)
+    """
+    if node.op == 'ewm':
+        return math.inf
+    own = {'diff': 1, 'rolling': node.params.get('window', 1) - 1}.get(node.op, 0)
+    return own + max((lookback(child) for child in node.inputs), default=0)
+
+
+def plan_lookback(indicators=None):
+    """
+    seeded가 아닌 지표마다 새 캔들 1개의 값을 전체 재계산과 같게 얻는 데 필요한 직전 행 수.
+
+    Returns:
+    dict: {지표 이름: 직전 행 수}
+    """
+    indicators = INDICATORS if indicators is None else indicators
+    return {
+        indicator.name: max(lookback(node) for node in indicator.outputs.values())
+        for indicator in indicators if not indicator.seeded
+    }
+
+
+def warmup_rows(indicators=None):
+    """
+    증분 계산 상태가 유지해야 하는 직전 캔들 수 (plan_lookback의 최대값)
+    """
+    plan = plan_lookback(indicators)
+    rows = max(plan.values(), default=0)
+    if rows == math.inf:
+        unbounded = [name for name, value in plan.items() if value == math.inf]
+        raise ValueError(f"직전 행 수가 유한하지 않은 지표는 seeded로 선언해야 합니다: {unbounded}")
+    return rows
+
+
+class IndicatorGraph:
+    """
+    지표 출력 노드들을 key 기준으로 합친 DAG. 같은 key의 중간값은 한 번만 계산합니다.
+    """
+
+    def __init__(self, indicators=None):
+        self.indicators = INDICATORS if indicators is None else indicators
+        self.order = []   # 위상 정렬된 고유 노드
+        seen = set()
+
+        def visit(node):
+            if node.key in seen:
+                return
+            for child in node.inputs:
+                visit(child)
+            seen.add(node.key)
+            self.order.append(node)
+
+        for indicator in self.indicators:
+            for node in indicator.outputs.values():
+                visit(node)
+
+    def describe(self):
+        """
+        Returns:
+        list[str]: 계산 순서대로 노드 표현 (중복 제거 후)
+        """
+        return [repr(node) for node in self.order]
+
+    def evaluate(self, frame, segments):
+        """
+        Parameters:
+        frame (pd.DataFrame): 종목 순으로 이어 붙인 원본 컬럼 (행 번호 0부터)
+        segments (Segments): 종목 구간
+
+        Returns:
+        dict: {출력 컬럼: np.ndarray}
+        """
+        values = {}
+        for node in self.order:
+            inputs = [values[child.key] for child in node.inputs]
+            values[node.key] = OPS[node.op](inputs, node.params, segments, frame)
+        return {
+            name: values[node.key].to_numpy(dtype=float)
+            for indicator in self.indicators
+            for name, node in indicator.outputs.items()
+        }
+
+
+# 출력 컬럼별 NaN 대체 규칙
+FILL_RULES = {name: rule for indicator in INDICATORS for name, rule in indicator.fill.items()}
+
+
+def fill_values(vwap_first, vwap_max, vwap_min):
+    """
+    FILL_RULES를 실제 대체값으로 바꿉니다. (인자는 스칼라 또는 행별 배열)
+
+    Returns:
+    dict: {출력 컬럼: 대체값}
+    """
+    rules = {'first': vwap_first, 'max': vwap_max, 'min': vwap_min}
+    return {name: rules[rule] if isinstance(rule, str) else rule for name, rule in FILL_RULES.items()}
@@ -0,0 +1,173 @@
+import pandas as pd
+from Calculate_Indicator.Indicator_Registry import INDICATORS, input_columns, warmup_rows
+
+# 새 캔들 1개의 지표를 전체 재계산과 동일하게 얻기 위해 필요한 직전 캔들 수
+# (레지스트리 지표 기간에서 계산: 스토캐스틱 최고/최저 223 + %K 스무딩 13 + %D 스무딩 2 = 238)
+WARMUP_ROWS = warmup_rows()
+
+# 지표 계산에 필요한 원본 입력 컬럼 (레지스트리 지표들의 입력)
+INPUT_COLUMNS = ['CANDLE_DATE_TIME_UTC'] + input_columns()
+
+
+class IndicatorState:
+    """
+    종목 하나의 증분 지표 계산 상태.
+
+    - watermark: 마지막으로 계산/기록된 캔들 시각 (CANDLE_DATE_TIME_UTC)
+    - tail: 롤링 윈도우(볼린저, RSI 상승/하락, 스토캐스틱 최고/최저) 계산에 필요한
+            직전 WARMUP_ROWS개의 원본 입력 데이터
+    - ema_15, ema_360: watermark 시점의 EMA 값 (다음 캔들 EMA 계산의 시드)
+    - vwap_first, vwap_max, vwap_min: 전체 재계산 모드의 NaN 대체값과 동일한 값을 내기 위한 누적 통계
+    - stream: watermark 시점까지 반영된 스트리밍 지표 상태 (IndicatorStream). 없으면 tail과 EMA 시드로 만듦
+    """
+
+    def __init__(self, market, watermark=None, tail=None, ema_15=None, ema_360=None,
+                 vwap_first=None, vwap_max=None, vwap_min=None, stream=None):
+        self.market = market
+        self.watermark = watermark
+        self.tail = tail if tail is not None else pd.DataFrame(columns=INPUT_COLUMNS)
+        self.ema_15 = ema_15
+        self.ema_360 = ema_360
+        self.vwap_first = vwap_first
+        self.vwap_max = vwap_max
+        self.vwap_min = vwap_min
+        self.stream = stream
+
+    def is_warm(self):
+        """
+        롤링 윈도우를 채울 만큼 직전 데이터가 쌓였는지 여부.
+        False이면 tail이 곧 종목의 전체 이력이므로 전체 재계산으로 처리합니다.
+        """
+        return (
+            self.watermark is not None
+            and self.ema_15 is not None
+            and self.ema_360 is not None
+            and len(self.tail) >= WARMUP_ROWS
+        )
+
+    def ensure_stream(self):
+        """
+        스트리밍 상태가 없으면 tail을 다시 넣고 EMA는 watermark 시점 값에서 이어서 계산하도록 만듭니다.
+        (tail + 새 캔들에 pandas rolling을 적용하던 증분 계산과 같은 값)
+        """
+        if self.stream is None:
+            self.stream = IndicatorStream.from_tail(self.tail, {'EMA_15': self.ema_15, 'EMA_360': self.ema_360})
+        return self.stream
+
+    def advance(self, computed):
+        """
+        계산이 끝난 행(computed)으로 상태를 전진시킵니다.
+
+        Parameters:
+        computed (pd.DataFrame): 시간순으로 정렬된 계산 결과. INPUT_COLUMNS와 'EMA_15', 'EMA_360'이 포함되어야 합니다.
+        """
+        if computed.empty:
+            return
+
+        vwap = computed['VWAP']
+        if self.vwap_first is None:
+            self.vwap_first = vwap.iloc[0]
+        # pandas max/min과 동일하게 NaN은 건너뜀
+        self.vwap_max = pd.Series([self.vwap_max, vwap.max()], dtype=float).max()
+        self.vwap_min = pd.Series([self.vwap_min, vwap.min()], dtype=float).min()
+
+        tail = pd.concat([self.tail, computed[INPUT_COLUMNS]], ignore_index=True)
+        self.tail = tail.iloc[-WARMUP_ROWS:].reset_index(drop=True)
+
+        last = computed.iloc[-1]
+        self.watermark = last['CANDLE_DATE_TIME_UTC']
+        self.ema_15 = last['EMA_15']
+        self.ema_360 = last['EMA_360']
+
+
+def build_states(df, offsets):
+    """
+    전체 재계산 결과의 종목 구간마다 상태를 만듭니다.
+
+    Parameters:
+    df (pd.DataFrame): 종목 순으로 정렬된 계산 결과 (MARKET, INPUT_COLUMNS, 'EMA_15', 'EMA_360' 포함)
+    offsets (np.ndarray): 종목 구간 경계 (i번째 종목은 [offsets[i], offsets[i + 1]) 행)
+
+    Returns:
+    dict: {MARKET: IndicatorState}
+    """
+    states = {}
+    for start, end in zip(offsets[:-1], offsets[1:]):
+        group = df.iloc[start:end]
+        name = group['MARKET'].iloc[0]
+        state = IndicatorState(name)
+        state.advance(group)
+        states[name] = state
+    return states
+
+
+class IndicatorStream:
+    """
+    종목 하나의 레지스트리 지표(INDICATORS)를 캔들 1개마다 O(1)로 갱신하는 스트리밍 상태.
+
+    to_dict() / from_dict()로 JSON 직렬화하여 INDICATOR_STATE에 저장합니다.
+    """
+
+    def __init__(self, streams=None):
+        self.streams = streams or {indicator.name: indicator.make_stream() for indicator in INDICATORS}
+
+    @classmethod
+    def from_tail(cls, tail, seeds):
+        """
+        tail(INPUT_COLUMNS)의 캔들을 롤링 지표에 차례로 넣고, 점화식 지표(EMA)는 seeds의 값에서 이어서 계산하는
+        상태를 만듭니다.
+
+        Parameters:
+        tail (pd.DataFrame): 직전 캔들 (시간순)
+        seeds (dict): {점화식 지표의 출력 컬럼: watermark 시점 값}
+        """
+        streams = {}
+        for indicator in INDICATORS:
+            if indicator.seeded:
+                stream = indicator.stream.seeded(value=seeds.get(indicator.columns[0]), **indicator.params)
+            else:
+                stream = indicator.make_stream()
+                for values in tail[list(indicator.stream_inputs)].itertuples(index=False, name=None):
+                    stream.update(*values)
+            streams[indicator.name] = stream
+        return cls(streams)
+
+    def seed_values(self):
+        """
+        Returns:
+        dict: {점화식 지표의 출력 컬럼: 직전 캔들 값} (골든/데드 크로스 판단용)
+        """
+        return {indicator.columns[0]: self.streams[indicator.name].value
+                for indicator in INDICATORS if indicator.seeded}
+
+    def update(self, row):
+        """
+        캔들 1개를 반영하고 그 캔들의 지표 값을 반환합니다.
+
+        Parameters:
+        row (dict): {입력 컬럼: 값}
+
+        Returns:
+        list: INDICATOR_COLUMNS 순서의 지표 값
+        """
+        values = []
+        for indicator in INDICATORS:
+            result = self.streams[indicator.name].update(*(row[name] for name in indicator.stream_inputs))
+            if len(indicator.outputs) > 1:
+                values.extend(result)
+            else:
+                values.append(result)
+        return values
+
+    def to_dict(self):
+        return {name: stream.to_dict() for name, stream in self.streams.items()}
+
+    @classmethod
+    def from_dict(cls, data):
+        """
+        Returns:
+        IndicatorStream 또는 None (저장 후 레지스트리에 지표가 추가된 경우: tail로 다시 만들어야 함)
+        """
+        if any(indicator.name not in data for indicator in INDICATORS):
+            return None
+        return cls({indicator.name: indicator.stream.from_dict(data[indicator.name]) for indicator in INDICATORS})
@@ -0,0 +1,249 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import resource_tracker, shared_memory
+
+import numpy as np
+import pandas as pd
+
+from Calculate_Indicator.Indicator_Registry import Segments
+from Calculate_Indicator.Indicator_State import INPUT_COLUMNS, build_states
+from Calculate_Indicator.Universe_Calculator import cal_universe_arrays, cal_universe_indicators, segment_offsets, sort_by_market
+
+# --------------------------------------------------
+#  전 종목 일괄 지표 계산의 프로세스 병렬 실행 (전체 재계산 모드)
+#  - 종목 순으로 정렬한 캔들을 종목 경계에서 행 수가 비슷한 파티션으로 나눠 프로세스 풀에 넘김
+#  - 입력 캔들 배열은 공유 메모리 블록 하나에 담아 넘기고 (DataFrame을 pickle하지 않음),
+#    워커는 자기 파티션 행만 읽어 cal_universe_arrays를 계산한 뒤 결과 배열을 새 공유 메모리 블록에 담아 돌려줌
+#  - 부모 프로세스가 파티션 결과를 이어 붙여 한 번에 기록 (결과는 cal_universe_indicators와 같음)
+# --------------------------------------------------
+
+# 워커 수별 프로세스 풀 (분마다 호출되므로 프로세스를 매번 띄우지 않고 재사용)
+_pool = None
+_pool_workers = None
+
+# 종목 길이가 제각각이므로 워커당 파티션을 여러 개 두어 먼저 끝난 워커가 다음 파티션을 가져가게 함
+PARTITIONS_PER_WORKER = 4
+
+# 이보다 캔들이 적으면 프로세스 간 전달 비용이 계산보다 크므로 현재 프로세스에서 계산
+MIN_PARALLEL_ROWS = 50000
+
+# 마지막 호출에서 프로세스 풀에 넘긴 파티션 수 (0이면 현재 프로세스에서 계산, 벤치마크 확인용)
+_last_partitions = 0
+
+
+class SharedArrays:
+    """
+    1차원 numpy 배열 여러 개를 SharedMemory 블록 하나에 이어 담은 것.
+    handle(블록 이름과 배치 정보)만 pickle해서 다른 프로세스에 넘기고, 받는 쪽은 attach()로 같은 메모리를 읽습니다.
+    고정 크기 dtype(숫자, datetime64, 고정 길이 문자열)만 담을 수 있습니다.
+    """
+
+    ALIGN = 64
+
+    def __init__(self, shm, layout):
+        self.shm = shm
+        self.layout = layout  # {이름: (dtype 문자열, 길이, 바이트 오프셋)}
+
+    @classmethod
+    def create(cls, arrays):
+        """
+        Parameters:
+        arrays (dict): {이름: 1차원 np.ndarray}
+        """
+        arrays = {name: np.ascontiguousarray(values) for name, values in arrays.items()}
+        layout = {}
+        size = 0
+        for name, values in arrays.items():
+            if values.dtype.hasobject:
+                raise TypeError(f"공유 메모리에 담을 수 없는 dtype입니다: {name} ({values.dtype})")
+            size = -(-size // cls.ALIGN) * cls.ALIGN
+            layout[name] = (values.dtype.str, len(values), size)
+            size += values.nbytes
+
+        shm = shared_memory.SharedMemory(create=True, size=max(size, 1))
+        block = cls(shm, layout)
+        for name, values in arrays.items():
+            block.view(name)[:] = values
+        return block
+
+    @classmethod
+    def attach(cls, handle):
+        name, layout = handle
+        return cls(shared_memory.SharedMemory(name=name), layout)
+
+    @property
+    def handle(self):
+        return self.shm.name, self.layout
+
+    def view(self, name):
+        dtype, length, offset = self.layout[name]
+        return np.ndarray((length,), dtype=np.dtype(dtype), buffer=self.shm.buf, offset=offset)
+
+    def read(self, name, start=0, stop=None):
+        """
+        [start, stop) 구간의 복사본 (블록을 닫은 뒤에도 쓸 수 있음)
+        """
+        return self.view(name)[start:stop].copy()
+
+    def close(self):
+        self.shm.close()
+
+    def unlink(self):
+        self.shm.unlink()
+
+
+def get_pool(workers):
+    """
+    워커 수가 workers인 프로세스 풀 (이전 호출과 워커 수가 같으면 재사용)
+    """
+    global _pool, _pool_workers
+    if _pool is None or _pool_workers != workers:
+        shutdown_pool()
+        # 워커가 부모와 같은 resource tracker를 쓰도록 먼저 띄움 (워커가 만든 블록을 부모가 unlink하므로)
+        resource_tracker.ensure_running()
+        _pool = ProcessPoolExecutor(max_workers=workers)
+        _pool_workers = workers
+    return _pool
+
+
+def shutdown_pool():
+    global _pool, _pool_workers
+    if _pool is not None:
+        _pool.shutdown()
+    _pool = None
+    _pool_workers = None
+
+
+def resolve_workers(workers):
+    """
+    workers가 None 또는 0 이하면 CPU 코어 수를 사용합니다.
+    """
+    if workers is None or workers <= 0:
+        return os.cpu_count() or 1
+    return workers
+
+
+def partition_segments(offsets, n_parts):
+    """
+    종목 구간 경계(offsets)를 행 수가 비슷한 n_parts개 이하의 파티션으로 나눕니다. 종목은 나누지 않습니다.
+
+    Returns:
+    list: [(첫 종목 번호, 마지막 종목 번호 + 1), ...]
+    """
+    n_segments = len(offsets) - 1
+    targets = np.linspace(0, offsets[-1], n_parts + 1)[1:-1]
+    cuts = np.searchsorted(offsets, targets)
+    bounds = np.unique(np.concatenate(([0], cuts, [n_segments])))
+    return [(int(lo), int(hi)) for lo, hi in zip(bounds[:-1], bounds[1:]) if hi > lo]
+
+
+def _compute_partition(handle, markets, offsets, with_states):
+    """
+    (워커) 공유 메모리의 [offsets[0], offsets[-1]) 행으로 지표를 계산합니다.
+
+    Returns:
+    tuple: (결과 배열 블록의 handle, {MARKET: IndicatorState} 또는 None)
+    """
+    start, stop = int(offsets[0]), int(offsets[-1])
+    block = SharedArrays.attach(handle)
+    try:
+        frame = pd.DataFrame({name: block.read(name, start, stop) for name in block.layout})
+    finally:
+        block.close()
+
+    local_offsets = np.asarray(offsets, dtype=np.intp) - start
+    arrays = cal_universe_arrays(frame, Segments(local_offsets))
+
+    states = None
+    if with_states:
+        frame.insert(0, 'MARKET', np.repeat(np.asarray(markets, dtype=object), np.diff(local_offsets)))
+        frame['EMA_15'] = arrays['EMA_15']
+        frame['EMA_360'] = arrays['EMA_360']
+        states = build_states(frame, local_offsets)
+
+    result = SharedArrays.create(arrays)
+    result.close()  # 블록은 부모 프로세스가 읽은 뒤 unlink
+    return result.handle, states
+
+
+def _release(handle):
+    block = SharedArrays.attach(handle)
+    block.close()
+    block.unlink()
+
+
+def last_partition_count():
+    """
+    마지막 cal_universe_indicators_parallel 호출에서 프로세스 풀에 넘긴 파티션 수 (0이면 현재 프로세스에서 계산)
+    """
+    return _last_partitions
+
+
+def cal_universe_indicators_parallel(df, workers=None, with_states=False, min_rows=MIN_PARALLEL_ROWS):
+    """
+    cal_universe_indicators를 종목 파티션별로 프로세스 풀에서 계산합니다. 결과는 cal_universe_indicators와 같습니다.
+
+    Parameters:
+    df (pd.DataFrame): 여러 종목의 캔들 (VWAP 계산 완료). 종목 안에서는 시간순이어야 합니다.
+    workers (int, optional): 워커 프로세스 수. None 또는 0 이하면 CPU 코어 수, 1이면 현재 프로세스에서 계산
+    with_states (bool): True이면 종목별 IndicatorState도 워커에서 만들어 함께 반환
+    min_rows (int): 캔들이 이보다 적으면 workers와 관계없이 현재 프로세스에서 계산
+
+    Returns:
+    pd.DataFrame 또는 tuple: 계산 결과 DataFrame (with_states=True이면 (DataFrame, {MARKET: IndicatorState}))
+    """
+    global _last_partitions
+    workers = resolve_workers(workers)
+    df = sort_by_market(df)
+    offsets = segment_offsets(df['MARKET'].to_numpy())
+
+    _last_partitions = 0
+    if workers == 1 or len(df) < min_rows or len(offsets) <= 2:
+        df = cal_universe_indicators(df)
+        if with_states:
+            return df, build_states(df, offsets)
+        return df
+
+    markets = df['MARKET'].to_numpy()[offsets[:-1]]
+    parts = partition_segments(offsets, workers * PARTITIONS_PER_WORKER)
+    _last_partitions = len(parts)
+
+    handles = []
+    states = {}
+    block = SharedArrays.create({name: df[name].to_numpy() for name in INPUT_COLUMNS})
+    try:
+        pool = get_pool(workers)
+        futures = [
+            pool.submit(_compute_partition, block.handle, list(markets[lo:hi]), offsets[lo:hi + 1], with_states)
+            for lo, hi in parts
+        ]
+        errors = []
+        for future in futures:
+            try:
+                handle, part_states = future.result()
+            except Exception as e:
+                errors.append(e)
+                continue
+            handles.append(handle)
+            if part_states:
+                states.update(part_states)
+        if errors:
+            raise errors[0]
+
+        # 파티션 결과를 순서대로 이어 붙여 한 번에 추가
+        results = [SharedArrays.attach(handle) for handle in handles]
+        try:
+            for name in results[0].layout:
+                df[name] = np.concatenate([result.view(name) for result in results])
+        finally:
+            for result in results:
+                result.close()
+    finally:
+        block.close()
+        block.unlink()
+        for handle in handles:
+            _release(handle)
+
+    if with_states:
+        return df, states
+    return df
@@ -1,5 +1,6 @@
 import pandas as pd
 import numpy as np
+from Calculate_Indicator.Streaming_Window import RollingMean
 
 def cal_rsi(data, period=120):
     """
@@ -41,4 +42,45 @@ def cal_rsi(data, period=120):
     # RSI를 pandas Series로 변환
     rsi = pd.Series(rsi, index=data.index)
 
-    return rsi
\ No newline at end of file
+    return rsi
+
+
+class RsiStream:
+    """
+    RSI 스트리밍 계산. 가격 1개마다 O(1)로 갱신하며,
+    처음부터 넣으면 cal_rsi(data, period)와 같은 값을 반환합니다.
+    """
+
+    def __init__(self, period=120, prev_price=None, avg_gain=None, avg_loss=None):
+        self.period = period
+        self.prev_price = prev_price  # 직전 가격 (None: 첫 가격 전)
+        self.avg_gain = avg_gain or RollingMean(period, min_periods=1)
+        self.avg_loss = avg_loss or RollingMean(period, min_periods=1)
+
+    def update(self, price):
+        price = float(price)
+        delta = float('nan') if self.prev_price is None else price - self.prev_price
+        self.prev_price = price
+
+        # Series.clip과 같이 NaN은 유지하고, 0 이상/이하 값은 부호(-0.0 포함)를 그대로 둠
+        gain = delta if (delta != delta or delta >= 0) else 0.0
+        loss = -(delta if (delta != delta or delta <= 0) else 0.0)
+        avg_gain = self.avg_gain.update(gain)
+        avg_loss = self.avg_loss.update(loss)
+
+        # cal_rsi와 같은 우선순위: 평균 상승 0 -> 0, 평균 손실 0 -> 100
+        if avg_gain == 0:
+            return 0.0
+        if avg_loss == 0:
+            return 100.0
+        rs = avg_gain / avg_loss
+        return 100 - (100 / (1 + rs))
+
+    def to_dict(self):
+        return {'period': self.period, 'prev_price': self.prev_price,
+                'avg_gain': self.avg_gain.to_dict(), 'avg_loss': self.avg_loss.to_dict()}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data['period'], data['prev_price'],
+                   RollingMean.from_dict(data['avg_gain']), RollingMean.from_dict(data['avg_loss']))
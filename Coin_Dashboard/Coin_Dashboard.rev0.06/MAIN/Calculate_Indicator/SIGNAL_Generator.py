@@ -1,22 +1,116 @@
 import pandas as pd
 import numpy as np
 
-def generate_trade_signal(df):
+# --------------------------------------------------
+# 가중치 (수정)
+# --------------------------------------------------
+BASE_WEIGHTS = {
+    'EMA': 0.3,         # 기존 0.4 -> 0.3
+    'Bollinger': 0.2,   # 기존 0.3 -> 0.2
+    'RSI': 0.3,         # 기존 0.2 -> 0.3
+    'Stochastic': 0.2   # 기존 0.1 -> 0.2
+}
+
+# Signal 결정 임계값 (조금 더 부드럽게: ±0.3)
+SIGNAL_THRESHOLD = 0.3
+
+# EMA 골든/데드 크로스 보너스
+EMA_CROSS_BONUS = 0.3
+
+
+def trade_signal_arrays(ema_15, ema_360, vwap, ball_high, ball_low, rsi, sto_k, sto_d, segment_starts=None):
     """
     각 지표를 '연속형'으로 계산하면서도,
     전통적으로 임계 구간에서 의미가 큰 지표들은
     추가 가중치(Adaptive Weight)를 줘서
     최종 Score와 Confidence를 보다 유의미하게 산출합니다.
-    
+
     [가중치 수정 버전]
       - EMA:   0.3
       - Boll:  0.2
       - RSI:   0.3
       - Stoch: 0.2
+
+    행별 apply 없이 배열 연산으로 계산하며, 입력 배열은 수정하지 않습니다.
+    NaN 입력은 비교 결과가 False이므로 가중치 1배 / 크로스 보너스 0으로 처리되고,
+    Score가 NaN인 행은 'Hold', Confidence 0이 됩니다.
+
+    Parameters:
+    ema_15 ~ sto_d (array-like): 같은 길이의 지표 배열 (시간순, EMA 크로스는 바로 앞 행과 비교)
+    segment_starts (array-like, optional): 여러 종목을 이어 붙인 배열일 때 각 종목의 시작 행 번호.
+        시작 행은 첫 행처럼 직전 값이 없는 것으로 처리합니다.
+
+    Returns:
+    tuple: (Signal 배열('Long'/'Short'/'Hold'), Confidence 배열, Score 배열)
     """
+    ema_15, ema_360, vwap, ball_high, ball_low, rsi, sto_k, sto_d = (
+        np.asarray(values, dtype=np.float64)
+        for values in (ema_15, ema_360, vwap, ball_high, ball_low, rsi, sto_k, sto_d)
+    )
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        # --------------------------------------------------
+        # 1) "연속형" 지표 계산
+        # --------------------------------------------------
+
+        # (A) EMA 연속 신호
+        ema_diff = ema_15 - ema_360
+        ema_signal = np.clip(ema_diff / ema_360, -1, 1)
+
+        # (B) Bollinger 신호
+        ball_mid = (ball_high + ball_low) / 2.0
+        bollinger_signal = np.clip((vwap - ball_mid) / (ball_high - ball_mid), -1, 1)
+
+        # (C) RSI 신호
+        rsi_signal = np.clip((50 - rsi) / 50, -1, 1)
+
+        # (D) Stochastic
+        stochastic_signal = np.clip((sto_k - sto_d) / 100, -1, 1)
+
     # --------------------------------------------------
-    # 1) 필수 컬럼 존재 여부 확인
+    # 2) 이벤트 구간(임계 구간)에서의 가중치 강화
     # --------------------------------------------------
+
+    # (A) RSI: 과매수/과매도 상태에서 가중치 2배
+    rsi_factor = np.where((rsi < 30) | (rsi > 70), 2.0, 1.0)
+
+    # (B) Bollinger: 밴드 상/하단 벗어나면 가중치 2배
+    boll_factor = np.where((vwap > ball_high) | (vwap < ball_low), 2.0, 1.0)
+
+    # (C) EMA 이벤트 (골든/데드 크로스 보너스). 첫 행(종목별 시작 행)은 직전 값이 없으므로 NaN
+    ema_prev_diff = np.empty_like(ema_diff)
+    ema_prev_diff[:1] = np.nan
+    ema_prev_diff[1:] = ema_diff[:-1]
+    if segment_starts is not None:
+        ema_prev_diff[np.asarray(segment_starts, dtype=np.intp)] = np.nan
+    ema_event_score = np.where(
+        (ema_prev_diff <= 0) & (ema_diff > 0), EMA_CROSS_BONUS,          # 골든크로스
+        np.where((ema_prev_diff >= 0) & (ema_diff < 0), -EMA_CROSS_BONUS, 0.0)  # 데드크로스
+    )
+
+    # --------------------------------------------------
+    # 3) 서브 점수 / 최종 Score
+    # --------------------------------------------------
+    ema_score = ema_signal * BASE_WEIGHTS['EMA'] + ema_event_score
+    bollinger_score = bollinger_signal * BASE_WEIGHTS['Bollinger'] * boll_factor
+    rsi_score = rsi_signal * BASE_WEIGHTS['RSI'] * rsi_factor
+    stochastic_score = stochastic_signal * BASE_WEIGHTS['Stochastic']
+    score = ema_score + bollinger_score + rsi_score + stochastic_score
+
+    # --------------------------------------------------
+    # 4) Signal 결정 / Confidence
+    # --------------------------------------------------
+    signal = np.select([score > SIGNAL_THRESHOLD, score < -SIGNAL_THRESHOLD], ['Long', 'Short'], default='Hold')
+    confidence = np.where(signal == 'Hold', 0.0, np.abs(score) * 100)
+
+    return signal, confidence, score
+
+
+def generate_trade_signal(df):
+    """
+    df의 지표 컬럼으로 trade_signal_arrays를 계산해 Score / Signal / Confidence 컬럼만 추가합니다.
+    (중간 계산용 컬럼을 df에 만들지 않음)
+    """
     required_columns = {
         'EMA_15', 'EMA_360',
         'VWAP', 'BALL_HIGH', 'BALL_LOW',
@@ -27,131 +121,12 @@ def generate_trade_signal(df):
         missing = required_columns - set(df.columns)
         raise ValueError(f"입력 데이터에 다음 필수 컬럼이 누락되었습니다: {missing}")
     
-    # --------------------------------------------------
-    # 2) 가중치 (수정)
-    # --------------------------------------------------
-    base_weights = {
-        'EMA': 0.3,         # 기존 0.4 -> 0.3
-        'Bollinger': 0.2,   # 기존 0.3 -> 0.2
-        'RSI': 0.3,         # 기존 0.2 -> 0.3
-        'Stochastic': 0.2   # 기존 0.1 -> 0.2
-    }
-    
-    # --------------------------------------------------
-    # 3) "연속형" 지표 계산 (이전과 동일)
-    # --------------------------------------------------
-    
-    # (A) EMA 연속 신호
-    df['ema_ratio'] = (df['EMA_15'] - df['EMA_360']) / df['EMA_360']
-    df['ema_signal'] = df['ema_ratio'].clip(-1, 1)
-    
-    # (B) Bollinger 신호
-    df['BALL_MID'] = (df['BALL_HIGH'] + df['BALL_LOW']) / 2.0
-    df['bollinger_ratio'] = (df['VWAP'] - df['BALL_MID']) / (df['BALL_HIGH'] - df['BALL_MID'])
-    df['bollinger_signal'] = df['bollinger_ratio'].clip(-1, 1)
-    
-    # (C) RSI 신호
-    df['rsi_signal'] = (50 - df['RSI_360']) / 50
-    df['rsi_signal'] = df['rsi_signal'].clip(-1, 1)
-    
-    # (D) Stochastic
-    df['stoch_diff'] = df['STO_K'] - df['STO_D']
-    df['stochastic_signal'] = (df['stoch_diff'] / 100).clip(-1, 1)
-    
-    # --------------------------------------------------
-    # 4) 이벤트 구간(임계 구간)에서의 가중치 강화
-    # --------------------------------------------------
-    
-    # (A) RSI: 과매수/과매도 상태에서 가중치 2배
-    def rsi_adaptive_factor(rsi_value):
-        if rsi_value < 30 or rsi_value > 70:
-            return 2.0
-        else:
-            return 1.0
-    
-    # (B) Bollinger: 밴드 상/하단 벗어나면 가중치 2배
-    def bollinger_adaptive_factor(row):
-        if row['VWAP'] > row['BALL_HIGH'] or row['VWAP'] < row['BALL_LOW']:
-            return 2.0
-        else:
-            return 1.0
-    
-    # (C) EMA 이벤트 (골든/데드 크로스 보너스)
-    df['ema_prev_diff'] = (df['EMA_15'].shift(1) - df['EMA_360'].shift(1))
-    df['ema_curr_diff'] = (df['EMA_15'] - df['EMA_360'])
-    
-    def ema_event_bonus(row):
-        if (row['ema_prev_diff'] <= 0) and (row['ema_curr_diff'] > 0):
-            # 골든크로스
-            return +0.3
-        elif (row['ema_prev_diff'] >= 0) and (row['ema_curr_diff'] < 0):
-            # 데드크로스
-            return -0.3
-        else:
-            return 0.0
-    
-    # 행별 적용
-    df['rsi_factor'] = df['RSI_360'].apply(rsi_adaptive_factor)
-    df['boll_factor'] = df.apply(bollinger_adaptive_factor, axis=1)
-    df['ema_event_score'] = df.apply(ema_event_bonus, axis=1)
-    
-    # --------------------------------------------------
-    # 5) 서브 점수 계산
-    # --------------------------------------------------
-    df['ema_score'] = (df['ema_signal'] 
-                       * base_weights['EMA']
-                       + df['ema_event_score'])
-    
-    df['bollinger_score'] = (df['bollinger_signal']
-                             * base_weights['Bollinger']
-                             * df['boll_factor'])
-    
-    df['rsi_score'] = (df['rsi_signal']
-                       * base_weights['RSI']
-                       * df['rsi_factor'])
-    
-    df['stochastic_score'] = (df['stochastic_signal']
-                              * base_weights['Stochastic'])
-    
-    # --------------------------------------------------
-    # 6) 최종 Score
-    # --------------------------------------------------
-    df['Score'] = (df['ema_score']
-                   + df['bollinger_score']
-                   + df['rsi_score']
-                   + df['stochastic_score'])
-    
-    # --------------------------------------------------
-    # 7) Signal 결정
-    #    (조금 더 부드럽게: 임계값 ±0.3)
-    # --------------------------------------------------
-    conditions = [
-        df['Score'] >  0.3,
-        df['Score'] < -0.3
-    ]
-    choices = ['Long', 'Short']
-    df['Signal'] = np.select(conditions, choices, default='Hold')
-    
-    # --------------------------------------------------
-    # 8) Confidence
-    # --------------------------------------------------
-    df['Confidence'] = df['Score'].abs() * 100
-    df.loc[df['Signal'] == 'Hold', 'Confidence'] = 0
-    
-    # --------------------------------------------------
-    # 9) 필요시 정리
-    # --------------------------------------------------
-    drop_cols = [
-        'ema_ratio', 'ema_signal',
-        'bollinger_ratio', 'bollinger_signal',
-        'rsi_signal',
-        'stoch_diff', 'stochastic_signal',
-        'ema_prev_diff', 'ema_curr_diff',
-        'ema_event_score',
-        'rsi_factor', 'boll_factor',
-        'ema_score', 'bollinger_score', 'rsi_score', 'stochastic_score',
-        'BALL_MID'
-    ]
-    df.drop(columns=drop_cols, inplace=True)
-    
+    signal, confidence, score = trade_signal_arrays(
+        df['EMA_15'], df['EMA_360'], df['VWAP'], df['BALL_HIGH'], df['BALL_LOW'],
+        df['RSI_360'], df['STO_K'], df['STO_D'],
+    )
+    df['Score'] = score
+    df['Signal'] = signal
+    df['Confidence'] = confidence
+
     return df
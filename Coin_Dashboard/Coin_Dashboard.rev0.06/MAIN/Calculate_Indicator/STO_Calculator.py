@@ -1,5 +1,6 @@
 import pandas as pd
 import numpy as np
+from Calculate_Indicator.Streaming_Window import RollingMax, RollingMean, RollingMin
 
 def cal_sto(data, period=14, smooth_k=3, smooth_d=3):
     """
@@ -45,3 +46,48 @@ def cal_sto(data, period=14, smooth_k=3, smooth_d=3):
     }, index=data.index)
     
     return stochastic_df
+
+
+class StoStream:
+    """
+    스토캐스틱 스트리밍 계산. 캔들 1개마다 O(1)로 갱신하며,
+    처음부터 넣으면 cal_sto(data, period, smooth_k, smooth_d)와 같은 값을 반환합니다.
+    """
+
+    def __init__(self, period=14, smooth_k=3, smooth_d=3, low_min=None, high_max=None, sto_k=None, sto_d=None):
+        self.period = period
+        self.smooth_k = smooth_k
+        self.smooth_d = smooth_d
+        self.low_min = low_min or RollingMin(period)
+        self.high_max = high_max or RollingMax(period)
+        self.sto_k = sto_k or RollingMean(smooth_k, min_periods=1)
+        self.sto_d = sto_d or RollingMean(smooth_d, min_periods=1)
+
+    def update(self, high, low, close):
+        """
+        Returns:
+        tuple: (STO_K, STO_D)
+        """
+        low_min = self.low_min.update(low)
+        high_max = self.high_max.update(high)
+
+        # %K 계산 (분모가 0이면 NaN)
+        denominator = high_max - low_min
+        if denominator == 0 or denominator != denominator:
+            raw_k = float('nan')
+        else:
+            raw_k = 100 * ((float(close) - low_min) / denominator)
+
+        sto_k = self.sto_k.update(raw_k)
+        return sto_k, self.sto_d.update(sto_k)
+
+    def to_dict(self):
+        return {'period': self.period, 'smooth_k': self.smooth_k, 'smooth_d': self.smooth_d,
+                'low_min': self.low_min.to_dict(), 'high_max': self.high_max.to_dict(),
+                'sto_k': self.sto_k.to_dict(), 'sto_d': self.sto_d.to_dict()}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data['period'], data['smooth_k'], data['smooth_d'],
+                   RollingMin.from_dict(data['low_min']), RollingMax.from_dict(data['high_max']),
+                   RollingMean.from_dict(data['sto_k']), RollingMean.from_dict(data['sto_d']))
@@ -0,0 +1,355 @@
+import math
+from collections import deque
+
+# --------------------------------------------------
+#  스트리밍 롤링 윈도우 (새 값 1개당 O(1) 갱신)
+#  - RollingMean: 롤링 합/평균 (Kahan 보정)
+#  - RollingVariance: Welford 롤링 분산/표준편차 (Kahan 보정)
+#  - RollingMin / RollingMax: 단조 deque
+#  - EmaState: EMA (adjust=False) 점화식 상태
+#
+#  처음부터 값을 하나씩 넣으면 pandas Series.rolling(window, min_periods) / ewm(span, adjust=False)을
+#  전체 시리즈에 적용한 결과와 비트 단위로 같습니다 (pandas와 같은 순서로 더하고 빼며, NaN은 건너뜀).
+#  to_dict() / from_dict()로 JSON 직렬화하여 재시작 후에도 이어서 갱신할 수 있습니다.
+# --------------------------------------------------
+
+NAN = float('nan')
+
+
+def _is_nan(value):
+    return value != value
+
+
+class RollingMean:
+    """
+    길이 window의 롤링 합/평균. 윈도우 안의 NaN이 아닌 값이 min_periods개 미만이면 NaN.
+
+    renormalize_every(선택): 이 횟수만큼 갱신할 때마다 누적 합을 윈도우 안의 값으로 다시 계산하여
+    오래 실행할 때 더하고 빼는 과정의 반올림 오차가 쌓이지 않게 합니다.
+    (다시 계산한 뒤의 값은 윈도우 시작 행부터 시작하는 시리즈에 pandas rolling을 적용한 값과 같음)
+    """
+
+    def __init__(self, window, min_periods=None, renormalize_every=None):
+        self.window = window
+        self.min_periods = window if min_periods is None else min_periods
+        self.renormalize_every = renormalize_every
+        self.values = deque()
+        self.updates = 0
+        self._reset()
+
+    def _reset(self):
+        self.nobs = 0
+        self.sum = 0.0
+        self.neg_ct = 0
+        self.comp_add = 0.0
+        self.comp_remove = 0.0
+        self.same_count = 0
+        self.prev_value = self.values[0] if self.values else None
+
+    def _add(self, value):
+        if _is_nan(value):
+            return
+        self.nobs += 1
+        y = value - self.comp_add
+        t = self.sum + y
+        self.comp_add = t - self.sum - y
+        self.sum = t
+        if math.copysign(1.0, value) < 0:
+            self.neg_ct += 1
+        # 같은 값이 연속되면 평균을 그 값으로 (부동소수점 잔차 제거, pandas와 동일)
+        self.same_count = self.same_count + 1 if value == self.prev_value else 1
+        self.prev_value = value
+
+    def _remove(self, value):
+        if _is_nan(value):
+            return
+        self.nobs -= 1
+        y = -value - self.comp_remove
+        t = self.sum + y
+        self.comp_remove = t - self.sum - y
+        self.sum = t
+        if math.copysign(1.0, value) < 0:
+            self.neg_ct -= 1
+
+    def renormalize(self):
+        """
+        누적 합과 보정값을 윈도우 안의 값만으로 다시 계산합니다.
+        """
+        self._reset()
+        for value in self.values:
+            self._add(value)
+
+    def update(self, value):
+        """
+        새 값 하나를 넣고 그 시점의 롤링 평균을 반환합니다.
+        """
+        value = float(value)
+        if self.prev_value is None:
+            self.prev_value = value
+        self.values.append(value)
+        if len(self.values) > self.window:
+            self._remove(self.values.popleft())
+        self._add(value)
+        self.updates += 1
+        if self.renormalize_every and self.updates % self.renormalize_every == 0:
+            self.renormalize()
+        return self.mean()
+
+    def mean(self):
+        if self.nobs < self.min_periods or self.nobs == 0:
+            return NAN
+        result = self.sum / self.nobs
+        if self.same_count >= self.nobs:
+            return self.prev_value
+        if self.neg_ct == 0 and result < 0:
+            return 0.0
+        if self.neg_ct == self.nobs and result > 0:
+            return 0.0
+        return result
+
+    def to_dict(self):
+        return {
+            'window': self.window, 'min_periods': self.min_periods, 'renormalize_every': self.renormalize_every,
+            'values': list(self.values), 'updates': self.updates,
+            'nobs': self.nobs, 'sum': self.sum, 'neg_ct': self.neg_ct,
+            'comp_add': self.comp_add, 'comp_remove': self.comp_remove,
+            'same_count': self.same_count, 'prev_value': self.prev_value,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        state = cls(data['window'], data['min_periods'], data['renormalize_every'])
+        state.values = deque(data['values'])
+        for key in ('updates', 'nobs', 'sum', 'neg_ct', 'comp_add', 'comp_remove', 'same_count', 'prev_value'):
+            setattr(state, key, data[key])
+        return state
+
+
+class RollingVariance:
+    """
+    길이 window의 롤링 표본 분산/표준편차 (Welford 방식, ddof=1 기본).
+    NaN이 아닌 값이 min_periods개 미만이거나 ddof 이하이면 NaN.
+
+    renormalize_every(선택): RollingMean과 같이 주기적으로 평균/제곱편차합을 윈도우 값으로 다시 계산합니다.
+    """
+
+    def __init__(self, window, min_periods=None, ddof=1, renormalize_every=None):
+        self.window = window
+        self.min_periods = window if min_periods is None else min_periods
+        self.ddof = ddof
+        self.renormalize_every = renormalize_every
+        self.values = deque()
+        self.updates = 0
+        self._reset()
+
+    def _reset(self):
+        self.nobs = 0
+        self.mean_x = 0.0
+        self.ssqdm = 0.0
+        self.comp_add = 0.0
+        self.comp_remove = 0.0
+        self.same_count = 0
+        self.prev_value = self.values[0] if self.values else None
+
+    def _add(self, value):
+        if _is_nan(value):
+            return
+        self.nobs += 1
+        self.same_count = self.same_count + 1 if value == self.prev_value else 1
+        self.prev_value = value
+        prev_mean = self.mean_x - self.comp_add
+        y = value - self.comp_add
+        t = y - self.mean_x
+        self.comp_add = t + self.mean_x - y
+        self.mean_x = self.mean_x + t / self.nobs
+        self.ssqdm = self.ssqdm + (value - prev_mean) * (value - self.mean_x)
+
+    def _remove(self, value):
+        if _is_nan(value):
+            return
+        self.nobs -= 1
+        if self.nobs:
+            prev_mean = self.mean_x - self.comp_remove
+            y = value - self.comp_remove
+            t = y - self.mean_x
+            self.comp_remove = t + self.mean_x - y
+            self.mean_x = self.mean_x - t / self.nobs
+            self.ssqdm = self.ssqdm - (value - prev_mean) * (value - self.mean_x)
+        else:
+            self.mean_x = 0.0
+            self.ssqdm = 0.0
+
+    def renormalize(self):
+        """
+        평균/제곱편차합과 보정값을 윈도우 안의 값만으로 다시 계산합니다.
+        """
+        self._reset()
+        for value in self.values:
+            self._add(value)
+
+    def update(self, value):
+        """
+        새 값 하나를 넣고 그 시점의 롤링 분산을 반환합니다.
+        """
+        value = float(value)
+        if self.prev_value is None:
+            self.prev_value = value
+        self.values.append(value)
+        if len(self.values) > self.window:
+            self._remove(self.values.popleft())
+        self._add(value)
+        self.updates += 1
+        if self.renormalize_every and self.updates % self.renormalize_every == 0:
+            self.renormalize()
+        return self.variance()
+
+    def variance(self):
+        if self.nobs < max(self.min_periods, 1) or self.nobs <= self.ddof:
+            return NAN
+        if self.nobs == 1 or self.same_count >= self.nobs:
+            return 0.0
+        return self.ssqdm / (self.nobs - self.ddof)
+
+    def std(self):
+        variance = self.variance()
+        if _is_nan(variance):
+            return NAN
+        return math.sqrt(variance) if variance > 0 else 0.0
+
+    def to_dict(self):
+        return {
+            'window': self.window, 'min_periods': self.min_periods, 'ddof': self.ddof,
+            'renormalize_every': self.renormalize_every, 'values': list(self.values), 'updates': self.updates,
+            'nobs': self.nobs, 'mean_x': self.mean_x, 'ssqdm': self.ssqdm,
+            'comp_add': self.comp_add, 'comp_remove': self.comp_remove,
+            'same_count': self.same_count, 'prev_value': self.prev_value,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        state = cls(data['window'], data['min_periods'], data['ddof'], data['renormalize_every'])
+        state.values = deque(data['values'])
+        for key in ('updates', 'nobs', 'mean_x', 'ssqdm', 'comp_add', 'comp_remove', 'same_count', 'prev_value'):
+            setattr(state, key, data[key])
+        return state
+
+
+class RollingMax:
+    """
+    길이 window의 롤링 최대값 (단조 감소 deque, 값 1개당 상각 O(1)).
+    윈도우 안의 NaN이 아닌 값이 min_periods개 미만이면 NaN.
+    """
+
+    def __init__(self, window, min_periods=None):
+        self.window = window
+        self.min_periods = window if min_periods is None else min_periods
+        self.index = 0              # 다음에 들어올 값의 순번
+        self.candidates = deque()   # (순번, 값): 값이 단조 감소
+        self.nan_positions = deque()  # 윈도우 안 NaN 값의 순번
+
+    @staticmethod
+    def _dominates(new, old):
+        return new >= old
+
+    def update(self, value):
+        """
+        새 값 하나를 넣고 그 시점의 롤링 최대(RollingMin은 최소)를 반환합니다.
+        """
+        value = float(value)
+        expired = self.index - self.window
+        while self.candidates and self.candidates[0][0] <= expired:
+            self.candidates.popleft()
+        while self.nan_positions and self.nan_positions[0] <= expired:
+            self.nan_positions.popleft()
+
+        if _is_nan(value):
+            self.nan_positions.append(self.index)
+        else:
+            while self.candidates and self._dominates(value, self.candidates[-1][1]):
+                self.candidates.pop()
+            self.candidates.append((self.index, value))
+        self.index += 1
+        return self.value()
+
+    def value(self):
+        nobs = min(self.index, self.window) - len(self.nan_positions)
+        if nobs < max(self.min_periods, 1) or not self.candidates:
+            return NAN
+        return self.candidates[0][1]
+
+    def to_dict(self):
+        return {
+            'window': self.window, 'min_periods': self.min_periods, 'index': self.index,
+            'candidates': [list(item) for item in self.candidates], 'nan_positions': list(self.nan_positions),
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        state = cls(data['window'], data['min_periods'])
+        state.index = data['index']
+        state.candidates = deque((position, value) for position, value in data['candidates'])
+        state.nan_positions = deque(data['nan_positions'])
+        return state
+
+
+class RollingMin(RollingMax):
+    """
+    길이 window의 롤링 최소값 (단조 증가 deque). 그 외는 RollingMax와 같음.
+    """
+
+    @staticmethod
+    def _dominates(new, old):
+        return new <= old
+
+
+class EmaState:
+    """
+    EMA(adjust=False) 점화식 상태. pandas ewm(span=span, adjust=False).mean()과 같은 순서로 계산하며,
+    NaN 입력은 직전 EMA를 유지하되 다음 값의 가중치 계산에 반영합니다 (pandas ignore_na=False와 동일).
+    """
+
+    def __init__(self, span, value=None):
+        self.span = span
+        self.alpha = 1.0 / (1.0 + (span - 1) / 2)
+        self.value = NAN if value is None else float(value)
+        self.old_wt = 1.0
+        self.started = value is not None
+
+    @classmethod
+    def seeded(cls, span, value):
+        """
+        이미 계산된 EMA 값(value)에서 이어서 계산하는 상태 (그 이전 NaN 입력의 가중치 정보는 없음)
+        """
+        return cls(span, value)
+
+    def update(self, value):
+        """
+        새 값 하나를 넣고 그 시점의 EMA를 반환합니다.
+        """
+        value = float(value)
+        if not self.started:
+            self.started = True
+            self.value = value
+            return self.value
+
+        is_observation = not _is_nan(value)
+        if not _is_nan(self.value):
+            self.old_wt *= 1.0 - self.alpha
+            if is_observation:
+                if self.value != value:
+                    self.value = (self.old_wt * self.value + self.alpha * value) / (self.old_wt + self.alpha)
+                self.old_wt = 1.0
+        elif is_observation:
+            self.value = value
+        return self.value
+
+    def to_dict(self):
+        return {'span': self.span, 'value': self.value, 'old_wt': self.old_wt, 'started': self.started}
+
+    @classmethod
+    def from_dict(cls, data):
+        state = cls(data['span'])
+        state.value = data['value']
+        state.old_wt = data['old_wt']
+        state.started = data['started']
+        return state
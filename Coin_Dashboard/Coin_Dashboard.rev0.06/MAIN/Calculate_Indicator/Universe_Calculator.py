@@ -0,0 +1,96 @@
+import pandas as pd
+import numpy as np
+
+from Calculate_Indicator.Indicator_Registry import SIGNAL_INPUTS, IndicatorGraph, Segments, fill_values
+from Calculate_Indicator.SIGNAL_Generator import trade_signal_arrays
+
+# --------------------------------------------------
+#  전 종목 일괄 지표 계산 (전체 재계산 모드)
+#  - 종목별 groupby 루프 대신, 종목 순으로 이어 붙인 배열(구간 시작 offsets)에서
+#    지표 레지스트리의 DAG(IndicatorGraph)를 한 번 계산 (공유 중간값은 한 번만)
+#  - 롤링 윈도우/EMA/diff는 종목 경계를 넘지 않음
+#  - 결과는 종목별 지표 계산을 이어 붙인 것과 같음 (행 순서, 컬럼, 값 모두)
+# --------------------------------------------------
+
+_GRAPH = IndicatorGraph()
+
+
+def segment_offsets(markets):
+    """
+    종목 순으로 모여 있는 MARKET 배열의 구간 경계.
+
+    Returns:
+    np.ndarray: 길이 (종목 수 + 1). i번째 종목은 [offsets[i], offsets[i + 1]) 행
+    """
+    markets = np.asarray(markets)
+    if len(markets) == 0:
+        return np.zeros(1, dtype=np.intp)
+    boundaries = np.flatnonzero(markets[1:] != markets[:-1]) + 1
+    return np.concatenate(([0], boundaries, [len(markets)])).astype(np.intp)
+
+
+def sort_by_market(df):
+    """
+    groupby('MARKET')와 같은 순서로 정렬합니다: 종목 이름순, 종목 안에서는 입력 순서 유지 (MARKET이 없는 행은 제외)
+    """
+    return df[df['MARKET'].notna()].sort_values('MARKET', kind='stable', ignore_index=True)
+
+
+def cal_universe_arrays(df, segments, graph=None):
+    """
+    종목 순으로 정렬된 df의 지표/신호 컬럼 값을 계산합니다. (df는 수정하지 않음)
+
+    Parameters:
+    df (pd.DataFrame): 종목 순으로 정렬된 캔들 (VWAP 계산 완료)
+    segments (Segments): df의 종목 구간
+    graph (IndicatorGraph, optional): 계산할 지표 DAG. 기본값은 레지스트리 전체
+
+    Returns:
+    dict: {컬럼: np.ndarray} (cal_universe_indicators가 df에 붙이는 순서)
+    """
+    graph = graph or _GRAPH
+
+    outputs = graph.evaluate(df, segments)
+
+    vwap = df['VWAP'].to_numpy(dtype=float)
+    signal, confidence, score = trade_signal_arrays(
+        *(vwap if name == 'VWAP' else outputs[name] for name in SIGNAL_INPUTS), segment_starts=segments.starts,
+    )
+
+    # NaN 값 처리 (종목별 대체값: 첫 VWAP, VWAP 최대/최소 - pandas max/min처럼 NaN은 건너뜀)
+    filled = dict(outputs)
+    if len(df) > 0:
+        fills = fill_values(
+            vwap_first=segments.per_row(vwap[segments.starts]),
+            vwap_max=segments.per_row(np.fmax.reduceat(vwap, segments.starts)),
+            vwap_min=segments.per_row(np.fmin.reduceat(vwap, segments.starts)),
+        )
+        for name, fill in fills.items():
+            if name in filled:
+                filled[name] = np.where(np.isnan(filled[name]), fill, filled[name])
+
+    filled['Score'] = score
+    filled['Signal'] = signal
+    filled['Confidence'] = confidence
+    filled['OPINION'] = signal
+    filled['CONFIDENCE'] = confidence
+    return filled
+
+
+def cal_universe_indicators(df, graph=None):
+    """
+    전 종목의 캔들로 레지스트리의 모든 지표와 신호를 한 번에 계산합니다.
+
+    Parameters:
+    df (pd.DataFrame): 여러 종목의 캔들 (VWAP 계산 완료). 종목 안에서는 시간순이어야 합니다.
+    graph (IndicatorGraph, optional): 계산할 지표 DAG. 기본값은 레지스트리 전체
+
+    Returns:
+    pd.DataFrame: 종목 이름순(종목 안에서는 입력 순서)으로 정렬하고 지표/신호 컬럼을 추가한 DataFrame
+    """
+    df = sort_by_market(df)
+    segments = Segments(segment_offsets(df['MARKET'].to_numpy()))
+
+    for name, values in cal_universe_arrays(df, segments, graph).items():
+        df[name] = values
+    return df
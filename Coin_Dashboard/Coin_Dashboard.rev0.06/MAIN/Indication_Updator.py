@@ -1,135 +1,399 @@
+import os
+import sys
+import json
 import pandas as pd
+import numpy as np
 import pytz
 import cx_Oracle
-from Calculate_Indicator.Indactors_Pacakge import cal_ema, cal_ball, cal_rsi, cal_sto, generate_trade_signal
+from Calculate_Indicator.Indactors_Pacakge import trade_signal_arrays
+from Calculate_Indicator.Indicator_Registry import INDICATOR_COLUMNS, SIGNAL_INPUTS, fill_values, output_column_types
+from Calculate_Indicator.Indicator_State import IndicatorState, IndicatorStream, INPUT_COLUMNS, WARMUP_ROWS
+from Calculate_Indicator.Parallel_Calculator import cal_universe_indicators_parallel
+from Calculate_Indicator.Universe_Calculator import cal_universe_indicators
 from Manage_DB.DB_Managing import get_db_connection, fetch_data
-from Manage_DB.Add_missing_columns import add_missing_columns
+from Manage_DB.Indicator_State_DB import STATE_TABLE, create_indicator_state_table, load_indicator_states, save_indicator_states
+from Manage_DB.Schema_Manager import ensure_columns, ensure_table
+from Manage_DB.Indicator_Writer import IndicatorChangeDetector, UPDATE_COLUMNS, write_indicator_rows
 import datetime
 
-def process_indicators_update(conn, table_name):
-    try:
-        # 필요한 컬럼과 데이터 타입 정의
-        required_columns = {
-            'EMA_15': 'NUMBER',
-            'EMA_360': 'NUMBER',
-            'BALL_HIGH': 'NUMBER',
-            'BALL_LOW': 'NUMBER',
-            'RSI_360': 'NUMBER',
-            'STO_K': 'NUMBER',
-            'STO_D': 'NUMBER',
-            'OPINION': 'VARCHAR2(26)',
-            'CONFIDENCE': 'NUMBER',
-        }
-
-        # 누락된 컬럼 추가
-        add_missing_columns(conn, table_name, required_columns)
-
-        # 데이터 조회 (필요한 열만 명시적으로 지정)
+# 저장소 루트의 공용 Candle_Store 패키지 (EFB가 기록한 로컬 분봉)
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', '..')))
+from Candle_Store.Candle_Store import load_candles_frame
+
+# 테이블별 {MARKET: IndicatorState} (프로세스 메모리에 유지, INDICATOR_STATE 테이블에 영속화)
+_indicator_states = {}
+
+# 테이블별 마지막 기록 값 추적기 (바뀐 행만 UPDATE)
+_change_detectors = {}
+
+# 증분/전체 재계산 결과 비교 시 허용 오차 (pandas rolling 누적합의 부동소수점 오차 수준)
+VERIFY_RTOL = 1e-9
+
+
+def prepare_candles(df):
+    """
+    결측값을 제거하고 VWAP을 계산합니다.
+    """
+    if df.isnull().any().any():
+        print("결측값이 존재합니다. 결측값 처리 중...")
+        df = df.dropna(subset=['TRADE_PRICE', 'CANDLE_ACC_TRADE_VOLUME'])
+
+    df = df.copy()
+    df['VWAP'] = df['CANDLE_ACC_TRADE_PRICE'] / df['CANDLE_ACC_TRADE_VOLUME']
+    return df
+
+
+def calculate_group_indicators(group):
+    """
+    한 종목의 전체 이력으로 레지스트리의 모든 지표와 신호를 계산합니다. (전체 재계산 모드)
+    """
+    return cal_universe_indicators(group)
+
+
+def calculate_incremental_indicators(state, new_rows):
+    """
+    watermark 이후의 새 캔들(new_rows)에 대해서만 지표와 신호를 계산합니다. (증분 모드)
+
+    종목의 스트리밍 상태(IndicatorStream)를 캔들 1개마다 O(1)로 갱신합니다. 상태는 직전 WARMUP_ROWS개 입력과
+    watermark 시점 EMA로 만들거나 INDICATOR_STATE에서 복원하므로, 결과는 전체 재계산 모드의 같은 행과 동일합니다.
+
+    Parameters:
+    state (IndicatorState): is_warm()이 True인 종목 상태
+    new_rows (pd.DataFrame): 시간순으로 정렬된 새 캔들 (VWAP 계산 완료)
+
+    Returns:
+    pd.DataFrame: new_rows에 지표 컬럼이 추가된 DataFrame
+    """
+    stream = state.ensure_stream()
+    previous = stream.seed_values()
+
+    # 캔들마다 스트리밍 상태 갱신: 열 순서는 INDICATOR_COLUMNS와 같음
+    inputs = {name: new_rows[name].to_numpy(dtype=float) for name in INPUT_COLUMNS[1:]}
+    values = np.array([
+        stream.update({name: inputs[name][i] for name in inputs}) for i in range(len(new_rows))
+    ], dtype=float).reshape(len(new_rows), len(INDICATOR_COLUMNS))
+
+    # EMA 크로스는 직전 캔들과 비교하므로 watermark 시점 값(점화식 지표)을 앞에 한 행 붙여 계산한 뒤 떼어냄
+    with_prev = np.vstack([[previous.get(name, np.nan) for name in INDICATOR_COLUMNS], values])
+    columns = {name: with_prev[:, i] for i, name in enumerate(INDICATOR_COLUMNS)}
+    columns['VWAP'] = np.concatenate(([np.nan], inputs['VWAP']))
+    signal, confidence, _ = trade_signal_arrays(*(columns[name] for name in SIGNAL_INPUTS))
+
+    # NaN 값 처리 (전체 재계산 모드와 같은 대체값: 종목 전체 이력의 첫 VWAP / 최대 / 최소, pandas처럼 NaN은 건너뜀)
+    fills = fill_values(
+        vwap_first=state.vwap_first,
+        vwap_max=np.fmax.reduce(np.append(np.array([state.vwap_max], dtype=float), inputs['VWAP'])),
+        vwap_min=np.fmin.reduce(np.append(np.array([state.vwap_min], dtype=float), inputs['VWAP'])),
+    )
+    fill_row = np.array([fills[name] for name in INDICATOR_COLUMNS], dtype=float)
+    values = np.where(np.isnan(values), fill_row, values)
+
+    # 컬럼을 하나씩 추가하지 않고 한 번에 붙임 (캔들 몇 개짜리 DataFrame에서는 컬럼 추가 비용이 계산보다 큼)
+    indicators = pd.DataFrame(values, columns=INDICATOR_COLUMNS)
+    indicators['OPINION'] = signal[1:]
+    indicators['CONFIDENCE'] = confidence[1:]
+    return pd.concat([new_rows.reset_index(drop=True), indicators], axis=1)
+
+
+def _fetch_lookback_rows(conn, table_name, warmup, markets=None):
+    """
+    종목별로 워터마크 이후의 캔들과 워터마크까지의 직전 warmup개 캔들을 하나의 윈도우 쿼리로 조회합니다.
+    워터마크가 없는 종목은 전체 이력을 조회합니다 (EMA는 첫 캔들부터 계산해야 전체 재계산과 같음).
+
+    Parameters:
+    warmup (int): 종목별 직전 캔들 수. 메모리에 상태가 있으면 0 (새 캔들만 조회)
+    markets (iterable, optional): 조회할 종목. None이면 전 종목
+
+    Returns:
+    pd.DataFrame: 캔들 + IS_NEW 컬럼 (1: 새로 계산할 캔들, 0: 상태 복원용 직전 캔들)
+    """
+    params = {'table_name': table_name.upper(), 'warmup': warmup}
+    market_filter = ''
+    if markets is not None:
+        binds = {f'm{i}': market for i, market in enumerate(sorted(markets))}
+        market_filter = f"AND t.MARKET IN ({', '.join(f':{name}' for name in binds)})"
+        params.update(binds)
+
+    # 직전 캔들은 전체 재계산 모드의 결측값 제거와 같은 조건을 SQL에서 적용해 warmup 개수를 맞춤
+    query = f"""
+        SELECT MARKET, CANDLE_DATE_TIME_UTC, HIGH_PRICE, LOW_PRICE, TRADE_PRICE,
+               CANDLE_ACC_TRADE_VOLUME, CANDLE_ACC_TRADE_PRICE, IS_NEW
+        FROM (
+            SELECT c.*,
+                   ROW_NUMBER() OVER (PARTITION BY c.MARKET, c.IS_NEW ORDER BY c.CANDLE_DATE_TIME_UTC DESC) AS RN
+            FROM (
+                SELECT t.MARKET, t.CANDLE_DATE_TIME_UTC, t.HIGH_PRICE, t.LOW_PRICE, t.TRADE_PRICE,
+                       t.CANDLE_ACC_TRADE_VOLUME, t.CANDLE_ACC_TRADE_PRICE,
+                       CASE
+                           WHEN s.LAST_CANDLE_UTC IS NULL OR t.CANDLE_DATE_TIME_UTC > s.LAST_CANDLE_UTC THEN 1
+                           ELSE 0
+                       END AS IS_NEW
+                FROM {table_name} t
+                LEFT JOIN INDICATOR_STATE s
+                  ON s.MARKET = t.MARKET AND s.TABLE_NAME = :table_name
+                WHERE (:warmup > 0
+                       OR s.LAST_CANDLE_UTC IS NULL
+                       OR t.CANDLE_DATE_TIME_UTC > s.LAST_CANDLE_UTC)
+                  {market_filter}
+            ) c
+            WHERE c.IS_NEW = 1
+               OR (c.TRADE_PRICE IS NOT NULL AND c.CANDLE_ACC_TRADE_VOLUME IS NOT NULL)
+        )
+        WHERE IS_NEW = 1 OR RN <= :warmup
+        ORDER BY CANDLE_DATE_TIME_UTC
+    """
+    return fetch_data(query, conn, params=params)
+
+
+def _restore_states(conn, table_name, tails):
+    """
+    INDICATOR_STATE 테이블의 워터마크와 종목별 직전 WARMUP_ROWS개 캔들(tails)로 메모리 상태를 복원합니다.
+
+    Parameters:
+    tails (pd.DataFrame): _fetch_lookback_rows 결과 중 IS_NEW가 0인 캔들 (VWAP 계산 완료)
+    """
+    state_rows = load_indicator_states(conn, table_name)
+    if state_rows.empty:
+        return {}
+
+    states = {}
+    for _, row in state_rows.iterrows():
+        market = row['MARKET']
+        tail = tails.loc[tails['MARKET'] == market, INPUT_COLUMNS].reset_index(drop=True)
+        states[market] = IndicatorState(
+            market,
+            watermark=pd.Timestamp(row['LAST_CANDLE_UTC']),
+            tail=tail,
+            ema_15=row['EMA_15'],
+            ema_360=row['EMA_360'],
+            vwap_first=row['VWAP_FIRST'],
+            vwap_max=row['VWAP_MAX'],
+            vwap_min=row['VWAP_MIN'],
+            stream=IndicatorStream.from_dict(json.loads(row['STREAM_STATE'])) if row['STREAM_STATE'] else None,
+        )
+    print(f"증분 지표 상태 복원 완료: {len(states)}개 종목")
+    return states
+
+
+def _fetch_all_candles(conn, table_name, source='db', timeframe='1m'):
+    """
+    전체 재계산용 캔들을 조회합니다.
+
+    Parameters:
+    source (str): 'db'면 table_name 전체를 조회, 'store'면 DB에서는 종목별 시각 범위만 집계하고
+                  캔들 값은 로컬 Candle_Store(memmap)에서 읽음
+    timeframe (str): table_name의 봉 단위. 'store'에서 1분봉을 이 단위로 합쳐 읽음
+    """
+    if source == 'db':
         query = f"""
-            SELECT MARKET, CANDLE_DATE_TIME_UTC, HIGH_PRICE, LOW_PRICE, TRADE_PRICE, 
+            SELECT MARKET, CANDLE_DATE_TIME_UTC, HIGH_PRICE, LOW_PRICE, TRADE_PRICE,
                    CANDLE_ACC_TRADE_VOLUME, CANDLE_ACC_TRADE_PRICE
             FROM {table_name}
             ORDER BY CANDLE_DATE_TIME_UTC
         """
-        df = fetch_data(query, conn)
+        return fetch_data(query, conn)
+
+    ranges = fetch_data(f"""
+        SELECT MARKET, MIN(CANDLE_DATE_TIME_UTC) AS FIRST_UTC, MAX(CANDLE_DATE_TIME_UTC) AS LAST_UTC
+        FROM {table_name}
+        GROUP BY MARKET
+    """, conn)
+    frames = [
+        load_candles_frame([row.MARKET], row.FIRST_UTC, row.LAST_UTC + pd.Timedelta(minutes=1), timeframe=timeframe)
+        for row in ranges.itertuples()
+    ]
+    if not frames:
+        return pd.DataFrame()
+    df = pd.concat(frames, ignore_index=True)
+    df = df[['MARKET', 'CANDLE_DATE_TIME_UTC', 'HIGH_PRICE', 'LOW_PRICE', 'TRADE_PRICE',
+             'CANDLE_ACC_TRADE_VOLUME', 'CANDLE_ACC_TRADE_PRICE']]
+    return df.sort_values('CANDLE_DATE_TIME_UTC', kind='stable', ignore_index=True)
+
+
+def _compute_full(df, workers=1):
+    """
+    전체 이력 DataFrame을 전 종목 일괄 계산(cal_universe_indicators)으로 전체 재계산합니다.
+    결과는 종목별 calculate_group_indicators를 이어 붙인 것과 같습니다.
+
+    Parameters:
+    workers (int): 워커 프로세스 수. 1이면 현재 프로세스에서 계산, None 또는 0 이하면 CPU 코어 수
 
-        if df.empty:
-            print("테이블에 데이터가 없어 지표를 계산할 수 없습니다.")
-            return
+    Returns:
+    tuple: (계산 결과 DataFrame, {MARKET: IndicatorState})
+    """
+    df, states = cal_universe_indicators_parallel(df, workers=workers, with_states=True)
+    print(f"{len(states)}개 종목 {len(df)}개 캔들 지표 계산 완료")
+    return df, states
 
-        # 결측값 처리
-        if df.isnull().any().any():
-            print("결측값이 존재합니다. 결측값 처리 중...")
-            df.dropna(subset=['TRADE_PRICE', 'CANDLE_ACC_TRADE_VOLUME'], inplace=True)
 
-        # VWAP 계산
-        df['VWAP'] = df['CANDLE_ACC_TRADE_PRICE'] / df['CANDLE_ACC_TRADE_VOLUME']
+def _compute_incremental(df, states):
+    """
+    새 캔들 DataFrame을 종목별 상태를 이용해 증분 계산합니다.
+    상태가 없거나 워밍업이 덜 된 종목은 (tail이 곧 전체 이력이므로) 전체 재계산으로 처리합니다.
 
-        # 종목별로 데이터 처리
-        grouped = df.groupby('MARKET')
-        result_list = []
+    Returns:
+    pd.DataFrame: 새로 계산된(또는 재계산된) 행
+    """
+    result_list = []
 
-        for name, group in grouped:
+    for name, group in df.groupby('MARKET'):
+        group = group.reset_index(drop=True)
+        state = states.get(name)
+
+        if state is not None and state.is_warm():
+            print(f"{name}에 대한 지표 증분 계산 중... ({len(group)}개 캔들)")
+            group = calculate_incremental_indicators(state, group)
+            state.advance(group)
+        else:
             print(f"{name}에 대한 지표 계산 중...")
+            if state is not None:
+                history = state.tail.copy()
+                history['MARKET'] = name
+                group = pd.concat([history, group], ignore_index=True)
+            group = calculate_group_indicators(group)
+            state = IndicatorState(name)
+            state.advance(group)
+            states[name] = state
+
+        result_list.append(group)
+
+    return pd.concat(result_list, ignore_index=True)
+
+
+def verify_incremental(conn, table_name, incremental_df, source='db', timeframe='1m', workers=1):
+    """
+    증분 계산 결과를 전체 재계산 결과와 비교합니다. (검증용, DB에 기록하지 않음)
+
+    Returns:
+    bool: 모든 행이 허용 오차(VERIFY_RTOL) 안에서 일치하면 True
+    """
+    full_df, _ = _compute_full(prepare_candles(_fetch_all_candles(conn, table_name, source, timeframe)), workers)
 
-            # 지표 계산
-            group['EMA_15'] = cal_ema(group['VWAP'], 112)
-            group['EMA_360'] = cal_ema(group['VWAP'], 224)
+    keys = ['MARKET', 'CANDLE_DATE_TIME_UTC']
+    merged = incremental_df[keys + UPDATE_COLUMNS].merge(
+        full_df[keys + UPDATE_COLUMNS], on=keys, how='left', suffixes=('_INC', '_FULL')
+    )
 
-            if len(group['VWAP']) >= 224:
-                group['BALL_HIGH'], group['BALL_LOW'] = cal_ball(group['VWAP'], window=224, num_std_dev=2)
-            else:
-                group['BALL_HIGH'], group['BALL_LOW'] = pd.NA, pd.NA
+    matched = True
+    for column in UPDATE_COLUMNS:
+        inc = merged[f'{column}_INC']
+        full = merged[f'{column}_FULL']
+        if column == 'OPINION':
+            diff = inc != full
+        else:
+            diff = ~np.isclose(inc.astype(float), full.astype(float), rtol=VERIFY_RTOL, atol=0, equal_nan=True)
+        if diff.any():
+            matched = False
+            print(f"[VERIFY] {column} 불일치 {int(diff.sum())}건")
+            print(merged.loc[diff, keys + [f'{column}_INC', f'{column}_FULL']].head())
 
-            group['RSI_360'] = cal_rsi(group['VWAP'], period=14)
+    if matched:
+        print(f"[VERIFY] 증분 계산 결과 {len(merged)}행이 전체 재계산과 일치합니다.")
+    return matched
 
-            sto_df = cal_sto(group[['HIGH_PRICE', 'LOW_PRICE', 'TRADE_PRICE']], period=224, smooth_k=14, smooth_d=3)
-            group['STO_K'] = sto_df['STO_K']
-            group['STO_D'] = sto_df['STO_D']
 
-            group = generate_trade_signal(group)
-            group['OPINION'] = group['Signal']
-            group['CONFIDENCE'] = group['Confidence']
+def process_indicators_update(conn, table_name, mode='incremental', source='db', timeframe='1m', workers=1,
+                              markets=None):
+    """
+    지표를 계산하여 table_name에 기록합니다.
 
-            # NaN 값 처리
-            group.fillna({
-                'EMA_15': group['VWAP'].iloc[0] if len(group) > 0 else 0,
-                'EMA_360': group['VWAP'].iloc[0] if len(group) > 0 else 0,
-                'BALL_HIGH': group['VWAP'].max() if len(group) > 0 else float('nan'),
-                'BALL_LOW': group['VWAP'].min() if len(group) > 0 else float('nan'),
-                'RSI_360': 50,
-                'STO_K': 50,
-                'STO_D': 50
-            }, inplace=True)
+    Parameters:
+    conn (cx_Oracle.Connection): Oracle 데이터베이스 연결 객체
+    table_name (str): 지표를 계산/기록할 테이블 이름
+    mode (str):
+        - 'incremental': 종목별 워터마크 이후의 캔들만 계산하고 그 행만 기록 (기본값)
+        - 'full': 매번 전체 이력을 재계산하고 모든 행을 기록
+        - 'verify': 증분 계산 후 전체 재계산 결과와 비교 출력하고, 증분 결과를 기록
+    source (str): 전체 재계산('full', 'verify') 시 캔들을 읽을 곳
+        - 'db': table_name을 pd.read_sql로 조회 (기본값)
+        - 'store': EFB가 기록한 로컬 Candle_Store에서 메모리 매핑으로 읽음
+    timeframe (str): table_name의 봉 단위 ('1m', '5m', '15m', '1h', '1d').
+        분봉 외에는 EFB 롤업 테이블(upbit_candle_<timeframe>)을 복제한 테이블을 table_name으로 지정합니다.
+        지표 기간(112, 224 등)은 봉 개수이므로 봉 단위에 따라 실제 시간 길이가 달라집니다.
+    workers (int): 전체 재계산('full', 'verify')을 종목 파티션별로 나눠 계산할 워커 프로세스 수.
+        1이면 현재 프로세스에서 계산 (기본값), None 또는 0 이하면 CPU 코어 수.
+        증분 계산은 종목별 상태가 현재 프로세스에 있고 캔들당 O(1)이므로 항상 현재 프로세스에서 계산합니다.
+    markets (iterable, optional): 증분 계산할 종목 (EFB 분봉 기록 알림으로 받은 종목). None이면 전 종목.
+        메모리에 상태가 없어 복원하는 호출과 'full' 모드는 항상 전 종목을 조회합니다.
 
-            result_list.append(group)
+    Notes:
+    - 증분 모드는 워터마크보다 과거 시각으로 뒤늦게 들어온 캔들은 다시 계산하지 않습니다.
+      이 경우 mode='full'로 한 번 실행하면 전체 지표와 워터마크가 재설정됩니다.
+    - 마지막으로 기록한 값과 같은 행은 다시 UPDATE하지 않습니다. 프로세스 시작 후 첫 'full' 호출은
+      비교 기준이 없으므로 모든 행을 기록합니다.
+    - 종목의 첫 224개 캔들(볼린저 밴드 워밍업 구간)의 NaN 대체값은 전체 재계산 모드에서
+      종목 전체 이력의 VWAP 최대/최소로 매번 다시 기록되지만, 증분 모드에서는 계산 시점의 값으로 유지됩니다.
+    """
+    if mode not in ('incremental', 'full', 'verify'):
+        raise ValueError(f"지원하지 않는 지표 계산 모드입니다: {mode}")
 
-        # 종목별 계산 결과 병합
-        df = pd.concat(result_list, ignore_index=True)
+    try:
+        # 필요한 컬럼과 데이터 타입 정의 (지표 레지스트리의 출력 컬럼 + 신호 컬럼)
+        required_columns = output_column_types()
+
+        # 누락된 컬럼 추가 (시작 시 읽어 둔 컬럼 목록으로 확인, 없을 때만 ALTER)
+        ensure_columns(conn, table_name, required_columns)
+
+        if mode == 'full':
+            ensure_table(conn, STATE_TABLE, create_indicator_state_table)
+
+            # 데이터 조회 (필요한 열만 명시적으로 지정)
+            df = _fetch_all_candles(conn, table_name, source, timeframe)
+
+            if df.empty:
+                print("테이블에 데이터가 없어 지표를 계산할 수 없습니다.")
+                return
+
+            df, states = _compute_full(prepare_candles(df), workers)
+            _indicator_states[table_name] = states
+        else:
+            # 메모리에 상태가 없으면(프로세스 시작, 오류 후) 직전 WARMUP_ROWS개 캔들도 같은 쿼리로 받아 복원
+            restore = table_name not in _indicator_states
+            if restore:
+                ensure_table(conn, STATE_TABLE, create_indicator_state_table)
+            rows = _fetch_lookback_rows(conn, table_name, WARMUP_ROWS if restore else 0,
+                                        markets=None if restore else markets)
+            is_new = rows['IS_NEW'] == 1
+            print(f"캔들 조회: {len(rows)}행 (새 캔들 {int(is_new.sum())}행, 상태 복원용 직전 캔들 {int((~is_new).sum())}행)")
+
+            if restore:
+                _indicator_states[table_name] = _restore_states(
+                    conn, table_name, prepare_candles(rows.loc[~is_new].drop(columns='IS_NEW'))
+                )
+            states = _indicator_states[table_name]
+
+            df = rows.loc[is_new].drop(columns='IS_NEW')
+
+            if df.empty:
+                print("새로 계산할 캔들이 없습니다.")
+                return
+
+            df = _compute_incremental(prepare_candles(df), states)
+
+            if mode == 'verify':
+                verify_incremental(conn, table_name, df, source, timeframe, workers)
 
         # 누락된 컬럼 체크
-        required_update_cols = ['EMA_15', 'EMA_360', 'BALL_HIGH', 'BALL_LOW', 
-                                'RSI_360', 'STO_K', 'STO_D', 'OPINION', 
-                                'CANDLE_DATE_TIME_UTC', 'MARKET', 'CONFIDENCE']
+        required_update_cols = UPDATE_COLUMNS + ['CANDLE_DATE_TIME_UTC', 'MARKET']
         missing_columns = set(required_update_cols) - set(df.columns)
         if missing_columns:
             raise ValueError(f"DataFrame에 필요한 컬럼이 없습니다: {missing_columns}")
 
-        # 업데이트 쿼리
-        update_query = f"""
-            UPDATE {table_name}
-            SET EMA_15 = :ema15, EMA_360 = :ema360, BALL_HIGH = :ball_high, 
-                BALL_LOW = :ball_low, RSI_360 = :rsi360, STO_K = :sto_k, STO_D = :sto_d,
-                OPINION = :opinion, CONFIDENCE = :confidence
-            WHERE CANDLE_DATE_TIME_UTC = :candle_date_time_utc
-              AND MARKET = :market
-        """
+        # 마지막으로 기록한 값과 비교해 새로 생겼거나 바뀐 행만 추림
+        detector = _change_detectors.setdefault(table_name, IndicatorChangeDetector())
+        changed_df = detector.select_changed(df)
 
-        # 일괄 업데이트 함수
-        def execute_batch_update(query, df, conn):
-            cursor = conn.cursor()
-            data = [
-                {
-                    'ema15': row['EMA_15'],
-                    'ema360': row['EMA_360'],
-                    'ball_high': row['BALL_HIGH'],
-                    'ball_low': row['BALL_LOW'],
-                    'rsi360': row['RSI_360'],
-                    'sto_k': row['STO_K'],
-                    'sto_d': row['STO_D'],
-                    'opinion': row['OPINION'],
-                    'confidence': row['CONFIDENCE'],
-                    'candle_date_time_utc': row['CANDLE_DATE_TIME_UTC'],
-                    'market': row['MARKET']
-                }
-                for _, row in df.iterrows()
-            ]
-            cursor.executemany(query, data)
+        # 업데이트 실행 (지표 행과 워터마크를 같은 트랜잭션으로 커밋)
+        cursor = conn.cursor()
+        try:
+            written = write_indicator_rows(cursor, table_name, changed_df)
+            # 이번에 계산한 종목의 상태만 저장 (다른 종목의 상태는 바뀌지 않음)
+            save_indicator_states(cursor, table_name, [states[name] for name in df['MARKET'].unique()])
             conn.commit()
+        finally:
             cursor.close()
-
-        # 업데이트 실행
-        execute_batch_update(update_query, df, conn)
+        detector.remember(df)
+        print(f"지표 기록: 계산 {len(df)}행 중 변경 {written}행 UPDATE")
 
 
         latest_data = df.loc[df['CANDLE_DATE_TIME_UTC'] == df['CANDLE_DATE_TIME_UTC'].max()]
@@ -145,5 +409,8 @@ def process_indicators_update(conn, table_name):
         print(f"MARKET: {row['MARKET']}, CANDLE_DATE_TIME_KST: {row['CANDLE_DATE_TIME_UTC']}, OPINION: {row['OPINION']}, CONFIDENCE: {row['CONFIDENCE']}")
 
     except Exception as e:
+        # 메모리 상태가 DB에 커밋된 워터마크와 어긋날 수 있으므로 다음 호출에서 다시 복원
+        _indicator_states.pop(table_name, None)
+        _change_detectors.pop(table_name, None)
         print(f"오류 발생: {e}")
     # finally에서 conn.close() 호출하지 않음
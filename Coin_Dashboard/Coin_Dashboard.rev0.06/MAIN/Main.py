@@ -1,41 +1,109 @@
+import os
+import sys
 import time
 from Indication_Updator import process_indicators_update
-from Manage_DB.Add_missing_columns import add_missing_columns
-from Manage_DB.Clone_Table import clone_table
 from Manage_DB.DB_Managing import get_db_connection
-from Manage_DB.Sync_Table import sync_table_data
+from Manage_DB.Schema_Manager import prepare_schema
+from Manage_DB.Sync_Table import resync_table_data, sync_table_data
 from Manage_DB.Trading_Volume import manage_trading_volume
 
+# 저장소 루트의 공용 Candle_Events 패키지 (EFB의 분봉 기록 알림)
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', '..')))
+from Candle_Events.Candle_Events import CandleEventListener
+
+# 지표를 계산할 봉 단위: '1m'(분봉) 또는 EFB가 관리하는 롤업 테이블(upbit_candle_<timeframe>)의 '5m', '15m', '1h', '1d'
+TIMEFRAME = '1m'
+
 # 테이블명 변수 선언
-SOURCE_TABLE = 'upbit_minute_data'  
-TARGET_TABLE = 'upbit_minute_data_2'
+SOURCE_TABLE = 'upbit_minute_data' if TIMEFRAME == '1m' else f'upbit_candle_{TIMEFRAME}'
+TARGET_TABLE = f'{SOURCE_TABLE}_2'
+
+# 지표 계산 모드: 'incremental'(새 캔들만 계산), 'full'(전체 재계산), 'verify'(증분 결과를 전체 재계산과 비교)
+INDICATOR_MODE = 'incremental'
+
+# 갱신 시점: 'event'(EFB가 분봉을 커밋했다는 알림을 받으면 해당 종목만 갱신), 'poll'(매 분 정해진 시각에 전 종목 갱신)
+INDICATOR_TRIGGER = 'event'
+
+# 'event'에서 이 시간(초) 동안 알림이 없으면 전 종목으로 한 번 실행 (EFB 중단, 알림 유실 대비)
+EVENT_FALLBACK_SEC = 65
+
+# 'poll'에서 매 분 경계 후 이 시간(초)이 지나면 한 번 실행 (EFB가 방금 마감된 분봉을 기록할 시간)
+CYCLE_OFFSET_SEC = 5
+
+# 이 시간(초)마다(시작 시 포함) 원본 테이블 전체를 한 번 MERGE
+# (EFB 백필이 종목 워터마크보다 과거 구간을 채운 경우 대상 테이블에 반영. 평소에는 종목별 워터마크 이후만 동기화)
+RESYNC_INTERVAL_SEC = 3600
+
+# 전체 재계산 시 캔들을 읽을 곳: 'db'(TARGET_TABLE 조회), 'store'(EFB가 기록한 로컬 Candle_Store)
+CANDLE_SOURCE = 'db'
+
+# 전체 재계산('full', 'verify') 워커 프로세스 수: 1이면 현재 프로세스에서 계산, None이면 CPU 코어 수
+INDICATOR_WORKERS = 1
+
+def wait_for_next_minute(offset=CYCLE_OFFSET_SEC):
+    """
+    다음 분 경계 + offset초까지 대기합니다.
+    """
+    now = time.time()
+    time.sleep((now // 60 + 1) * 60 + offset - now)
+
+
+def wait_for_candles(listener, timeout=EVENT_FALLBACK_SEC):
+    """
+    EFB의 분봉 기록 알림을 기다립니다.
+
+    Returns:
+    set 또는 None: 새 분봉이 커밋된 종목. 전 종목 알림을 받았거나 timeout 안에 알림이 없으면 None (전 종목 갱신)
+    """
+    events = listener.wait(timeout)
+    if not events:
+        print(f"[WARN] {timeout}초 동안 분봉 기록 알림이 없어 전 종목을 갱신합니다.")
+        return None
+    if None in events:
+        return None
+    print(f"[INFO] 분봉 기록 알림: {len(events)}개 종목 (최신 {max(until for until in events.values() if until)})")
+    return set(events)
+
 
 if __name__ == "__main__":
     conn = None
     try:
         # DB 연결 (SQLAlchemy 기반 엔진 또는 커넥션 객체를 반환한다고 가정)
         conn = get_db_connection()
-        
+
+        # 스키마 확인/마이그레이션 (시작 시 한 번: 대상 테이블 복제, 지표 컬럼, 상태/거래대금 테이블)
+        prepare_schema(conn, SOURCE_TABLE, TARGET_TABLE)
+
+        # 지표를 계산하는 원본 테이블의 알림만 받음 (시작 직후 첫 주기는 전 종목)
+        listener = CandleEventListener(tables=[SOURCE_TABLE]) if INDICATOR_TRIGGER == 'event' else None
+        markets = None
+        last_resync = None
+
         while True:
             
             # 거래량 업데이트 함수 호출
             manage_trading_volume(conn)
-            
-            # 대상 테이블 복제 (존재하지 않을 때만)
-            clone_table(conn, SOURCE_TABLE, TARGET_TABLE)
 
             # source_table에서 target_table로 데이터 동기화 (MERGE 사용)
-            sync_table_data(conn, SOURCE_TABLE, TARGET_TABLE)
+            if last_resync is None or time.monotonic() - last_resync >= RESYNC_INTERVAL_SEC:
+                resync_table_data(conn, SOURCE_TABLE, TARGET_TABLE)
+                last_resync = time.monotonic()
+            else:
+                sync_table_data(conn, SOURCE_TABLE, TARGET_TABLE, markets=markets)
 
 
 
             # 지표 계산 및 업데이트
-            process_indicators_update(conn, TARGET_TABLE)
+            process_indicators_update(conn, TARGET_TABLE, mode=INDICATOR_MODE, source=CANDLE_SOURCE,
+                                      timeframe=TIMEFRAME, workers=INDICATOR_WORKERS, markets=markets)
 
 
             
-            # 30초 대기 후 반복
-            time.sleep(1)
+            # 다음 분봉 기록 알림(또는 다음 분봉 마감)까지 대기 후 반복
+            if listener is not None:
+                markets = wait_for_candles(listener)
+            else:
+                wait_for_next_minute()
 
     except Exception as e:
         print(f"오류 발생: {e}")
@@ -12,11 +12,11 @@ def get_db_connection():
     except cx_Oracle.DatabaseError as e:
         print(f"Oracle DB 연결 오류: {e}")
         raise
-def fetch_data(query, conn):
+def fetch_data(query, conn, params=None):
     """
     DB에서 데이터를 조회하여 Pandas DataFrame으로 반환
     """
-    df = pd.read_sql(query, conn)
+    df = pd.read_sql(query, conn, params=params)
     return df
 
 def update_data(update_query, data, conn):
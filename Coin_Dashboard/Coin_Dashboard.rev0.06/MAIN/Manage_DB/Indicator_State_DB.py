@@ -0,0 +1,127 @@
+import json
+import cx_Oracle
+import pandas as pd
+
+STATE_TABLE = 'INDICATOR_STATE'
+
+
+def create_indicator_state_table(conn):
+    """
+    증분 지표 계산의 워터마크/상태를 영속화하는 INDICATOR_STATE 테이블이 없으면 생성합니다.
+    """
+    create_query = f"""
+    CREATE TABLE {STATE_TABLE} (
+        TABLE_NAME VARCHAR2(128) NOT NULL,
+        MARKET VARCHAR2(50) NOT NULL,
+        LAST_CANDLE_UTC TIMESTAMP NOT NULL,
+        EMA_15 NUMBER,
+        EMA_360 NUMBER,
+        VWAP_FIRST NUMBER,
+        VWAP_MAX NUMBER,
+        VWAP_MIN NUMBER,
+        STREAM_STATE CLOB,
+        PRIMARY KEY (TABLE_NAME, MARKET)
+    )
+    """
+    cursor = conn.cursor()
+    try:
+        cursor.execute(f"SELECT 1 FROM {STATE_TABLE} WHERE ROWNUM = 1")  # 테이블 존재 확인
+    except cx_Oracle.DatabaseError:
+        print(f"[INFO] {STATE_TABLE} 테이블이 존재하지 않아 생성합니다.")
+        cursor.execute(create_query)
+    finally:
+        cursor.close()
+
+    # 이전 버전에서 만든 테이블에는 스트리밍 상태 컬럼이 없으므로 추가
+    cursor = conn.cursor()
+    try:
+        cursor.execute(
+            "SELECT COUNT(*) FROM USER_TAB_COLUMNS WHERE TABLE_NAME = :table_name AND COLUMN_NAME = 'STREAM_STATE'",
+            {'table_name': STATE_TABLE},
+        )
+        if cursor.fetchone()[0] == 0:
+            print(f"[INFO] {STATE_TABLE} 테이블에 STREAM_STATE 컬럼을 추가합니다.")
+            cursor.execute(f"ALTER TABLE {STATE_TABLE} ADD STREAM_STATE CLOB")
+    finally:
+        cursor.close()
+
+
+def _clob_as_string(cursor, name, default_type, size, precision, scale):
+    # CLOB을 LOB 객체 대신 문자열로 바로 읽음
+    if default_type == cx_Oracle.DB_TYPE_CLOB:
+        return cursor.var(cx_Oracle.DB_TYPE_LONG, arraysize=cursor.arraysize)
+
+
+def load_indicator_states(conn, table_name):
+    """
+    영속화된 종목별 상태 행을 조회합니다.
+
+    Returns:
+    pd.DataFrame: MARKET, LAST_CANDLE_UTC, EMA_15, EMA_360, VWAP_FIRST, VWAP_MAX, VWAP_MIN,
+                  STREAM_STATE(IndicatorStream.to_dict() JSON 문자열 또는 None) 컬럼.
+    """
+    query = f"""
+        SELECT MARKET, LAST_CANDLE_UTC, EMA_15, EMA_360, VWAP_FIRST, VWAP_MAX, VWAP_MIN, STREAM_STATE
+        FROM {STATE_TABLE}
+        WHERE TABLE_NAME = :table_name
+    """
+    cursor = conn.cursor()
+    try:
+        cursor.outputtypehandler = _clob_as_string
+        cursor.execute(query, {'table_name': table_name.upper()})
+        columns = [desc[0] for desc in cursor.description]
+        return pd.DataFrame(cursor.fetchall(), columns=columns)
+    finally:
+        cursor.close()
+
+
+def save_indicator_states(cursor, table_name, states):
+    """
+    종목별 상태를 INDICATOR_STATE에 MERGE합니다.
+    커밋은 호출 측에서 지표 UPDATE와 같은 트랜잭션으로 수행합니다.
+
+    Parameters:
+    cursor (cx_Oracle.Cursor): 지표 UPDATE에 사용한 커서
+    table_name (str): 지표가 기록되는 테이블 이름
+    states (list[IndicatorState]): 저장할 상태 목록
+    """
+    merge_query = f"""
+    MERGE INTO {STATE_TABLE} d
+    USING (SELECT :table_name AS table_name, :market AS market FROM dual) s
+    ON (d.TABLE_NAME = s.table_name AND d.MARKET = s.market)
+    WHEN MATCHED THEN
+        UPDATE SET LAST_CANDLE_UTC = :last_candle_utc,
+                   EMA_15 = :ema15, EMA_360 = :ema360,
+                   VWAP_FIRST = :vwap_first, VWAP_MAX = :vwap_max, VWAP_MIN = :vwap_min,
+                   STREAM_STATE = :stream_state
+    WHEN NOT MATCHED THEN
+        INSERT (TABLE_NAME, MARKET, LAST_CANDLE_UTC, EMA_15, EMA_360, VWAP_FIRST, VWAP_MAX, VWAP_MIN, STREAM_STATE)
+        VALUES (:table_name, :market, :last_candle_utc, :ema15, :ema360, :vwap_first, :vwap_max, :vwap_min,
+                :stream_state)
+    """
+    data = [
+        {
+            'table_name': table_name.upper(),
+            'market': state.market,
+            'last_candle_utc': state.watermark.to_pydatetime(),
+            'ema15': _to_bind(state.ema_15),
+            'ema360': _to_bind(state.ema_360),
+            'vwap_first': _to_bind(state.vwap_first),
+            'vwap_max': _to_bind(state.vwap_max),
+            'vwap_min': _to_bind(state.vwap_min),
+            # 스트리밍 상태가 없으면 (전체 재계산 직후 등) NULL: 다음 증분 계산 때 tail로 다시 만듦
+            'stream_state': json.dumps(state.stream.to_dict()) if state.stream is not None else None,
+        }
+        for state in states
+        if state.watermark is not None
+    ]
+    if data:
+        cursor.setinputsizes(stream_state=cx_Oracle.DB_TYPE_CLOB)
+        cursor.executemany(merge_query, data)
+
+
+def _to_bind(value):
+    # NaN은 Oracle NUMBER로 바인딩할 수 없으므로 NULL로 저장
+    if value is None or value != value:
+        return None
+    return float(value)
@@ -0,0 +1,115 @@
+import cx_Oracle
+import numpy as np
+import pandas as pd
+from Calculate_Indicator.Indicator_Registry import INDICATOR_COLUMNS, SIGNAL_COLUMNS
+
+# 지표 갱신 결과로 DB에 기록하는 컬럼 (지표 레지스트리 출력 + 신호)
+UPDATE_COLUMNS = INDICATOR_COLUMNS + list(SIGNAL_COLUMNS)
+
+# 해시를 보관하는 기간 (EFB가 20일 이전 데이터를 archive로 옮기므로 그보다 조금 길게)
+HASH_RETENTION = pd.Timedelta(days=21)
+
+
+class IndicatorChangeDetector:
+    """
+    마지막으로 기록한 지표 값과 비교하여 새로 생겼거나 값이 바뀐 행만 골라냅니다.
+
+    - high_water: 종목별로 마지막으로 기록한 캔들 시각. 이보다 새로운 행은 해시 비교 없이 신규 행으로 처리합니다.
+    - hashes: 종목별 {캔들 시각: UPDATE_COLUMNS 값 해시}. high_water 이하의 행은 해시가 같으면 건너뜁니다.
+    """
+
+    def __init__(self):
+        self.high_water = {}
+        self.hashes = {}
+
+    @staticmethod
+    def _hash_rows(df):
+        return pd.util.hash_pandas_object(df[UPDATE_COLUMNS], index=False).to_numpy()
+
+    def select_changed(self, df):
+        """
+        Parameters:
+        df (pd.DataFrame): 이번 주기에 계산된 지표 행 (MARKET, CANDLE_DATE_TIME_UTC, UPDATE_COLUMNS 포함)
+
+        Returns:
+        pd.DataFrame: DB에 다시 써야 하는 행만 남긴 DataFrame
+        """
+        if df.empty:
+            return df
+
+        row_hashes = self._hash_rows(df)
+        times = df['CANDLE_DATE_TIME_UTC'].to_numpy()
+        changed = np.ones(len(df), dtype=bool)
+
+        for market, positions in df.groupby('MARKET').indices.items():
+            high_water = self.high_water.get(market)
+            previous = self.hashes.get(market)
+            if high_water is None or previous is None:
+                continue
+
+            # high-water mark 이하의 행만 이전 해시와 비교
+            old_rows = positions[times[positions] <= np.datetime64(high_water)]
+            if len(old_rows) == 0:
+                continue
+            found = previous.index.get_indexer(times[old_rows])
+            known = found >= 0
+            same = np.zeros(len(old_rows), dtype=bool)
+            same[known] = previous.to_numpy()[found[known]] == row_hashes[old_rows[known]]
+            changed[old_rows[same]] = False
+
+        return df.loc[changed]
+
+    def remember(self, df):
+        """
+        기록이 커밋된 뒤 호출하여 high-water mark와 해시를 갱신합니다.
+        """
+        if df.empty:
+            return
+
+        row_hashes = pd.Series(self._hash_rows(df), index=pd.DatetimeIndex(df['CANDLE_DATE_TIME_UTC']))
+
+        for market, positions in df.groupby('MARKET').indices.items():
+            current = row_hashes.iloc[positions]
+            previous = self.hashes.get(market)
+            if previous is not None:
+                current = pd.concat([previous[~previous.index.isin(current.index)], current]).sort_index()
+
+            high_water = current.index.max()
+            self.hashes[market] = current[current.index >= high_water - HASH_RETENTION]
+            self.high_water[market] = high_water
+
+
+def _number_column(values):
+    # NaN은 NULL로 바인딩 (Oracle NUMBER에는 NaN을 저장할 수 없음)
+    values = np.asarray(values, dtype=float)
+    return np.where(np.isnan(values), None, values).tolist()
+
+
+def write_indicator_rows(cursor, table_name, df):
+    """
+    지표 행을 위치 바인딩 배열로 executemany UPDATE합니다. (커밋은 호출 측에서 수행)
+    행마다 dict를 만들지 않고 NumPy 배열에서 바로 컬럼별 바인드 리스트를 만듭니다.
+
+    Returns:
+    int: 전송한 행 수
+    """
+    if df.empty:
+        return 0
+
+    n_numbers = len(INDICATOR_COLUMNS)
+    set_clause = ', '.join(f"{column} = :{i + 1}" for i, column in enumerate(UPDATE_COLUMNS))
+    update_query = f"""
+        UPDATE {table_name}
+        SET {set_clause}
+        WHERE CANDLE_DATE_TIME_UTC = :{len(UPDATE_COLUMNS) + 1}
+          AND MARKET = :{len(UPDATE_COLUMNS) + 2}
+    """
+    columns = [_number_column(df[column].to_numpy()) for column in INDICATOR_COLUMNS]
+    columns.append(df['OPINION'].astype(str).tolist())
+    columns.append(_number_column(df['CONFIDENCE'].to_numpy()))
+    columns.append(list(pd.DatetimeIndex(df['CANDLE_DATE_TIME_UTC']).to_pydatetime()))
+    columns.append(df['MARKET'].astype(str).tolist())
+
+    cursor.setinputsizes(*([cx_Oracle.NUMBER] * n_numbers), 26, cx_Oracle.NUMBER, cx_Oracle.TIMESTAMP, 50)
+    cursor.executemany(update_query, list(zip(*columns)))
+    return len(df)
@@ -0,0 +1,179 @@
+import cx_Oracle
+from Calculate_Indicator.Indicator_Registry import output_column_types
+from Manage_DB.Add_missing_columns import add_missing_columns
+from Manage_DB.Clone_Table import clone_table
+from Manage_DB.Indicator_State_DB import STATE_TABLE, create_indicator_state_table
+from Manage_DB.Trading_Volume import VOLUME_TABLE, create_trading_volume_table
+
+# --------------------------------------------------
+#  스키마 관리
+#  - 프로그램 시작 시 한 번: 버전별 마이그레이션(MIGRATIONS) 중 아직 적용되지 않은 것만 적용하고,
+#    사용하는 테이블의 컬럼 목록을 한 번 조회해 메모리에 보관
+#  - 반복 루프에서는 ensure_columns / ensure_table이 메모리의 컬럼 목록만 확인
+#    (데이터 사전 조회와 변경 없는 커밋을 하지 않음. 실제로 없는 컬럼/테이블이 있을 때만 DDL 실행)
+# --------------------------------------------------
+
+VERSION_TABLE = 'SCHEMA_VERSION'
+
+
+def _clone_target(conn, source_table, target_table):
+    clone_table(conn, source_table, target_table)
+
+
+def _add_indicator_columns(conn, source_table, target_table):
+    add_missing_columns(conn, target_table, output_column_types())
+
+
+def _create_indicator_state(conn, source_table, target_table):
+    create_indicator_state_table(conn)
+
+
+def _create_trading_volume(conn, source_table, target_table):
+    create_trading_volume_table(conn)
+
+
+# (버전, 설명, 적용 함수(conn, source_table, target_table))
+# 대상 테이블별로 버전 순서대로 한 번씩 적용합니다. 적용 함수는 이미 적용된 상태에서 다시 실행해도 안전해야 합니다.
+# (SCHEMA_VERSION이 생기기 전부터 운영하던 DB는 처음 한 번 모든 버전을 다시 확인하고 기록)
+MIGRATIONS = [
+    (1, '원본 테이블을 대상 테이블로 복제 (PRIMARY KEY 포함)', _clone_target),
+    (2, '대상 테이블에 지표/신호 컬럼 추가', _add_indicator_columns),
+    (3, 'INDICATOR_STATE 테이블 생성 (STREAM_STATE 컬럼 포함)', _create_indicator_state),
+    (4, 'TRADING_VOLUME 테이블 생성 (거래대금 윈도우 컬럼 포함)', _create_trading_volume),
+]
+
+
+class SchemaCache:
+    """
+    테이블별 컬럼 목록 ({TABLE_NAME: set(COLUMN_NAME)}, 모두 대문자).
+    """
+
+    def __init__(self):
+        self.columns = {}
+
+    def load(self, conn, tables):
+        """
+        tables의 컬럼 목록을 한 번의 데이터 사전 조회로 읽습니다. 없는 테이블은 목록에서 빠집니다.
+        """
+        tables = [table.upper() for table in tables]
+        binds = {f"t{i}": table for i, table in enumerate(tables)}
+        query = f"""
+            SELECT TABLE_NAME, COLUMN_NAME
+            FROM USER_TAB_COLUMNS
+            WHERE TABLE_NAME IN ({', '.join(f':{name}' for name in binds)})
+        """
+        cursor = conn.cursor()
+        try:
+            cursor.execute(query, binds)
+            found = {}
+            for table, column in cursor.fetchall():
+                found.setdefault(table, set()).add(column)
+        finally:
+            cursor.close()
+        for table in tables:
+            if table in found:
+                self.columns[table] = found[table]
+            else:
+                self.columns.pop(table, None)
+
+    def has_table(self, table):
+        return table.upper() in self.columns
+
+    def missing_columns(self, table, required_columns):
+        existing = self.columns.get(table.upper(), set())
+        return {name: column_def for name, column_def in required_columns.items() if name.upper() not in existing}
+
+
+_schema = SchemaCache()
+
+
+def _create_version_table(conn):
+    create_query = f"""
+    CREATE TABLE {VERSION_TABLE} (
+        SCOPE VARCHAR2(128) NOT NULL,
+        VERSION NUMBER NOT NULL,
+        DESCRIPTION VARCHAR2(200),
+        APPLIED_AT TIMESTAMP DEFAULT SYSTIMESTAMP,
+        PRIMARY KEY (SCOPE, VERSION)
+    )
+    """
+    cursor = conn.cursor()
+    try:
+        cursor.execute(f"SELECT 1 FROM {VERSION_TABLE} WHERE ROWNUM = 1")  # 테이블 존재 확인
+    except cx_Oracle.DatabaseError:
+        print(f"[INFO] {VERSION_TABLE} 테이블이 존재하지 않아 생성합니다.")
+        cursor.execute(create_query)
+    finally:
+        cursor.close()
+
+
+def _applied_versions(conn, scope):
+    cursor = conn.cursor()
+    try:
+        cursor.execute(f"SELECT VERSION FROM {VERSION_TABLE} WHERE SCOPE = :scope", scope=scope)
+        return {int(row[0]) for row in cursor.fetchall()}
+    finally:
+        cursor.close()
+
+
+def prepare_schema(conn, source_table, target_table):
+    """
+    프로그램 시작 시 한 번 호출합니다. 아직 적용되지 않은 마이그레이션을 버전 순서대로 적용하고,
+    결과 스키마를 확인한 뒤 사용하는 테이블의 컬럼 목록을 메모리에 보관합니다.
+
+    Raises:
+    RuntimeError: 마이그레이션 후에도 필요한 테이블/컬럼이 없을 때 (이때는 버전을 기록하지 않음)
+    """
+    scope = target_table.upper()
+    _create_version_table(conn)
+    applied = _applied_versions(conn, scope)
+
+    pending = [migration for migration in MIGRATIONS if migration[0] not in applied]
+    for version, description, apply in pending:
+        print(f"[INFO] 스키마 마이그레이션 {scope} v{version}: {description}")
+        apply(conn, source_table, target_table)
+
+    # 적용 함수는 오류를 출력만 하고 넘어가는 것이 있으므로 결과 스키마를 직접 확인
+    tables = [target_table, STATE_TABLE, VOLUME_TABLE]
+    _schema.load(conn, tables)
+    missing_tables = [table for table in tables if not _schema.has_table(table)]
+    if missing_tables:
+        raise RuntimeError(f"스키마 마이그레이션 후에도 테이블이 없습니다: {missing_tables}")
+    missing = _schema.missing_columns(target_table, output_column_types())
+    if missing:
+        raise RuntimeError(f"스키마 마이그레이션 후에도 {target_table}에 컬럼이 없습니다: {list(missing)}")
+
+    if pending:
+        cursor = conn.cursor()
+        try:
+            cursor.executemany(
+                f"INSERT INTO {VERSION_TABLE} (SCOPE, VERSION, DESCRIPTION) VALUES (:scope, :version, :description)",
+                [{'scope': scope, 'version': version, 'description': description}
+                 for version, description, _ in pending],
+            )
+            conn.commit()
+        finally:
+            cursor.close()
+    print(f"[INFO] 스키마 준비 완료: {scope} v{max(version for version, _, _ in MIGRATIONS)}")
+
+
+def ensure_columns(conn, table_name, required_columns):
+    """
+    table_name에 required_columns({컬럼: 타입})가 있는지 메모리의 컬럼 목록으로 확인하고, 없는 컬럼만 추가합니다.
+    prepare_schema로 읽지 않은 테이블은 처음 한 번만 데이터 사전을 조회합니다.
+    """
+    if not _schema.has_table(table_name):
+        _schema.load(conn, [table_name])
+    missing = _schema.missing_columns(table_name, required_columns)
+    if missing:
+        add_missing_columns(conn, table_name, missing)
+        _schema.load(conn, [table_name])
+
+
+def ensure_table(conn, table_name, create):
+    """
+    table_name이 메모리의 컬럼 목록에 없을 때만 create(conn)으로 만들고 컬럼 목록을 다시 읽습니다.
+    """
+    if not _schema.has_table(table_name):
+        create(conn)
+        _schema.load(conn, [table_name])
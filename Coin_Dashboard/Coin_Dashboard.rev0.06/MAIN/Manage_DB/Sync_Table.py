@@ -1,35 +1,150 @@
+import datetime
 import cx_Oracle
 
-def sync_table_data(conn, source_table, target_table):
+# 소스 테이블별 컬럼 목록 (프로세스 시작 후 처음 한 번만 조회)
+_column_cache = {}
+
+# (소스, 대상) 테이블별 {MARKET: 대상 테이블에 들어간 마지막 CANDLE_DATE_TIME_UTC}
+_watermarks = {}
+
+# 마지막 캔들이 가장 최근 종목보다 이만큼 이상 오래된 종목(거래 중단/상장 폐지)은 신규 종목을 찾는 하한 계산에서 제외
+STALE_MARKET_AFTER = datetime.timedelta(days=1)
+
+# 워터마크가 없는 종목의 조회 하한 (전체 이력)
+HISTORY_START = datetime.datetime(1970, 1, 1)
+
+
+def _source_columns(cursor, source_table):
+    """
+    소스 테이블 컬럼명 (캐시)
+    """
+    if source_table not in _column_cache:
+        cursor.execute(f"SELECT * FROM {source_table} WHERE 1 = 0")
+        _column_cache[source_table] = [desc[0] for desc in cursor.description]
+    return _column_cache[source_table]
+
+
+def _load_watermarks(cursor, table_name, since=None):
+    """
+    table_name의 종목별 마지막 캔들 시각. since가 있으면 그 이후 행만 집계합니다.
+    """
+    if since is None:
+        cursor.execute(f"SELECT MARKET, MAX(CANDLE_DATE_TIME_UTC) FROM {table_name} GROUP BY MARKET")
+    else:
+        cursor.execute(
+            f"SELECT MARKET, MAX(CANDLE_DATE_TIME_UTC) FROM {table_name} "
+            f"WHERE CANDLE_DATE_TIME_UTC > :since GROUP BY MARKET",
+            since=since,
+        )
+    return dict(cursor.fetchall())
+
+
+def watermark_lower_bound(watermarks):
+    """
+    활성 종목 워터마크 중 가장 이른 값. 워터마크가 없으면 None
+    (MERGE 후 이 시각 이후의 대상 행만 집계해 워터마크를 갱신)
+    """
+    if not watermarks:
+        return None
+    latest = max(watermarks.values())
+    active = [value for value in watermarks.values() if value >= latest - STALE_MARKET_AFTER]
+    return min(active)
+
+
+def _source_markets(cursor, table_name):
+    """
+    table_name의 전체 종목 (처음 호출과 전체 MERGE에서만 조회)
+    """
+    cursor.execute(f"SELECT DISTINCT MARKET FROM {table_name}")
+    return {row[0] for row in cursor.fetchall()}
+
+
+def sync_table_data(conn, source_table, target_table, markets=None, full=False):
     """
-    source_table에서 target_table로 데이터를 MERGE를 사용하여 동기화합니다.
+    source_table에서 target_table로 대상 테이블에 아직 없는 행을 MERGE로 동기화합니다.
     PK로 MARKET, CANDLE_DATE_TIME_UTC 컬럼을 가정했습니다.
+
+    종목별 워터마크(대상 테이블의 마지막 캔들 시각)를 프로세스 메모리에 유지하고, 종목마다 자기 워터마크
+    이후의 소스 행만 MERGE합니다 (종목별 MERGE를 executemany로 한 번에 실행, 소스 PK 범위 조회).
+    워터마크가 없는 종목(신규 상장 등)은 소스의 전체 이력을 MERGE합니다.
+    워터마크는 처음 호출할 때 대상 테이블에서 한 번 집계하고, 이후에는 새로 들어간 행으로만 갱신합니다.
+
+    Parameters:
+    markets (iterable, optional): 새 캔들이 기록된 종목 (EFB 분봉 기록 알림). 워터마크가 없는 종목은
+        전체 이력을 MERGE합니다. 워터마크가 있는 종목은 markets와 관계없이 매번 동기화합니다.
+    full (bool): True이면 워터마크와 관계없이 소스 전 종목의 전체 이력을 MERGE (resync_table_data)
+
+    Notes:
+    - 워터마크보다 과거 시각으로 뒤늦게 들어온 소스 행(EFB 백필이 채운 빈 구간 등)과, 알림 없이(폴링 모드)
+      새로 생긴 종목은 resync_table_data로 한 번 전체 MERGE하면 채워집니다.
+      (대시보드 시작 시와 RESYNC_INTERVAL_SEC마다 실행)
     """
+    key = (source_table, target_table)
     try:
         with conn.cursor() as cursor:
-            # 소스 테이블 컬럼명 가져오기
-            cursor.execute(f"SELECT * FROM {source_table} WHERE ROWNUM = 1")
-            column_names = [desc[0] for desc in cursor.description]
+            column_names = _source_columns(cursor, source_table)
 
-            # MERGE 구문
+            if key not in _watermarks:
+                _watermarks[key] = _load_watermarks(cursor, target_table)
+                if markets is None:
+                    markets = _source_markets(cursor, source_table)
+            watermarks = _watermarks[key]
+
+            # 종목별 조회 하한: 워터마크가 없는 종목은 전체 이력
+            if full:
+                bounds = dict.fromkeys(_source_markets(cursor, source_table), HISTORY_START)
+            else:
+                bounds = dict(watermarks)
+                for market in markets or ():
+                    bounds.setdefault(market, HISTORY_START)
+            since = watermark_lower_bound(watermarks)
+
+            # MERGE 구문 (종목 하나의 워터마크 이후 행)
             # PK로 (MARKET, CANDLE_DATE_TIME_UTC)를 사용한다고 가정
             merge_query = f"""
                 MERGE INTO {target_table} t
-                USING {source_table} s
+                USING (
+                    SELECT {', '.join(column_names)}
+                    FROM {source_table}
+                    WHERE MARKET = :market AND CANDLE_DATE_TIME_UTC > :since
+                ) s
                 ON (t.MARKET = s.MARKET AND t.CANDLE_DATE_TIME_UTC = s.CANDLE_DATE_TIME_UTC)
                 WHEN NOT MATCHED THEN
                   INSERT ({', '.join(column_names)})
                   VALUES ({', '.join(['s.' + col for col in column_names])})
             """
 
-            print(f"'{source_table}'에서 '{target_table}'로 데이터를 MERGE를 통해 동기화합니다.")
-            cursor.execute(merge_query)
+            history_markets = sum(1 for bound in bounds.values() if bound == HISTORY_START)
+            print(f"'{source_table}'에서 '{target_table}'로 데이터를 MERGE를 통해 동기화합니다. "
+                  f"({len(bounds)}개 종목, 전체 이력 {history_markets}개 종목)")
+            merged = 0
+            if bounds:
+                cursor.executemany(merge_query, [{'market': market, 'since': bound} for market, bound in bounds.items()])
+                merged = cursor.rowcount
+
+            # 새로 들어간 행으로 워터마크 갱신 (커밋 전에 같은 트랜잭션에서 조회)
+            # 전체 이력을 MERGE한 종목이 있으면 전체를 다시 집계
+            if merged:
+                for market, last in _load_watermarks(cursor, target_table, None if history_markets else since).items():
+                    current = watermarks.get(market)
+                    if current is None or last > current:
+                        watermarks[market] = last
+
             conn.commit()
-            print("데이터 동기화(MERGE)가 완료되었습니다.")
+            print(f"데이터 동기화(MERGE)가 완료되었습니다. ({merged}행)")
 
     except cx_Oracle.DatabaseError as e:
+        _watermarks.pop(key, None)
         error, = e.args
         print(f"데이터베이스 오류 발생: {error.message}")
 
     except Exception as e:
+        _watermarks.pop(key, None)
         print(f"데이터 동기화 중 오류가 발생했습니다: {e}")
+
+
+def resync_table_data(conn, source_table, target_table):
+    """
+    워터마크와 관계없이 소스 테이블 전체를 한 번 MERGE합니다. (뒤늦게 들어온 과거 행, 백필로 채운 빈 구간 보정용)
+    """
+    sync_table_data(conn, source_table, target_table, full=True)
@@ -1,54 +1,269 @@
+import math
+from collections import deque
+
 import cx_Oracle
-from Manage_DB.DB_Managing import get_db_connection
+from Manage_DB.Add_missing_columns import add_missing_columns
+from Manage_DB.Sync_Table import watermark_lower_bound
 
-def manage_trading_volume(conn):
+# --------------------------------------------------
+#  종목별 최근 거래대금 합계 (TRADING_VOLUME)
+#  - 종목마다 윈도우별로 최근 N개 캔들 거래대금 ring과 합계를 메모리에 유지하고 새 캔들마다 O(1)로 갱신
+#  - 매 호출은 K_REAL_TIME에서 종목별 마지막 캔들 이후(진행 중인 마지막 캔들 포함)만 조회
+#  - 결과는 바뀐 종목만 TRADING_VOLUME에 MERGE (테이블을 삭제/재생성하지 않으므로 조회 측에서 빈 테이블을 보지 않음)
+# --------------------------------------------------
+
+VOLUME_TABLE = 'TRADING_VOLUME'
+SOURCE_TABLE = 'K_REAL_TIME'
+
+# {TRADING_VOLUME 컬럼: 합산할 최근 캔들 수(분봉)}
+# H1_TTV는 기존 테이블과의 호환을 위해 이름과 값(최근 20개 캔들)을 그대로 둡니다.
+VOLUME_WINDOWS = {
+    'H1_TTV': 20,
+    'M60_TTV': 60,
+    'M1440_TTV': 1440,
+}
+
+# 프로세스 메모리에 유지하는 저장소 (처음 호출할 때 K_REAL_TIME에서 채움)
+_volume_store = None
+
+
+class VolumeRing:
+    """
+    최근 window개 캔들 거래대금의 ring과 합계.
+    같은 시각의 캔들이 다시 들어오면(진행 중인 캔들 갱신) 마지막 값을 바꿉니다.
+    window번 갱신할 때마다 합계를 ring 값으로 다시 계산해 더하고 빼는 반올림 오차가 쌓이지 않게 합니다.
+    """
+
+    def __init__(self, window):
+        self.window = window
+        self.values = deque()
+        self.total = 0.0
+        self.updates = 0
+
+    def append(self, value):
+        self.values.append(value)
+        self.total += value
+        if len(self.values) > self.window:
+            self.total -= self.values.popleft()
+        self._count_update()
+
+    def replace_last(self, value):
+        self.total += value - self.values[-1]
+        self.values[-1] = value
+        self._count_update()
+
+    def _count_update(self):
+        self.updates += 1
+        if self.updates % self.window == 0:
+            self.total = math.fsum(self.values)
+
+
+class RollingVolumeStore:
+    """
+    종목별 VolumeRing(윈도우마다 하나)과 마지막 캔들 시각.
     """
-    TRADING_VOLUME 테이블을 삭제하고 재생성한 후 데이터를 삽입하는 함수.
+
+    def __init__(self, windows=None):
+        self.windows = dict(VOLUME_WINDOWS if windows is None else windows)
+        self.rings = {}        # {종목: {컬럼: VolumeRing}}
+        self.last_times = {}   # {종목: 마지막 캔들 시각}
+
+    def push(self, name, candle_time, value):
+        """
+        캔들 1개를 반영합니다. 마지막 캔들보다 과거 시각이면 무시합니다.
+
+        Returns:
+        bool: 합계가 바뀌었으면 True
+        """
+        if name is None:
+            return False
+        value = 0.0 if value is None else float(value)  # SUM과 같이 NULL은 합계에 더하지 않음
+        last = self.last_times.get(name)
+        if last is not None and candle_time < last:
+            return False
+
+        rings = self.rings.get(name)
+        if rings is None:
+            rings = self.rings[name] = {column: VolumeRing(window) for column, window in self.windows.items()}
+
+        if candle_time == last:
+            if next(iter(rings.values())).values[-1] == value:
+                return False
+            for ring in rings.values():
+                ring.replace_last(value)
+        else:
+            for ring in rings.values():
+                ring.append(value)
+            self.last_times[name] = candle_time
+        return True
+
+    def totals(self, name):
+        """
+        Returns:
+        dict: {컬럼: 최근 window개 캔들 거래대금 합계}
+        """
+        return {column: ring.total for column, ring in self.rings[name].items()}
+
+    def lower_bound(self):
+        """
+        다음 조회의 시각 하한 (활성 종목의 마지막 캔들 중 가장 이른 시각, 이 시각 포함). 종목이 없으면 None
+        """
+        return watermark_lower_bound(self.last_times)
+
+
+def create_trading_volume_table(conn, windows=None):
+    """
+    TRADING_VOLUME 테이블이 없으면 생성하고, 윈도우 컬럼이 없으면 추가합니다. (있는 테이블은 삭제하지 않음)
     """
-    delete_table_query = """
-    DROP TABLE TRADING_VOLUME"""
-    create_table_query = """
-    CREATE TABLE TRADING_VOLUME (
+    windows = VOLUME_WINDOWS if windows is None else windows
+    create_query = f"""
+    CREATE TABLE {VOLUME_TABLE} (
         KOREAN_NAME VARCHAR2(100),
-        H1_TTV NUMBER
+        {', '.join(f'{column} NUMBER' for column in windows)}
     )"""
-    insert_query = """
-    INSERT INTO TRADING_VOLUME (KOREAN_NAME, H1_TTV)
-    SELECT
-        KOREAN_NAME,
-        SUM(CANDLE_ACC_TRADE_PRICE) AS H1_TTV
-    FROM (
-        SELECT
-            KOREAN_NAME,
-            CANDLE_ACC_TRADE_PRICE,
-            ROW_NUMBER() OVER (
-                PARTITION BY KOREAN_NAME
-                ORDER BY CANDLE_DATE_TIME_UTC DESC
-            ) AS RN
-        FROM K_REAL_TIME
-    )
-    WHERE RN <= 20
-    GROUP BY KOREAN_NAME
+    cursor = conn.cursor()
+    try:
+        cursor.execute(f"SELECT 1 FROM {VOLUME_TABLE} WHERE ROWNUM = 1")  # 테이블 존재 확인
+    except cx_Oracle.DatabaseError:
+        print(f"[INFO] {VOLUME_TABLE} 테이블이 존재하지 않아 생성합니다.")
+        cursor.execute(create_query)
+    finally:
+        cursor.close()
+
+    add_missing_columns(conn, VOLUME_TABLE, {column: 'NUMBER' for column in windows})
+
+
+def _fill_recent(conn, store, names=None):
     """
+    K_REAL_TIME에서 종목별 최근 (가장 긴 윈도우)개 캔들을 읽어 저장소에 반영합니다.
+
+    Parameters:
+    names (iterable, optional): 읽을 종목. None이면 전 종목
+    """
+    params = {'max_window': max(store.windows.values())}
+    name_filter = ''
+    if names is not None:
+        binds = {f'n{i}': name for i, name in enumerate(sorted(names))}
+        name_filter = f"WHERE KOREAN_NAME IN ({', '.join(f':{bind}' for bind in binds)})"
+        params.update(binds)
+    query = f"""
+        SELECT KOREAN_NAME, CANDLE_DATE_TIME_UTC, CANDLE_ACC_TRADE_PRICE
+        FROM (
+            SELECT
+                KOREAN_NAME,
+                CANDLE_DATE_TIME_UTC,
+                CANDLE_ACC_TRADE_PRICE,
+                ROW_NUMBER() OVER (
+                    PARTITION BY KOREAN_NAME
+                    ORDER BY CANDLE_DATE_TIME_UTC DESC
+                ) AS RN
+            FROM {SOURCE_TABLE}
+            {name_filter}
+        )
+        WHERE RN <= :max_window
+        ORDER BY CANDLE_DATE_TIME_UTC
+    """
+    cursor = conn.cursor()
     try:
-        cursor = conn.cursor()
-        # 테이블 삭제
-        try:
-            cursor.execute(delete_table_query)
-            print("TRADING_VOLUME 테이블이 성공적으로 삭제되었습니다.")
-        except cx_Oracle.DatabaseError as e:
-            print(f"Error deleting table (ignored if not exists): {e}")
-
-        # 테이블 생성
-        cursor.execute(create_table_query)
-        conn.commit()
-        print("TRADING_VOLUME 테이블이 성공적으로 생성되었습니다.")
+        cursor.arraysize = 10000
+        cursor.execute(query, params)
+        for name, candle_time, value in cursor:
+            store.push(name, candle_time, value)
+    finally:
+        cursor.close()
+
+
+def _load_store(conn, windows=None):
+    """
+    K_REAL_TIME에서 종목별 최근 (가장 긴 윈도우)개 캔들을 한 번 읽어 저장소를 채웁니다.
+    """
+    store = RollingVolumeStore(windows)
+    _fill_recent(conn, store)
+    print(f"[INFO] 거래대금 저장소 초기화: {len(store.rings)}개 종목")
+    return store
+
+
+def _apply_new_candles(conn, store):
+    """
+    저장소의 조회 하한 이후(하한 포함) 캔들을 반영합니다.
+    저장소에 없던 종목(저장소를 채운 뒤 새로 생긴 종목)은 조회 하한보다 과거 캔들도 윈도우에 들어가야 하므로,
+    _load_store와 같은 종목별 최근 캔들 조회로 따로 채웁니다.
+
+    Returns:
+    set: 합계가 바뀐 종목
+    """
+    query = f"""
+        SELECT KOREAN_NAME, CANDLE_DATE_TIME_UTC, CANDLE_ACC_TRADE_PRICE
+        FROM {SOURCE_TABLE}
+        WHERE CANDLE_DATE_TIME_UTC >= :since
+        ORDER BY CANDLE_DATE_TIME_UTC
+    """
+    changed = set()
+    unseen = set()
+    cursor = conn.cursor()
+    try:
+        cursor.execute(query, since=store.lower_bound())
+        for name, candle_time, value in cursor:
+            if name is not None and name not in store.rings:
+                unseen.add(name)
+            elif store.push(name, candle_time, value):
+                changed.add(name)
+    finally:
+        cursor.close()
 
-        # 데이터 삽입
-        cursor.execute(insert_query)
+    if unseen:
+        _fill_recent(conn, store, unseen)
+        print(f"[INFO] 거래대금 저장소에 새 종목 {len(unseen)}개 추가")
+        changed |= unseen & set(store.rings)
+    return changed
+
+
+def publish_volumes(conn, store, names):
+    """
+    names 종목의 합계를 TRADING_VOLUME에 MERGE하고 커밋합니다.
+    """
+    columns = list(store.windows)
+    merge_query = f"""
+    MERGE INTO {VOLUME_TABLE} d
+    USING (SELECT :korean_name AS korean_name FROM dual) s
+    ON (d.KOREAN_NAME = s.korean_name)
+    WHEN MATCHED THEN
+        UPDATE SET {', '.join(f'{column} = :{column}' for column in columns)}
+    WHEN NOT MATCHED THEN
+        INSERT (KOREAN_NAME, {', '.join(columns)})
+        VALUES (:korean_name, {', '.join(f':{column}' for column in columns)})
+    """
+    data = [{'korean_name': name, **store.totals(name)} for name in sorted(names)]
+    if not data:
+        return 0
+    cursor = conn.cursor()
+    try:
+        cursor.executemany(merge_query, data)
         conn.commit()
-        print("데이터가 성공적으로 삽입되었습니다.")
+    finally:
+        cursor.close()
+    return len(data)
+
+
+def manage_trading_volume(conn):
+    """
+    TRADING_VOLUME의 종목별 최근 거래대금 합계를 새 캔들만큼 갱신합니다.
+    처음 호출할 때 K_REAL_TIME에서 저장소를 채운 뒤 전 종목을 기록합니다.
+    테이블은 시작 시 Schema_Manager.prepare_schema가 준비합니다. (create_trading_volume_table)
+    """
+    global _volume_store
+    try:
+        if _volume_store is None or _volume_store.lower_bound() is None:
+            # 처음 호출, 오류 후, 또는 K_REAL_TIME이 비어 있던 경우: 다시 채움
+            _volume_store = _load_store(conn)
+            changed = set(_volume_store.rings)
+        else:
+            changed = _apply_new_candles(conn, _volume_store)
+
+        written = publish_volumes(conn, _volume_store, changed)
+        if written:
+            print(f"TRADING_VOLUME {written}개 종목 갱신")
     except cx_Oracle.DatabaseError as e:
+        # 메모리 합계가 기록된 값과 어긋날 수 있으므로 다음 호출에서 다시 채움
+        _volume_store = None
         print(f"Error managing TRADING_VOLUME: {e}")
-    finally:
-        cursor.close()
\ No newline at end of file
@@ -0,0 +1,61 @@
+import os
+import sys
+import time
+import argparse
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import Main
+from Fetch_Data.Rate_Limiter import TokenBucket
+from Fetch_Data.Concurrent_Fetcher import fetch_markets_concurrently
+from Mock_Upbit.Mock_Server import start_mock_server
+
+# --------------------------------------------------
+#  로컬 Mock Upbit 서버로 종목 수(4 ~ 200)에 따른 1회 수집 주기 시간 측정
+#  - serial: 기존 update_db_periodically 방식 (종목 순차 + 요청마다 0.5초 대기)
+#  - concurrent: 스레드 풀 + 공유 TokenBucket
+#  DB 작업은 제외하고 API 수집 시간만 측정
+# --------------------------------------------------
+
+
+def run_cycle(markets, mode, max_workers, delta_minutes):
+    last_time = datetime.now() - timedelta(minutes=delta_minutes)
+    start = time.perf_counter()
+    if mode == 'concurrent':
+        limiter = TokenBucket()
+        results = fetch_markets_concurrently(
+            lambda market: Main.fetch_data_since(market, last_time, limiter), markets, max_workers
+        )
+        rows = sum(len(df) for df in results.values())
+    else:
+        rows = sum(len(Main.fetch_data_since(market, last_time)) for market in markets)
+    return time.perf_counter() - start, rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--markets', default='4,20,50,100,200')
+    parser.add_argument('--workers', type=int, default=8)
+    parser.add_argument('--latency', type=float, default=0.03, help='Mock 서버 응답 지연(초)')
+    parser.add_argument('--rate-limit', type=int, default=10, help='Mock 서버 초당 요청 제한')
+    parser.add_argument('--delta-minutes', type=int, default=3, help='종목별로 새로 받을 분봉 수')
+    parser.add_argument('--serial-max', type=int, default=50, help='이 종목 수까지만 serial 모드 측정')
+    args = parser.parse_args()
+
+    server, base_url, state = start_mock_server(rate_limit=args.rate_limit, latency=args.latency)
+    Main.UPBIT_API_URL = base_url
+
+    print(f"{'markets':>8} {'mode':>11} {'cycle(s)':>9} {'rows':>6} {'429':>5}")
+    try:
+        for n in map(int, args.markets.split(',')):
+            markets = [f"KRW-M{i:03d}" for i in range(n)]
+            for mode in ('serial', 'concurrent'):
+                if mode == 'serial' and n > args.serial_max:
+                    continue
+                too_many_before = state.too_many_count
+                elapsed, rows = run_cycle(markets, mode, args.workers, args.delta_minutes)
+                print(f"{n:>8} {mode:>11} {elapsed:>9.2f} {rows:>6} {state.too_many_count - too_many_before:>5}")
+                time.sleep(1)  # 다음 측정 전 Mock 서버 초당 제한 윈도우 초기화
+    finally:
+        server.shutdown()
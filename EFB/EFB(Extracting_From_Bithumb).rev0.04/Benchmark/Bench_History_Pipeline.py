@@ -0,0 +1,99 @@
+import os
+import sys
+import time
+import json
+import argparse
+import resource
+import subprocess
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd
+
+import Main
+from Fetch_Data.Rate_Limiter import TokenBucket
+from Mock_Upbit.Mock_Server import start_mock_server, load_recorded_candles, record_candles
+
+# --------------------------------------------------
+#  이력 수집 방식별 처리 속도(rows/sec)와 최대 메모리(peak RSS) 측정
+#  - legacy: 기존 fetch_20days_data (페이지마다 pd.concat + drop_duplicates, 전체 이력을 메모리에 모은 뒤 저장)
+#  - pipeline: iter_candle_pages -> write_pages_in_chunks (chunk 단위 저장)
+#  저장은 DB 대신 build_upsert_rows(바인딩 행 변환)까지만 수행
+#  peak RSS는 프로세스 전체 최대값이므로 측정마다 별도 프로세스에서 실행
+# --------------------------------------------------
+
+
+def legacy_fetch(market, target_time, limiter):
+    data = pd.DataFrame()
+    end_time = datetime.now()
+    while True:
+        params = {'market': market, 'count': 200, 'to': end_time.strftime("%Y-%m-%dT%H:%M:%SZ")}
+        response = Main.request_candle_page(f"{Main.UPBIT_API_URL}/v1/candles/minutes/1", params, limiter)
+        batch = pd.DataFrame(response.json())
+        if batch.empty:
+            break
+        data = pd.concat([data, batch], ignore_index=True)
+        data.drop_duplicates(subset=['candle_date_time_utc'], inplace=True)
+        end_time = datetime.strptime(batch['candle_date_time_utc'].min(), "%Y-%m-%dT%H:%M:%S")
+        if end_time <= target_time:
+            break
+    return data[Main.CANDLE_COLUMNS]
+
+
+def run_case(mode, days, recorded_path, chunk_size):
+    recorded = load_recorded_candles(recorded_path) if recorded_path else None
+    server, base_url, _ = start_mock_server(rate_limit=10 ** 6, latency=0, history_minutes=days * 1440 + 400,
+                                            recorded=recorded)
+    Main.UPBIT_API_URL = base_url
+    limiter = TokenBucket(rate=10 ** 6)
+    market = 'KRW-BTC'
+    target_time = datetime.now() - timedelta(days=days)
+    sink = lambda data: len(Main.build_upsert_rows(data, market))
+
+    base_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.perf_counter()
+    try:
+        if mode == 'legacy':
+            rows = sink(legacy_fetch(market, target_time, limiter))
+        else:
+            rows = Main.write_pages_in_chunks(Main.iter_candle_pages(market, target_time, limiter), sink, chunk_size)
+    finally:
+        server.shutdown()
+    elapsed = time.perf_counter() - start
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    print(json.dumps({'mode': mode, 'days': days, 'rows': rows, 'seconds': elapsed,
+                      'peak_rss_mb': peak_rss / 1024, 'rss_growth_mb': (peak_rss - base_rss) / 1024}))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--days', default='5,20,60,120')
+    parser.add_argument('--modes', default='legacy,pipeline')
+    parser.add_argument('--recorded', help='record_candles()로 녹화한 분봉 JSON lines (없으면 가짜 분봉)')
+    parser.add_argument('--record', type=int, metavar='PAGES', help='--recorded 경로에 실제 API 분봉을 PAGES 페이지 녹화한 뒤 측정')
+    parser.add_argument('--chunk-size', type=int, default=Main.UPSERT_CHUNK_SIZE)
+    parser.add_argument('--case', help=argparse.SUPPRESS)  # 내부용: 'mode:days' 한 건만 측정
+    args = parser.parse_args()
+
+    if args.case:
+        mode, days = args.case.split(':')
+        run_case(mode, int(days), args.recorded, args.chunk_size)
+        sys.exit(0)
+
+    if args.record:
+        record_candles(args.recorded, 'KRW-BTC', args.record)
+
+    print(f"{'days':>5} {'mode':>9} {'rows':>8} {'sec':>7} {'rows/sec':>9} {'peak RSS(MB)':>13} {'RSS 증가(MB)':>12}")
+    for days in map(int, args.days.split(',')):
+        for mode in args.modes.split(','):
+            command = [sys.executable, os.path.abspath(__file__), '--case', f"{mode}:{days}",
+                       '--chunk-size', str(args.chunk_size)]
+            if args.recorded:
+                command += ['--recorded', args.recorded]
+            output = subprocess.run(command, capture_output=True, text=True, check=True).stdout
+            result = json.loads(output.strip().splitlines()[-1])
+            print(f"{days:>5} {mode:>9} {result['rows']:>8} {result['seconds']:>7.2f} "
+                  f"{result['rows'] / result['seconds']:>9.0f} {result['peak_rss_mb']:>13.1f} "
+                  f"{result['rss_growth_mb']:>12.1f}")
@@ -0,0 +1,77 @@
+import os
+import sys
+import time
+import argparse
+import statistics
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import requests
+
+from Fetch_Data.Rate_Limiter import TokenBucket
+from Fetch_Data.Http_Client import UpbitHttpClient
+from Mock_Upbit.Mock_Server import start_mock_server
+
+# --------------------------------------------------
+#  분봉 페이지 요청 방식별 페이지당 지연 / 새 연결 수 / 실패 페이지 수 측정
+#  - plain: 기존 방식 (요청마다 requests.get -> 새 연결, 재시도 없음)
+#  - pooled: UpbitHttpClient (Session 연결 재사용, gzip, 429/5xx 백오프 재시도)
+#  handshake_latency로 실제 API의 TLS 연결 비용을, error_rate로 간헐적 503을 흉내냄
+# --------------------------------------------------
+
+
+def run_mode(mode, base_url, state, pages, workers):
+    url = f"{base_url}/v1/candles/minutes/1"
+    limiter = TokenBucket(rate=1000)  # 요청 제한 대기는 측정에서 제외
+    client = UpbitHttpClient(pool_size=workers) if mode == 'pooled' else None
+
+    def fetch(i):
+        params = {'market': f"KRW-M{i % 50:03d}", 'count': 200}
+        start = time.perf_counter()
+        if client is not None:
+            response = client.get(url, params, limiter)
+        else:
+            limiter.acquire()
+            response = requests.get(url, params=params)
+        response.json()
+        return time.perf_counter() - start, response.status_code == 200
+
+    connections_before = state.connection_count
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        results = list(executor.map(fetch, range(pages)))
+    elapsed = time.perf_counter() - start
+    if client is not None:
+        client.close()
+
+    latencies = sorted(latency for latency, _ in results)
+    return {
+        'pages_per_sec': pages / elapsed,
+        'p50_ms': statistics.median(latencies) * 1000,
+        'p99_ms': latencies[int(len(latencies) * 0.99) - 1] * 1000,
+        'connections': state.connection_count - connections_before,
+        'failed': sum(1 for _, ok in results if not ok),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--pages', type=int, default=400)
+    parser.add_argument('--workers', type=int, default=8)
+    parser.add_argument('--latency', type=float, default=0.03, help='Mock 서버 응답 지연(초)')
+    parser.add_argument('--handshake', type=float, default=0.05, help='새 연결마다 추가되는 지연(초)')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='503 응답 비율')
+    args = parser.parse_args()
+
+    server, base_url, state = start_mock_server(rate_limit=10_000, latency=args.latency,
+                                                handshake_latency=args.handshake, error_rate=args.error_rate)
+
+    print(f"{'mode':>7} {'pages/s':>8} {'p50(ms)':>8} {'p99(ms)':>8} {'conns':>6} {'failed':>7}")
+    try:
+        for mode in ('plain', 'pooled'):
+            result = run_mode(mode, base_url, state, args.pages, args.workers)
+            print(f"{mode:>7} {result['pages_per_sec']:>8.1f} {result['p50_ms']:>8.1f} {result['p99_ms']:>8.1f} "
+                  f"{result['connections']:>6} {result['failed']:>7}")
+    finally:
+        server.shutdown()
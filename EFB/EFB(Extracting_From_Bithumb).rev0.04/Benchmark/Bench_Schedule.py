@@ -0,0 +1,87 @@
+import os
+import sys
+import time
+import argparse
+import statistics
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd
+
+import Main
+from Fetch_Data.Rate_Limiter import TokenBucket
+from Fetch_Data.Minute_Scheduler import MinuteScheduler
+from Mock_Upbit.Mock_Server import start_mock_server
+
+# --------------------------------------------------
+#  수집 주기 방식별 요청 수 / DB 기록 행 수 / 분봉 마감 -> 기록 지연 측정
+#  - poll: 기존 방식 (수집 후 2초 대기 반복)
+#  - minute: MinuteScheduler (분 경계 + settle offset에 한 번, 미발행 종목만 재시도)
+#  DB 대신 기록 행 수와 워터마크만 갱신 (MERGE 행 수 = DB 부하 지표)
+# --------------------------------------------------
+
+
+class WriteRecorder:
+    def __init__(self):
+        self.rows = 0
+        self.first_write = {}  # (market, 분) -> 분 마감 후 처음 기록되기까지 걸린 시간(초)
+
+    def write(self, conn, data, market, chunk_size=None):
+        now = time.time()
+        times = pd.to_datetime(data['candle_date_time_utc'])
+        for candle_time in times:
+            key = (market, candle_time)
+            if key not in self.first_write:
+                close = (candle_time + timedelta(minutes=1)).replace(tzinfo=None)
+                self.first_write[key] = now - close.timestamp()
+        self.rows += len(data)
+        Main.WATERMARKS.advance(market, times.max().to_pydatetime())
+        return len(data)
+
+
+def run_mode(mode, markets, minutes, state):
+    recorder = WriteRecorder()
+    Main.update_db_with_data = recorder.write
+
+    start_time = datetime.utcnow().replace(second=0, microsecond=0) - timedelta(minutes=2)
+    Main.WATERMARKS._marks = {market: start_time for market in markets}
+    Main.WATERMARKS.loaded = True
+
+    limiter = TokenBucket()
+    scheduler = MinuteScheduler() if mode == 'minute' else None
+    requests_before = state.request_count
+    deadline = time.time() + minutes * 60
+    while time.time() < deadline:
+        Main.run_update_cycle(None, markets, limiter, scheduler)
+
+    elapsed_min = minutes
+    latencies = [delay for (_, candle_time), delay in recorder.first_write.items()
+                 if candle_time.to_pydatetime() > start_time]
+    return {
+        'requests_per_min': (state.request_count - requests_before) / elapsed_min,
+        'rows_per_min': recorder.rows / elapsed_min,
+        'latency_p50': statistics.median(latencies) if latencies else float('nan'),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--markets', type=int, default=20)
+    parser.add_argument('--minutes', type=float, default=2)
+    parser.add_argument('--publish-delay', type=float, default=0.5, help='Mock 서버가 분 마감 후 분봉을 발행하기까지 걸리는 시간(초)')
+    parser.add_argument('--modes', default='poll,minute')
+    args = parser.parse_args()
+
+    server, base_url, state = start_mock_server(latency=0.03, publish_delay=args.publish_delay)
+    Main.UPBIT_API_URL = base_url
+    markets = [f"KRW-M{i:03d}" for i in range(args.markets)]
+
+    print(f"{'mode':>7} {'req/min':>8} {'rows/min':>9} {'close->write p50(s)':>20}")
+    try:
+        for mode in args.modes.split(','):
+            result = run_mode(mode, markets, args.minutes, state)
+            print(f"{mode:>7} {result['requests_per_min']:>8.0f} {result['rows_per_min']:>9.0f} "
+                  f"{result['latency_p50']:>20.2f}")
+    finally:
+        server.shutdown()
@@ -0,0 +1,57 @@
+import os
+import sys
+import time
+import asyncio
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Stream_Data.Upbit_Stream import StreamIngestor
+from Mock_Upbit.Mock_WebSocket import load_recorded_ticks, synthetic_ticks, start_mock_websocket
+
+# --------------------------------------------------
+#  로컬 WebSocket 대역으로 체결 -> 1분봉 집계 -> 기록까지의 지연 측정 (DB 없이)
+#  - 기록 함수는 분봉 마감 시각 대비 호출 시각(지연)만 기록
+#  - 최초 연결 분은 REST 보정 대상이므로 보정 함수는 호출만 확인
+# --------------------------------------------------
+
+
+async def run(url, markets, minutes):
+    latencies = []
+    rows = []
+
+    def write(market, data):
+        now = time.time()
+        latencies.append((now - (now // 60 * 60)) * 1000)
+        rows.append(len(data))
+        return len(data)
+
+    def repair(since):
+        print(f"[bench] REST 보정 호출 (since={since})")
+
+    ingestor = StreamIngestor(markets, write, repair, url=url)
+    try:
+        await asyncio.wait_for(ingestor.run(), timeout=minutes * 60 + 61 - time.time() % 60)
+    except asyncio.TimeoutError:
+        pass
+    return latencies, rows, ingestor
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--ticks', help='녹화된 체결 파일 (JSON lines). 없으면 가짜 체결 생성')
+    parser.add_argument('--markets', default='KRW-BTC,KRW-XRP,KRW-ETH,KRW-ETC')
+    parser.add_argument('--minutes', type=int, default=2)
+    args = parser.parse_args()
+
+    markets = args.markets.split(',')
+    ticks = load_recorded_ticks(args.ticks) if args.ticks else synthetic_ticks(markets, (args.minutes + 2) * 60)
+    url = start_mock_websocket(ticks)
+
+    latencies, rows, ingestor = asyncio.run(run(url, markets, args.minutes))
+    if latencies:
+        latencies.sort()
+        print(f"체결 {ingestor.trade_count}건, 분봉 {sum(rows)}행 기록")
+        print(f"분봉 마감 -> 기록 지연: p50 {latencies[len(latencies) // 2]:.1f}ms, max {latencies[-1]:.1f}ms")
+    else:
+        print("기록된 분봉이 없습니다. --minutes 값을 늘려 보세요.")
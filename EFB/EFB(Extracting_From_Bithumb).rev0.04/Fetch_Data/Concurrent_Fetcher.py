@@ -0,0 +1,33 @@
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+# 동시 요청 스레드 수 기본값 (실제 요청 속도는 공유 TokenBucket이 제한)
+DEFAULT_MAX_WORKERS = 8
+
+
+def fetch_markets_concurrently(fetch_func, markets, max_workers=DEFAULT_MAX_WORKERS):
+    """
+    여러 종목의 데이터를 스레드 풀에서 동시에 수집합니다.
+    DB 작업은 포함하지 않으며, 호출 측에서 결과를 받아 순차적으로 저장합니다.
+
+    Parameters:
+    fetch_func (callable): market을 받아 pd.DataFrame을 반환하는 함수 (요청 제한은 이 함수가 공유 limiter로 처리)
+    markets (list[str]): 수집할 종목 목록
+    max_workers (int): 동시 요청 스레드 수
+
+    Returns:
+    dict: {market: pd.DataFrame}. 예외가 발생한 종목은 결과에서 빠집니다.
+    """
+    results = {}
+    if not markets:
+        return results
+
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(markets))) as executor:
+        futures = {executor.submit(fetch_func, market): market for market in markets}
+        for future in as_completed(futures):
+            market = futures[future]
+            try:
+                results[market] = future.result()
+            except Exception as e:
+                print(f"[ERROR] {market} 데이터 수집 실패: {e}")
+
+    return results
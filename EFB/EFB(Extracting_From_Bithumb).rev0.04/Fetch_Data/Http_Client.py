@@ -0,0 +1,275 @@
+import bisect
+import os
+import random
+import threading
+import time
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# 재시도 기본값: 최대 재시도 횟수, 첫 대기(초), 대기 상한(초)
+MAX_RETRIES = 5
+BACKOFF_BASE_SEC = 0.5
+MAX_BACKOFF_SEC = 30.0
+
+# 응답 대기 시간 제한(초): (연결, 읽기)
+REQUEST_TIMEOUT = (5, 15)
+
+# 지연 시간 히스토그램 구간 상한(ms). 마지막 구간은 그 이상 전부
+LATENCY_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+
+def backoff_delay(attempt, base=BACKOFF_BASE_SEC, cap=MAX_BACKOFF_SEC):
+    """
+    지수 백오프 + full jitter 대기 시간. attempt(0부터)마다 상한이 두 배가 되고,
+    0 ~ 상한 사이에서 무작위로 골라 여러 스레드/프로세스가 동시에 재시도하지 않게 한다.
+    """
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+class LatencyHistogram:
+    """
+    고정 구간(LATENCY_BUCKETS_MS) 요청 지연 시간 히스토그램. 여러 스레드에서 기록 가능.
+    """
+
+    def __init__(self, buckets=LATENCY_BUCKETS_MS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.total = 0
+        self.sum_ms = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, elapsed_ms):
+        with self._lock:
+            self.counts[bisect.bisect_left(self.buckets, elapsed_ms)] += 1
+            self.total += 1
+            self.sum_ms += elapsed_ms
+
+    def percentile(self, q):
+        """
+        구간 상한으로 근사한 q(0~1) 분위수(ms). 기록이 없으면 None, 마지막 구간이면 inf.
+        """
+        with self._lock:
+            if self.total == 0:
+                return None
+            rank = q * self.total
+            seen = 0
+            for bound, count in zip(self.buckets + (float('inf'),), self.counts):
+                seen += count
+                if seen >= rank:
+                    return bound
+            return float('inf')
+
+    def snapshot(self):
+        """
+        Returns:
+        dict: {'count', 'sum_ms', 'buckets': [(구간 상한 ms, 누적 개수), ...]}
+        """
+        with self._lock:
+            cumulative = []
+            seen = 0
+            for bound, count in zip(self.buckets + (float('inf'),), self.counts):
+                seen += count
+                cumulative.append((bound, seen))
+            return {'count': self.total, 'sum_ms': self.sum_ms, 'buckets': cumulative}
+
+
+def _snapshot_percentile(histogram, q):
+    """
+    LatencyHistogram.snapshot() 결과에서 구간 상한으로 근사한 q(0~1) 분위수(ms).
+    """
+    rank = q * histogram['count']
+    for bound, seen in histogram['buckets']:
+        if seen >= rank:
+            return bound
+    return float('inf')
+
+
+class UpbitHttpClient:
+    """
+    Upbit REST API 공용 HTTP 클라이언트.
+
+    - requests.Session 하나를 공유하여 연결을 재사용 (keep-alive, 풀 크기 = 동시 요청 스레드 수)
+    - gzip 압축 응답 요청
+    - 429 / 5xx / 네트워크 오류를 구분하여 재시도
+      429: limiter가 있으면 limiter.penalize()로 모든 요청을 함께 멈추고, 없으면 백오프 대기
+      5xx, 연결/타임아웃 오류: 지수 백오프 + jitter 후 재시도
+    - 엔드포인트(URL 경로)별 지연 시간 히스토그램
+
+    Session은 프로세스 간에 공유할 수 없으므로 프로세스마다 하나씩 만든다.
+    """
+
+    def __init__(self, pool_size=8, max_retries=MAX_RETRIES, backoff_base=BACKOFF_BASE_SEC,
+                 max_backoff=MAX_BACKOFF_SEC, timeout=REQUEST_TIMEOUT):
+        self.pool_size = pool_size
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.max_backoff = max_backoff
+        self.timeout = timeout
+        self.pid = os.getpid()
+
+        self.session = self._new_session()
+
+        self.histograms = {}
+        self.retry_counts = {'429': 0, '5xx': 0, 'network': 0}
+        self.status_counts = {}  # (엔드포인트, HTTP 상태 코드) -> 응답 수
+        self._lock = threading.Lock()
+
+    def _new_session(self):
+        session = requests.Session()
+        self._mount(session, self.pool_size)
+        session.headers.update({'Accept': 'application/json', 'Accept-Encoding': 'gzip'})
+        return session
+
+    @staticmethod
+    def _mount(session, pool_size):
+        # 재시도는 직접 처리하므로 urllib3 재시도는 끔. pool_block: 풀보다 많은 스레드는 연결을 새로 열지 않고 대기
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, pool_block=True, max_retries=0)
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+
+    def resize(self, pool_size):
+        """
+        연결 풀을 pool_size로 키운다. 같은 Session에 새 adapter를 mount하므로 지연/응답/재시도 통계는 유지된다.
+        (이전 adapter에서 진행 중인 요청은 그대로 끝나고, 그 연결은 재사용되지 않고 정리됨)
+        """
+        if pool_size <= self.pool_size:
+            return
+        self._mount(self.session, pool_size)
+        self.pool_size = pool_size
+
+    def reset_after_fork(self):
+        """
+        fork된 자식 프로세스에서 부모의 연결(소켓)을 쓰지 않도록 Session만 새로 만든다. 통계는 유지된다.
+        """
+        self.session = self._new_session()
+        self._lock = threading.Lock()
+        self.pid = os.getpid()
+
+    def _observe(self, endpoint, elapsed_ms, status):
+        histogram = self.histograms.get(endpoint)
+        with self._lock:
+            if histogram is None:
+                histogram = self.histograms.setdefault(endpoint, LatencyHistogram())
+            key = (endpoint, status)
+            self.status_counts[key] = self.status_counts.get(key, 0) + 1
+        histogram.observe(elapsed_ms)
+
+    def _retry_wait(self, kind, attempt):
+        with self._lock:
+            self.retry_counts[kind] += 1
+        time.sleep(backoff_delay(attempt, self.backoff_base, self.max_backoff))
+
+    def get(self, url, params=None, limiter=None):
+        """
+        GET 요청. limiter(TokenBucket)가 주어지면 시도마다 토큰을 얻고 200 응답의 Remaining-Req 헤더로 맞춘다.
+
+        Returns:
+        requests.Response: 200/4xx 응답, 또는 재시도를 모두 쓴 뒤의 마지막 429/5xx 응답
+
+        Raises:
+        requests.RequestException: 재시도를 모두 쓴 뒤에도 연결/타임아웃 오류가 나는 경우
+        """
+        endpoint = urlparse(url).path
+        attempt = 0
+        while True:
+            if limiter is not None:
+                limiter.acquire()
+
+            start = time.perf_counter()
+            try:
+                response = self.session.get(url, params=params, timeout=self.timeout)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                if attempt >= self.max_retries:
+                    raise
+                print(f"[WARN] {endpoint} 네트워크 오류, 재시도 {attempt + 1}/{self.max_retries}: {e}")
+                self._retry_wait('network', attempt)
+                attempt += 1
+                continue
+
+            status = response.status_code
+            self._observe(endpoint, (time.perf_counter() - start) * 1000, status)
+            if status == 200:
+                if limiter is not None:
+                    limiter.update_from_headers(response.headers)
+                return response
+            if attempt >= self.max_retries or (status != 429 and status < 500):
+                return response
+
+            if status == 429:
+                if limiter is not None:
+                    with self._lock:
+                        self.retry_counts['429'] += 1
+                    backoff = limiter.penalize()
+                    print(f"[WARN] Too many requests. Waiting for {backoff:.0f} sec...")
+                else:
+                    self._retry_wait('429', attempt)
+            else:
+                print(f"[WARN] {endpoint} 서버 오류 {status}, 재시도 {attempt + 1}/{self.max_retries}")
+                self._retry_wait('5xx', attempt)
+            attempt += 1
+
+    def snapshot(self):
+        """
+        클라이언트 통계를 락을 잡은 채 복사한다. 다른 스레드(메트릭 HTTP 서버 등)는 이 복사본만 읽는다.
+
+        Returns:
+        dict: {'status_counts': {(엔드포인트, 상태 코드): 응답 수},
+               'retry_counts': {사유: 재시도 수},
+               'histograms': {엔드포인트: LatencyHistogram.snapshot()}}
+        """
+        with self._lock:
+            status_counts = dict(self.status_counts)
+            retry_counts = dict(self.retry_counts)
+            histograms = dict(self.histograms)
+        return {
+            'status_counts': status_counts,
+            'retry_counts': retry_counts,
+            'histograms': {endpoint: histogram.snapshot() for endpoint, histogram in histograms.items()},
+        }
+
+    def latency_summary(self, snapshot=None):
+        """
+        Parameters:
+        snapshot (dict): snapshot() 결과. 없으면 새로 만든다.
+
+        Returns:
+        dict: {엔드포인트: {'count', 'avg_ms', 'p50_ms', 'p99_ms'}}
+        """
+        snapshot = snapshot or self.snapshot()
+        summary = {}
+        for endpoint, histogram in snapshot['histograms'].items():
+            if histogram['count'] == 0:
+                continue
+            summary[endpoint] = {
+                'count': histogram['count'],
+                'avg_ms': histogram['sum_ms'] / histogram['count'],
+                'p50_ms': _snapshot_percentile(histogram, 0.5),
+                'p99_ms': _snapshot_percentile(histogram, 0.99),
+            }
+        return summary
+
+    def close(self):
+        self.session.close()
+
+
+_default_client = None
+_default_client_lock = threading.Lock()
+
+
+def get_http_client(pool_size=8):
+    """
+    프로세스 공용 클라이언트. 처음 호출할 때 만들고, 이후에는 같은 클라이언트를 돌려준다.
+    더 큰 풀이 필요하면 연결 풀만 키우고, fork된 자식 프로세스에서 처음 호출하면 Session만 새로 만든다.
+    (클라이언트를 교체하지 않으므로 수집 지표가 읽는 응답/지연/재시도 통계가 초기화되지 않음)
+    """
+    global _default_client
+    with _default_client_lock:
+        if _default_client is None:
+            _default_client = UpbitHttpClient(pool_size=pool_size)
+            return _default_client
+        if _default_client.pid != os.getpid():
+            _default_client.reset_after_fork()
+        _default_client.resize(pool_size)
+        return _default_client
@@ -0,0 +1,71 @@
+import zlib
+
+import requests
+
+from Fetch_Data.Http_Client import get_http_client
+
+# 종목 목록을 다시 조회하는 주기(초) - 신규 상장/상장 폐지 반영
+UNIVERSE_REFRESH_SEC = 300
+
+
+def fetch_markets(base_url, quote='KRW'):
+    """
+    Upbit 종목 목록 API(/v1/market/all)에서 quote 마켓(예: KRW-*) 종목 코드를 조회합니다.
+
+    Returns:
+    list[str]: 정렬된 종목 코드 목록
+    """
+    response = get_http_client().get(f"{base_url}/v1/market/all", params={'isDetails': 'false'})
+    response.raise_for_status()
+    prefix = f"{quote}-"
+    return sorted(item['market'] for item in response.json() if item['market'].startswith(prefix))
+
+
+def shard_of(market, shard_count):
+    """
+    종목이 속한 shard 번호. 종목 코드의 해시로 정하므로 다른 종목이 상장/폐지되어도 담당 worker가 바뀌지 않습니다.
+    """
+    return zlib.crc32(market.encode()) % shard_count
+
+
+def shard_markets(markets, shard_index, shard_count):
+    return [market for market in markets if shard_of(market, shard_count) == shard_index]
+
+
+class MarketUniverse:
+    """
+    UNIVERSE_REFRESH_SEC마다 종목 목록을 다시 조회하여 이 worker가 담당할 종목을 돌려줍니다.
+    조회에 실패하면 직전 목록을 그대로 사용합니다.
+    """
+
+    def __init__(self, base_url, shard_index=0, shard_count=1, quote='KRW', refresh_sec=UNIVERSE_REFRESH_SEC):
+        self.base_url = base_url
+        self.shard_index = shard_index
+        self.shard_count = shard_count
+        self.quote = quote
+        self.refresh_sec = refresh_sec
+        self.markets = []
+        self._refreshed_at = None
+
+    def current(self, now):
+        """
+        Parameters:
+        now (float): time.monotonic() 값
+
+        Returns:
+        tuple: (담당 종목 목록, 새로 추가된 종목 set, 빠진 종목 set)
+        """
+        if self._refreshed_at is not None and now - self._refreshed_at < self.refresh_sec:
+            return self.markets, set(), set()
+
+        try:
+            markets = shard_markets(fetch_markets(self.base_url, self.quote), self.shard_index, self.shard_count)
+        except (requests.RequestException, ValueError, KeyError) as e:
+            print(f"[WARN] 종목 목록 조회 실패, 이전 목록을 사용합니다: {e}")
+            return self.markets, set(), set()
+
+        self._refreshed_at = now
+        added = set(markets) - set(self.markets)
+        removed = set(self.markets) - set(markets)
+        self.markets = markets
+        return markets, added, removed
@@ -0,0 +1,70 @@
+import time
+from datetime import datetime, timezone
+
+# 분 경계 후 거래소가 분봉을 마감/발행할 때까지 기다리는 기본 시간(초)
+SETTLE_OFFSET_SEC = 1.0
+
+# 아직 분봉이 발행되지 않은 종목 재시도: 첫 대기(초)와 최대 재시도 횟수 (대기는 재시도마다 두 배)
+RETRY_BASE_SEC = 0.5
+MAX_RETRIES = 4
+
+# 적응형 settle offset 상한(초)
+MAX_SETTLE_OFFSET_SEC = 10.0
+
+
+class MinuteScheduler:
+    """
+    매 분 경계 + settle offset에 깨어나 방금 마감된 분봉을 한 번 수집하도록 시점을 맞춥니다.
+
+    - wait_next_minute(): 다음 분 경계 + offset까지 대기 후 마감된 분(UTC)을 반환
+    - collect(): 마감 분봉이 아직 없는 종목만 지수 백오프로 재시도
+    - 첫 시도에서 절반 이상의 종목이 아직 발행 전이면 offset을 늘리고,
+      첫 시도에 대부분 받으면 설정값까지 조금씩 줄입니다 (거래 없는 종목 때문에 늘어나지 않도록 비율로 판단).
+    """
+
+    def __init__(self, settle_offset=SETTLE_OFFSET_SEC, max_retries=MAX_RETRIES,
+                 retry_base=RETRY_BASE_SEC, max_offset=MAX_SETTLE_OFFSET_SEC):
+        self.min_offset = settle_offset
+        self.offset = settle_offset
+        self.max_retries = max_retries
+        self.retry_base = retry_base
+        self.max_offset = max_offset
+
+    def wait_next_minute(self):
+        """
+        Returns:
+        datetime: 방금 마감된 분의 시작 시각 (tz 정보 없는 UTC)
+        """
+        now = time.time()
+        boundary = (now // 60 + 1) * 60
+        time.sleep(max(0.0, boundary + self.offset - now))
+        return datetime.fromtimestamp(boundary - 60, tz=timezone.utc).replace(tzinfo=None)
+
+    def collect(self, markets, fetch_missing):
+        """
+        Parameters:
+        markets (list[str]): 이번 분 수집 대상
+        fetch_missing (callable): fetch_missing(pending) -> 수집 후에도 마감 분봉이 없는 종목 목록
+
+        Returns:
+        tuple: (재시도 후에도 분봉이 없는 종목 목록, 시도 횟수)
+        """
+        pending = fetch_missing(list(markets))
+        attempts = 1
+        self._adapt(len(pending), len(markets))
+
+        delay = self.retry_base
+        while pending and attempts <= self.max_retries:
+            time.sleep(delay)
+            pending = fetch_missing(pending)
+            attempts += 1
+            delay *= 2
+        return pending, attempts
+
+    def _adapt(self, missing, total):
+        if total == 0:
+            return
+        if missing / total > 0.5:
+            self.offset = min(self.max_offset, self.offset + self.retry_base)
+        else:
+            self.offset = max(self.min_offset, self.offset - 0.1)
@@ -0,0 +1,130 @@
+import multiprocessing
+import re
+import threading
+import time
+
+# Upbit 시세 조회 API 제한 (초당 10회)
+UPBIT_REQUESTS_PER_SEC = 10
+
+
+def parse_remaining_req(header_value):
+    """
+    Upbit 'Remaining-Req' 응답 헤더를 파싱합니다.
+    예) 'group=candles; min=1800; sec=29'
+
+    Returns:
+    dict: {'group': 'candles', 'min': 1800, 'sec': 29}. 헤더가 없거나 형식이 다르면 빈 dict.
+    """
+    if not header_value:
+        return {}
+
+    parsed = {}
+    for key, value in re.findall(r'(\w+)=([\w-]+)', header_value):
+        parsed[key] = int(value) if value.isdigit() else value
+    return parsed
+
+
+class TokenBucket:
+    """
+    여러 스레드가 공유하는 토큰 버킷 요청 제한기.
+
+    - acquire(): 요청 전 토큰 1개를 소비하며, 토큰이 없으면 채워질 때까지 대기합니다.
+    - update_from_headers(): 응답의 Remaining-Req 헤더(sec=남은 요청 수)로 토큰 수를 서버 기준에 맞춥니다.
+    - penalize(): HTTP 429 응답 시 잠시 모든 요청을 멈추고, 연속 429가 날수록 대기 시간을 늘립니다.
+    """
+
+    def __init__(self, rate=UPBIT_REQUESTS_PER_SEC, capacity=None, max_backoff=60.0):
+        self.rate = float(rate)
+        # 서버는 초 단위 고정 윈도우로 세므로, 버킷을 가득 채운 채 윈도우 경계를 넘으면
+        # 한 윈도우에 rate보다 많이 보낼 수 있음 -> 기본 버스트 크기는 rate의 절반
+        self.capacity = float(capacity if capacity is not None else max(1.0, rate / 2))
+        self.max_backoff = max_backoff
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._blocked_until = 0.0
+        self._consecutive_429 = 0
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        elapsed = now - self._updated
+        if elapsed > 0:
+            self._tokens = min(self.capacity, self._tokens + elapsed * self.rate)
+            self._updated = now
+
+    def acquire(self):
+        """
+        토큰 1개를 얻을 때까지 대기합니다.
+
+        Returns:
+        float: 대기한 시간(초)
+        """
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if now >= self._blocked_until and self._tokens >= 1:
+                    self._tokens -= 1
+                    return waited
+                wait = max(self._blocked_until - now, (1 - self._tokens) / self.rate)
+            time.sleep(wait)
+            waited += wait
+
+    def update_from_headers(self, headers):
+        """
+        응답 헤더의 남은 요청 수가 로컬 토큰 수보다 적으면 서버 값을 따릅니다.
+        """
+        remaining = parse_remaining_req(headers.get('Remaining-Req')).get('sec')
+        with self._lock:
+            self._consecutive_429 = 0
+            if isinstance(remaining, int):
+                self._refill(time.monotonic())
+                self._tokens = min(self._tokens, float(remaining))
+
+    def penalize(self):
+        """
+        HTTP 429 응답 시 호출합니다. 1초부터 시작해 연속 429마다 두 배씩(최대 max_backoff) 모든 요청을 멈춥니다.
+
+        Returns:
+        float: 이번에 설정된 대기 시간(초)
+        """
+        with self._lock:
+            backoff = min(self.max_backoff, 2.0 ** self._consecutive_429)
+            self._consecutive_429 += 1
+            self._tokens = 0.0
+            self._updated = time.monotonic()
+            self._blocked_until = max(self._blocked_until, self._updated + backoff)
+            return backoff
+
+
+def _shared_slot(index):
+    return property(lambda self: self._state[index],
+                    lambda self, value: self._state.__setitem__(index, value))
+
+
+class SharedTokenBucket(TokenBucket):
+    """
+    여러 프로세스가 하나의 요청 한도를 나눠 쓰는 TokenBucket.
+
+    토큰 수/갱신 시각/차단 시각/연속 429 횟수를 공유 메모리(RawArray)에 두고
+    프로세스 간 Lock으로 보호합니다. 부모 프로세스에서 만든 뒤 worker 프로세스에 인자로 넘겨 사용합니다.
+    (time.monotonic은 같은 머신의 모든 프로세스가 같은 시계를 사용)
+    """
+
+    _tokens = _shared_slot(0)
+    _updated = _shared_slot(1)
+    _blocked_until = _shared_slot(2)
+    _consecutive_429 = _shared_slot(3)
+
+    def __init__(self, rate=UPBIT_REQUESTS_PER_SEC, capacity=None, max_backoff=60.0):
+        self._state = multiprocessing.RawArray('d', 4)
+        self._shared_lock = multiprocessing.Lock()
+        super().__init__(rate, capacity, max_backoff)
+
+    @property
+    def _lock(self):
+        return self._shared_lock
+
+    @_lock.setter
+    def _lock(self, value):
+        pass  # 부모 클래스의 threading.Lock 대신 프로세스 간 Lock을 사용
@@ -1,9 +1,80 @@
 import os
+import sys
 import time
-import requests
+import asyncio
+import multiprocessing
 import pandas as pd
 import cx_Oracle
 from datetime import datetime, timedelta
+from Fetch_Data.Rate_Limiter import TokenBucket, SharedTokenBucket
+from Fetch_Data.Http_Client import get_http_client, backoff_delay
+from Fetch_Data.Market_Universe import MarketUniverse
+from Fetch_Data.Minute_Scheduler import MinuteScheduler
+from Fetch_Data.Concurrent_Fetcher import fetch_markets_concurrently, DEFAULT_MAX_WORKERS
+from Stream_Data.Upbit_Stream import StreamIngestor, UPBIT_WEBSOCKET_URL
+from Manage_DB.Watermark_Cache import WatermarkCache, candles_to_request
+from Manage_DB.Backfill_Planner import run_backfill, create_checkpoint_table
+from Manage_DB.Tiered_Archive import run_archive_job
+from Manage_DB.Candle_Rollup import (CandleRollup, MINUTE_TABLE, TIMEFRAME_MINUTES, create_rollup_tables, floor_time,
+                                     rollup_table_name)
+from Monitor.Ingest_Metrics import IngestMetrics, start_metrics_server, write_sharded_status_file
+
+# 저장소 루트의 공용 Candle_Store 패키지 (대시보드/백테스트와 공유)
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..')))
+from Candle_Store.Candle_Store import append_candles, prune_candles
+from Candle_Events.Candle_Events import CandleEventPublisher
+
+# Upbit API 주소 (벤치마크 시 로컬 Mock 서버 주소로 교체 가능)
+UPBIT_API_URL = os.environ.get("UPBIT_API_URL", "https://api.upbit.com")
+
+# 수집 모드: 'serial'(종목 순차 수집), 'concurrent'(스레드 풀 + 공유 토큰 버킷)
+FETCH_MODE = 'concurrent'
+
+# 수집 방식: 'rest'(분봉 API 폴링), 'websocket'(체결 스트림을 1분봉으로 집계, REST는 누락 구간 보정용),
+#           'sharded'(거래소의 전체 KRW 종목을 SHARD_WORKERS개 프로세스로 나눠 REST 폴링)
+INGEST_MODE = 'rest'
+
+# 수집 주기: 'minute'(분 경계 + settle offset에 한 번, 마감된 분봉만 수집), 'poll'(2초 간격 반복)
+SCHEDULE_MODE = 'minute'
+
+# sharded 모드의 worker 프로세스 수 (모든 worker가 하나의 요청 한도를 공유)
+SHARD_WORKERS = 4
+
+# 한 번의 executemany / commit으로 보내는 최대 행 수 (이력 스트리밍 시 메모리에 두는 chunk 크기)
+UPSERT_CHUNK_SIZE = 5000
+
+# DB에 기록한 분봉을 로컬 컬럼형 저장소(Candle_Store)에도 기록할지 여부
+CANDLE_STORE_ENABLED = True
+
+# API 엔드포인트별 응답 지연(p50/p99) 로그 간격(초)
+HTTP_LATENCY_LOG_SEC = 600
+
+# 종목별 마지막 저장 분봉 시각 (시작 시 한 번 로드, update_db_with_data 커밋 시 전진)
+WATERMARKS = WatermarkCache()
+
+# 5m/15m/1h/1d 롤업 테이블 증분 갱신 여부와 상태 (update_db_with_data가 기록한 분봉 구간을 추적)
+ROLLUP_ENABLED = True
+ROLLUPS = CandleRollup()
+
+# 분봉/롤업 커밋 알림 (대시보드가 폴링하지 않고 알림이 올 때만 지표를 갱신, localhost UDP)
+# (보내는 소켓은 import 시점이 아니라 __main__ / shard worker에서 open_candle_events()로 프로세스마다 하나 만듦)
+CANDLE_EVENTS_ENABLED = True
+CANDLE_EVENTS = None
+
+# 수집 지표: Prometheus 텍스트 엔드포인트(/metrics, /status) 포트(0이면 끔)와 JSON 상태 파일 경로
+# (sharded 모드는 worker마다 포트 METRICS_PORT + 1 + shard 번호, 상태 파일 이름에 shard 번호를 붙이고,
+#  부모 프로세스가 shard 상태를 모아 STATUS_FILE에 기록: 모든 shard가 첫 주기를 마치면 ready)
+METRICS_PORT = int(os.environ.get("EFB_METRICS_PORT", 9108))
+STATUS_FILE = os.environ.get("EFB_STATUS_FILE", os.path.join(os.path.dirname(os.path.abspath(__file__)), "efb_status.json"))
+METRICS = IngestMetrics(WATERMARKS)
+
+def open_candle_events():
+    """
+    현재 프로세스의 분봉 기록 알림 소켓을 만든다. (CANDLE_EVENTS_ENABLED가 False이면 알림을 보내지 않음)
+    """
+    global CANDLE_EVENTS
+    if CANDLE_EVENTS_ENABLED and CANDLE_EVENTS is None:
+        CANDLE_EVENTS = CandleEventPublisher()
 
 # --------------------------------------------------
 #  Oracle DB 연결 설정
@@ -75,77 +146,189 @@ def create_table_if_not_exists(conn):
     finally:
         cursor.close()
 
+    create_rollup_tables(conn)
+
 
 # --------------------------------------------------
-#  20일치(실제로는 20일치) 데이터를 초기 수집
+#  분봉 API 1페이지 요청
+# --------------------------------------------------
+def request_candle_page(url, params, limiter=None):
+    """
+    프로세스 공용 HTTP 클라이언트(연결 재사용, gzip)로 요청한다.
+    429/5xx/네트워크 오류는 클라이언트가 백오프(limiter가 있으면 limiter.penalize()) 후 재시도하며,
+    재시도를 모두 쓴 응답만 돌려받는다. 백오프는 클라이언트만 하므로 호출 측은 그 응답을 실패로 처리한다.
+    limiter(TokenBucket)가 주어지면 시도마다 토큰을 얻고, 응답의 Remaining-Req 헤더로 토큰 수를 맞춘다.
+    """
+    return get_http_client().get(url, params, limiter)
+
+def fetch_candle_page(market, to_time, count, limiter=None):
+    """
+    to_time(UTC) 이전 분봉 count개를 한 번 요청한다 (백필 페이지 단위 수집, 스레드에서 호출 가능).
+    클라이언트가 재시도를 모두 쓴 뒤의 실패(429 포함)는 예외로 알린다. (백필은 페이지를 PENDING으로 남겨 다음 실행에서 다시 수집)
+    """
+    url = f"{UPBIT_API_URL}/v1/candles/minutes/1"
+    params = {
+        'market': market,
+        'count': count,
+        'to': to_time.strftime("%Y-%m-%dT%H:%M:%SZ")
+    }
+    response = request_candle_page(url, params, limiter)
+    if response.status_code != 200:
+        raise RuntimeError(f"API 요청 실패: {response.status_code} - {response.text}")
+    batch = pd.DataFrame(response.json())
+    if batch.empty:
+        return batch
+    return batch[[
+        'candle_date_time_utc', 'candle_date_time_kst',
+        'opening_price', 'high_price', 'low_price', 'trade_price',
+        'candle_acc_trade_price', 'candle_acc_trade_volume'
+    ]]
+
+# --------------------------------------------------
+#  분봉 페이지 스트리밍 (최신 -> 과거)
 # --------------------------------------------------
-def fetch_20days_data(market):
-    data = pd.DataFrame()
-    # 본 코드에서는 end_time을 한국 시간(now)으로 사용하지만,
-    # UTC로 쓰고 싶으면 datetime.utcnow()로 바꿀 수 있음
-    end_time = datetime.now()
-    target_time = end_time - timedelta(days=20)
+CANDLE_COLUMNS = [
+    'candle_date_time_utc', 'candle_date_time_kst',
+    'opening_price', 'high_price', 'low_price', 'trade_price',
+    'candle_acc_trade_price', 'candle_acc_trade_volume'
+]
+
+def closed_minute_boundary(now_utc=None):
+    """
+    마지막으로 마감된 분봉의 끝 시각 (tz 정보 없는 UTC, 초/마이크로초 0).
+    분봉 API 'to'(이 시각 이전 분봉부터, 미포함)에 넣으면 진행 중인 분봉을 받지 않는다.
+    (분 경계 스케줄러, 백필 계획과 같은 기준)
+    """
+    return (now_utc or datetime.utcnow()).replace(second=0, microsecond=0)
+
+def iter_candle_pages(market, target_time, limiter=None, first_count=200, end_time=None):
+    """
+    end_time(기본: 마지막으로 마감된 분, UTC)부터 과거로 target_time까지 분봉 페이지를 하나씩 yield한다 (최신 페이지부터).
+    페이지마다 필요한 컬럼만 남기고, 앞 페이지와 겹치는 시각은 제외하므로
+    중복 제거를 위해 지금까지 받은 이력 전체를 메모리에 들고 있지 않는다.
+
+    Parameters:
+    target_time (datetime): 이 시각(UTC) 이하의 분봉이 포함된 페이지까지 받고 멈춤
+    first_count (int): 첫 페이지 요청 개수 (이후 페이지는 200)
+    end_time (datetime, optional): 첫 요청의 'to' (UTC, 이 시각 이전 분봉부터 받음)
+    """
+    end_time = end_time or closed_minute_boundary()
+    count = first_count
+    oldest_sent = None  # 이미 yield한 가장 과거 시각(문자열)
+    errors = 0  # 연속 오류 횟수 (백오프 대기 계산용)
 
     while True:
         try:
-            url = "https://api.upbit.com/v1/candles/minutes/1"
+            url = f"{UPBIT_API_URL}/v1/candles/minutes/1"
             params = {
                 'market': market,
-                'count': 200,
+                'count': count,
                 'to': end_time.strftime("%Y-%m-%dT%H:%M:%SZ")
             }
-            response = requests.get(url, params=params)
+            response = request_candle_page(url, params, limiter)
 
             if response.status_code == 200:
                 batch = pd.DataFrame(response.json())
                 if batch.empty:
-                    break
-
-                # 중복 제거
-                data = pd.concat([data, batch], ignore_index=True)
-                data.drop_duplicates(subset=['candle_date_time_utc'], inplace=True)
+                    return
 
+                batch = batch[CANDLE_COLUMNS]
                 # batch 중 가장 과거 시각
                 min_str = batch['candle_date_time_utc'].min()
-                min_time = datetime.strptime(min_str, "%Y-%m-%dT%H:%M:%S")
+                if oldest_sent is not None:
+                    batch = batch[batch['candle_date_time_utc'] < oldest_sent]
+                errors = 0
+                if not batch.empty:
+                    yield batch
+                oldest_sent = min_str if oldest_sent is None else min(oldest_sent, min_str)
 
                 # end_time을 더 과거로 조정하며 반복
-                end_time = min_time
+                end_time = datetime.strptime(min_str, "%Y-%m-%dT%H:%M:%S")
+                count = 200
 
-                # 20일 전까지 과거로 내려갔으면 stop
+                # target_time까지 과거로 내려갔으면 stop
                 if end_time <= target_time:
-                    break
-            elif response.status_code == 429:
-                print("[WARN] Too many requests. Waiting for 1 minute...")
-                time.sleep(60)
+                    return
             else:
+                # 429/5xx는 클라이언트가 이미 백오프하며 재시도를 모두 쓴 응답 (다음 수집 주기/백필에서 다시 수집)
                 print(f"[ERROR] API 요청 실패: {response.status_code} - {response.text}")
-                break
+                return
 
-            time.sleep(0.5)
+            # 공유 limiter가 없을 때만 고정 대기
+            if limiter is None:
+                time.sleep(0.5)
         except Exception as e:
-            print(f"[ERROR] 오류 발생: {e}")
-            time.sleep(60)
+            delay = backoff_delay(errors)
+            errors += 1
+            print(f"[ERROR] 오류 발생: {e} ({delay:.1f}초 후 재시도)")
+            time.sleep(delay)
 
-    if not data.empty:
-        data = data[[
-            'candle_date_time_utc', 'candle_date_time_kst',
-            'opening_price', 'high_price', 'low_price', 'trade_price',
-            'candle_acc_trade_price', 'candle_acc_trade_volume'
-        ]]
+def write_pages_in_chunks(pages, write_func, chunk_size=UPSERT_CHUNK_SIZE):
+    """
+    페이지를 chunk_size 행 이상 모일 때마다 write_func(DataFrame)로 기록한다.
+    메모리에는 chunk 하나 분량만 남는다.
 
-    return data
+    Returns:
+    int: write_func가 반환한 기록 행 수의 합
+    """
+    written = 0
+    buffer = []
+    buffered = 0
+    for page in pages:
+        buffer.append(page)
+        buffered += len(page)
+        if buffered >= chunk_size:
+            written += write_func(pd.concat(buffer, ignore_index=True))
+            buffer = []
+            buffered = 0
+    if buffer:
+        written += write_func(pd.concat(buffer, ignore_index=True))
+    return written
+
+# --------------------------------------------------
+#  20일치(실제로는 20일치) 데이터를 초기 수집
+# --------------------------------------------------
+def fetch_20days_data(market, limiter=None, days=20):
+    """
+    최근 days일 분봉을 DataFrame 하나로 반환 (페이지를 마지막에 한 번만 합침).
+    DB에 바로 기록할 때는 메모리를 일정하게 쓰는 stream_history_to_db를 사용.
+    """
+    # API의 'to'와 candle_date_time_utc가 UTC이므로 양 끝 모두 UTC 기준 (진행 중인 분봉 제외)
+    end_time = closed_minute_boundary()
+    target_time = end_time - timedelta(days=days)
+    pages = list(iter_candle_pages(market, target_time, limiter, end_time=end_time))
+    if not pages:
+        return pd.DataFrame()
+    return pd.concat(pages, ignore_index=True)
+
+def stream_history_to_db(conn, market, limiter=None, days=20, chunk_size=UPSERT_CHUNK_SIZE):
+    """
+    최근 days일 분봉을 페이지 수집 -> 정규화 -> chunk 기록 파이프라인으로 저장한다.
+    이력 길이와 관계없이 메모리 사용량이 일정하므로 수개월 백필에도 사용할 수 있다.
+
+    Returns:
+    int: 기록한 행 수
+    """
+    # run_backfill과 같이 양 끝 모두 UTC 기준 (진행 중인 분봉은 기록하지 않음)
+    end_time = closed_minute_boundary()
+    target_time = end_time - timedelta(days=days)
+    return write_pages_in_chunks(
+        iter_candle_pages(market, target_time, limiter, end_time=end_time),
+        lambda data: update_db_with_data(conn, data, market, chunk_size),
+        chunk_size,
+    )
 
 # --------------------------------------------------
 #  DB 내 '가장 최근 시각' 이후 분봉만 가져오는 함수 (누락 데이터 수집)
 # --------------------------------------------------
-def fetch_incremental_data(conn, market):
+def get_last_candle_time(conn, market):
     """
-    - DB에서 해당 market의 가장 최근 candle_date_time_utc를 찾음
-    - DB가 비어있다면(fetch_20days_data로) 초기 20일치 수집
-    - DB가 비어있지 않다면, 그 '마지막 시각' 이후 데이터를 모두 가져옴
+    해당 market의 가장 최근 candle_date_time_utc (없으면 None)
+    WATERMARKS가 로드되어 있으면 DB 조회 없이 캐시 값을 사용한다.
     """
-    # 1) DB에서 가장 최근 시각 확인
+    if WATERMARKS.loaded:
+        return WATERMARKS.get(market)
+
     cursor = conn.cursor()
     cursor.execute("""
         SELECT MAX(candle_date_time_utc)
@@ -155,197 +338,504 @@ def fetch_incremental_data(conn, market):
     row = cursor.fetchone()
     cursor.close()
 
-    last_time = row[0]  # None or datetime 객체
+    return row[0]  # None or datetime 객체
 
+def fetch_incremental_data(conn, market, limiter=None, end_time=None):
+    """
+    - DB에서 해당 market의 가장 최근 candle_date_time_utc를 찾음
+    - DB가 비어있다면(fetch_20days_data로) 초기 20일치 수집
+    - DB가 비어있지 않다면, 그 '마지막 시각' 이후 데이터를 모두 가져옴
+    """
+    # 1) DB에서 가장 최근 시각 확인
+    last_time = get_last_candle_time(conn, market)
+    return fetch_data_since(market, last_time, limiter, end_time)
+
+def fetch_data_since(market, last_time, limiter=None, end_time=None):
+    """
+    last_time 이후의 분봉을 API에서 수집 (DB 접근 없음, 스레드에서 호출 가능)
+    end_time(UTC 분 경계, 기본: 마지막으로 마감된 분)보다 이전에 마감된 분봉까지만 받는다 (진행 중인 분봉 제외).
+    """
     # 2) DB에 해당 market 데이터가 없으면 -> 초기 20일치
     if last_time is None:
         print(f"[INFO] {market} 데이터가 DB에 없어, 20일치 데이터를 수집합니다.")
-        return fetch_20days_data(market)
+        return fetch_20days_data(market, limiter)
 
     # 3) DB에 데이터가 있으면 -> last_time 이후부터 현재까지 수집
-    data = pd.DataFrame()
-    end_time = datetime.now()
-    target_time = last_time  # last_time 이후분이 필요
-
-    while True:
-        try:
-            url = "https://api.upbit.com/v1/candles/minutes/1"
-            params = {
-                'market': market,
-                'count': 200,
-                'to': end_time.strftime("%Y-%m-%dT%H:%M:%SZ")
-            }
-            response = requests.get(url, params=params)
-
-            if response.status_code == 200:
-                batch = pd.DataFrame(response.json())
-                if batch.empty:
-                    break
-
-                # batch 내 가장 과거 시각(문자열)
-                min_str = batch['candle_date_time_utc'].min()
-                min_time = datetime.strptime(min_str, "%Y-%m-%dT%H:%M:%S")
-
-                # last_time 이후만 필터링 (★ 오탈자 수정)
-                batch = batch[
-                    batch['candle_date_time_utc'] > last_time.strftime("%Y-%m-%dT%H:%M:%S")
-                ]
-                data = pd.concat([data, batch], ignore_index=True)
-
-                # end_time을 더 과거로 이동
-                end_time = min_time
-
-                # target_time(=last_time) 이전이면 stop
-                if end_time <= target_time:
-                    break
-            elif response.status_code == 429:
-                print("[WARN] Too many requests. Waiting for 1 minute...")
-                time.sleep(60)
-            else:
-                print(f"[ERROR] API 요청 실패: {response.status_code} - {response.text}")
-                break
-
-            time.sleep(0.5)
-        except Exception as e:
-            print(f"[ERROR] 오류 발생: {e}")
-            time.sleep(60)
-
-    if not data.empty:
-        data.drop_duplicates(subset=['candle_date_time_utc'], inplace=True)
-        data = data[[
-            'candle_date_time_utc', 'candle_date_time_kst',
-            'opening_price', 'high_price', 'low_price', 'trade_price',
-            'candle_acc_trade_price', 'candle_acc_trade_volume'
-        ]]
-
-    return data
+    # 첫 페이지는 last_time까지 필요한 개수만 요청 (1분 차이면 200개 대신 2개)
+    last_str = last_time.strftime("%Y-%m-%dT%H:%M:%S")
+    pages = []
+    end_time = end_time or closed_minute_boundary()
+    first_count = candles_to_request(last_time, end_time - timedelta(minutes=1))
+    for batch in iter_candle_pages(market, last_time, limiter, first_count, end_time):
+        # last_time 이후만 필터링
+        batch = batch[batch['candle_date_time_utc'] > last_str]
+        if not batch.empty:
+            pages.append(batch)
+
+    if not pages:
+        return pd.DataFrame()
+    return pd.concat(pages, ignore_index=True)
 
 
 # --------------------------------------------------
 #  DB에 데이터 (MERGE) 업데이트
 # --------------------------------------------------
-def update_db_with_data(conn, data, market):
-    cursor = conn.cursor()
+def build_upsert_rows(data, market):
+    """
+    API 응답 DataFrame을 MERGE 위치 바인딩 행(tuple) 목록으로 변환한다.
+    시각 문자열은 페이지 전체를 한 번에(벡터화) 파싱한다.
+    """
+    utc_times = pd.to_datetime(data['candle_date_time_utc'], format="%Y-%m-%dT%H:%M:%S")
+    kst_times = pd.to_datetime(data['candle_date_time_kst'], format="%Y-%m-%dT%H:%M:%S")
+    columns = [
+        [market] * len(data),
+        list(utc_times.dt.to_pydatetime()),
+        list(kst_times.dt.to_pydatetime()),
+        data['opening_price'].astype(float).tolist(),
+        data['high_price'].astype(float).tolist(),
+        data['low_price'].astype(float).tolist(),
+        data['trade_price'].astype(float).tolist(),
+        data['candle_acc_trade_volume'].astype(float).tolist(),  # volume
+        data['candle_acc_trade_price'].astype(float).tolist(),
+        data['candle_acc_trade_volume'].astype(float).tolist(),
+    ]
+    return list(zip(*columns))
+
+def update_db_with_data(conn, data, market, chunk_size=UPSERT_CHUNK_SIZE):
+    """
+    MERGE를 배열 바인딩(executemany + batcherrors)으로 chunk_size 행씩 실행하고 chunk마다 커밋한다.
+    무결성 오류 등은 행 단위로 보고되며 나머지 행의 저장은 계속된다.
+    CANDLE_STORE_ENABLED이면 커밋된 분봉만 로컬 컬럼형 저장소(Candle_Store)에도 기록한다.
+
+    Returns:
+    int: 오류 없이 반영된 행 수
+    """
+    if data.empty:
+        return 0
+
+    # 각 바인드 변수를 한 번씩만 사용해 위치 바인딩(tuple) 가능하게 구성
     query = """
     MERGE INTO upbit_minute_data d
-    USING (SELECT :market AS market, :timestamp AS timestamp FROM dual) s
-    ON (d.market = s.market AND d.candle_date_time_utc = s.timestamp)
+    USING (SELECT :1 AS market, :2 AS candle_date_time_utc, :3 AS candle_date_time_kst,
+                  :4 AS opening_price, :5 AS high_price, :6 AS low_price, :7 AS trade_price,
+                  :8 AS volume, :9 AS candle_acc_trade_price, :10 AS candle_acc_trade_volume
+             FROM dual) s
+    ON (d.market = s.market AND d.candle_date_time_utc = s.candle_date_time_utc)
     WHEN MATCHED THEN
-        UPDATE SET opening_price = :opening_price,
-                   high_price = :high_price,
-                   low_price = :low_price,
-                   trade_price = :trade_price,
-                   volume = :volume,
-                   candle_acc_trade_price = :candle_acc_trade_price,
-                   candle_acc_trade_volume = :candle_acc_trade_volume
+        UPDATE SET opening_price = s.opening_price,
+                   high_price = s.high_price,
+                   low_price = s.low_price,
+                   trade_price = s.trade_price,
+                   volume = s.volume,
+                   candle_acc_trade_price = s.candle_acc_trade_price,
+                   candle_acc_trade_volume = s.candle_acc_trade_volume
     WHEN NOT MATCHED THEN
         INSERT (market, candle_date_time_utc, candle_date_time_kst, opening_price, high_price, low_price, trade_price, volume, candle_acc_trade_price, candle_acc_trade_volume)
-        VALUES (:market, :timestamp, :kst_time, :opening_price, :high_price, :low_price, :trade_price, :volume, :candle_acc_trade_price, :candle_acc_trade_volume)
+        VALUES (s.market, s.candle_date_time_utc, s.candle_date_time_kst, s.opening_price, s.high_price, s.low_price, s.trade_price, s.volume, s.candle_acc_trade_price, s.candle_acc_trade_volume)
     """
-    for _, row in data.iterrows():
+    rows = build_upsert_rows(data, market)
+    written = 0
+    committed_positions = []  # 커밋된 행의 data 내 위치 (rows와 data는 같은 순서)
+
+    cursor = conn.cursor()
+    try:
+        cursor.setinputsizes(50, cx_Oracle.TIMESTAMP, cx_Oracle.TIMESTAMP, *([cx_Oracle.NUMBER] * 7))
+        for start in range(0, len(rows), chunk_size):
+            chunk = rows[start:start + chunk_size]
+            chunk_start = time.perf_counter()
+            cursor.executemany(query, chunk, batcherrors=True)
+            errors = cursor.getbatcherrors()
+            for error in errors:
+                bad_row = chunk[error.offset]
+                print(f"[ERROR] 데이터 삽입 중 오류 ({market} {bad_row[1]}): {error.message}")
+            conn.commit()
+            written += len(chunk) - len(errors)
+            METRICS.record_upsert(len(chunk) - len(errors), len(errors), time.perf_counter() - chunk_start)
+
+            # 커밋된 행으로 종목 워터마크 전진
+            failed = {error.offset for error in errors}
+            committed_times = [row[1] for i, row in enumerate(chunk) if i not in failed]
+            committed_positions.extend(start + i for i in range(len(chunk)) if i not in failed)
+            if committed_times:
+                WATERMARKS.advance(market, max(committed_times))
+                ROLLUPS.mark_written(min(committed_times))
+                if CANDLE_EVENTS is not None:
+                    CANDLE_EVENTS.publish(MINUTE_TABLE, market, max(committed_times))
+    finally:
+        cursor.close()
+
+    if CANDLE_STORE_ENABLED and committed_positions:
         try:
-            utc_time = datetime.strptime(row['candle_date_time_utc'], "%Y-%m-%dT%H:%M:%S")
-            kst_time = datetime.strptime(row['candle_date_time_kst'], "%Y-%m-%dT%H:%M:%S")
-            cursor.execute(query, {
-                'market': market,
-                'timestamp': utc_time,
-                'kst_time': kst_time,
-                'opening_price': row['opening_price'],
-                'high_price': row['high_price'],
-                'low_price': row['low_price'],
-                'trade_price': row['trade_price'],
-                'volume': row['candle_acc_trade_volume'],
-                'candle_acc_trade_price': row['candle_acc_trade_price'],
-                'candle_acc_trade_volume': row['candle_acc_trade_volume'],
-            })
-        except cx_Oracle.IntegrityError as e:
-            print(f"[ERROR] 데이터 삽입 중 무결성 제약 조건 위배: {e}")
-    conn.commit()
-    cursor.close()
+            append_candles(market, data.iloc[committed_positions])
+        except OSError as e:
+            # 로컬 저장소는 DB의 보조 사본이므로 기록 실패가 DB 수집을 멈추지 않게 함
+            print(f"[WARN] {market} 로컬 분봉 저장소 기록 실패: {e}")
+
+    return written
 
 # --------------------------------------------------
-#  20일 이상 지난 데이터는 Archive로 이동
+#  롤업 테이블(5m/15m/1h/1d) 증분 갱신
 # --------------------------------------------------
-def archive_old_data(conn):
-    cursor = conn.cursor()
-    cutoff_time = (datetime.now() - timedelta(days=20)).strftime("%Y-%m-%d %H:%M:%S")
+def update_rollups(conn, markets=None):
+    """
+    현재 시각(UTC) 기준으로 마감된 봉 중 새로 마감되었거나 새 분봉이 기록된 봉만 다시 합쳐 MERGE한다.
+    롤업 실패는 분봉 수집을 멈추지 않으며, 다음 주기에 같은 구간부터 다시 시도한다.
+    """
+    if not ROLLUP_ENABLED:
+        return
+    closed_until = datetime.utcnow().replace(second=0, microsecond=0)
+    try:
+        merged = ROLLUPS.update(conn, closed_until, markets)
+        if merged:
+            print(f"[INFO] 롤업 갱신: {merged}")
+            if CANDLE_EVENTS is not None:
+                for timeframe, count in merged.items():
+                    if not count:
+                        continue
+                    # 마지막으로 마감된 봉의 시작 시각까지 커밋됨
+                    minutes = TIMEFRAME_MINUTES[timeframe]
+                    last_closed = floor_time(closed_until, minutes) - timedelta(minutes=minutes)
+                    for market in markets or [None]:
+                        CANDLE_EVENTS.publish(rollup_table_name(timeframe), market, last_closed)
+    except cx_Oracle.DatabaseError as e:
+        print(f"[ERROR] 롤업 갱신 실패: {e}")
+
+# --------------------------------------------------
+#  20일 이상 지난 데이터는 Archive로 이동 (하루 단위, 날짜가 바뀔 때 한 번)
+# --------------------------------------------------
+# 마지막으로 보관 작업을 실행한 UTC 날짜
+_last_archive_day = None
 
-    archive_query = """
-    INSERT INTO upbit_minute_data_archive (market, candle_date_time_utc, candle_date_time_kst,
-        opening_price, high_price, low_price, trade_price, volume,
-        candle_acc_trade_price, candle_acc_trade_volume)
-    SELECT market, candle_date_time_utc, candle_date_time_kst,
-           opening_price, high_price, low_price, trade_price, volume,
-           candle_acc_trade_price, candle_acc_trade_volume
-      FROM upbit_minute_data
-     WHERE candle_date_time_utc < TO_TIMESTAMP(:cutoff_time, 'YYYY-MM-DD HH24:MI:SS')
+def archive_old_data(conn):
+    """
+    수집 주기마다 호출되지만, 시작 후 처음과 UTC 날짜가 바뀌었을 때만 보관 작업을 실행한다.
+    (20일 지난 날은 archive 테이블로, 60일 지난 날은 압축 cold 파일로 하루 단위 이동,
+     로컬 분봉 저장소는 같은 20일보다 오래된 날 파일을 삭제)
     """
-    cursor.execute(archive_query, {'cutoff_time': cutoff_time})
+    global _last_archive_day
+    today = datetime.utcnow().date()
+    if _last_archive_day == today:
+        return
+    archive_start = time.perf_counter()
+    run_archive_job(conn)
+    METRICS.record_archive(time.perf_counter() - archive_start)
+    if CANDLE_STORE_ENABLED:
+        try:
+            removed = prune_candles()
+            if removed:
+                print(f"[INFO] 로컬 분봉 저장소: 보관 기간이 지난 파일 {removed}개 삭제")
+        except OSError as e:
+            print(f"[WARN] 로컬 분봉 저장소 정리 실패: {e}")
+    _last_archive_day = today
 
-    delete_query = """
-    DELETE FROM upbit_minute_data
-     WHERE candle_date_time_utc < TO_TIMESTAMP(:cutoff_time, 'YYYY-MM-DD HH24:MI:SS')
+# --------------------------------------------------
+#  수집 주기 지표 / 상태 파일
+# --------------------------------------------------
+def report_cycle(elapsed, status_file=STATUS_FILE):
+    """
+    수집 주기 1회 완료를 지표에 반영하고 상태 파일을 갱신한다. (첫 호출 후 상태 파일의 ready = true)
     """
-    cursor.execute(delete_query, {'cutoff_time': cutoff_time})
+    METRICS.cycle_done(elapsed)
+    try:
+        METRICS.write_status_file(status_file)
+    except OSError as e:
+        print(f"[WARN] 상태 파일 기록 실패: {e}")
 
-    conn.commit()
-    cursor.close()
+def shard_status_file(shard_index, status_file=STATUS_FILE):
+    base, ext = os.path.splitext(status_file)
+    return f"{base}.shard{shard_index}{ext}"
 
 # --------------------------------------------------
-#  초기 데이터 수집 (최초 1회)
+#  초기 데이터 수집 / 누락 구간 백필 (실행할 때마다)
 # --------------------------------------------------
-def initialize_db(conn, markets):
+def initialize_db(conn, markets, max_workers=DEFAULT_MAX_WORKERS, limiter=None):
     """
-    db_initialized.flag 파일이 없으면(최초 실행이라면) 20일치 데이터를 수집/저장
+    테이블이 없으면 생성하고, 최근 20일 중 DB(현재 + archive)에 비어 있는 분 구간을 채운다.
+    db_initialized.flag 대신 DB의 실제 데이터로 판단하므로 테이블을 지우고 다시 실행해도 되고,
+    중단된 백필은 BACKFILL_CHECKPOINT에 남은 페이지부터 이어서 수집한다.
     """
-    if os.path.exists("db_initialized.flag"):
-        print("[INFO] DB 초기화 작업은 이미 완료되었습니다. 건너뜁니다.")
-        return
-
-    print("[INFO] 초기 데이터 수집 시작...")
+    print("[INFO] 누락 구간 백필 시작...")
     create_table_if_not_exists(conn)  # 테이블이 없으면 생성
 
-    for market in markets:
-        data = fetch_20days_data(market)
-        if not data.empty:
-            update_db_with_data(conn, data, market)
-
-    open("db_initialized.flag", "w").close()
-    print("[INFO] 초기 데이터 저장 완료.")
+    limiter = limiter or TokenBucket()
+    run_backfill(
+        conn, markets,
+        fetch_page=lambda market, to_time, count: fetch_candle_page(market, to_time, count, limiter),
+        write_func=lambda market, data: update_db_with_data(conn, data, market),
+        max_workers=max_workers,
+    )
 
 # --------------------------------------------------
 #  프로그램 동작 중 (또는 재실행 시) 누락된 데이터만 채우기
 # --------------------------------------------------
-def update_db_periodically(conn, markets):
-    while True:
-        print(f"[{datetime.now()}] 데이터 업데이트 시작...")
+def fetch_all_markets_concurrently(conn, markets, limiter, max_workers=DEFAULT_MAX_WORKERS, end_time=None):
+    """
+    DB 조회/저장은 메인 스레드에서 순차로, API 수집만 스레드 풀에서 동시에 수행한다.
+    모든 스레드는 하나의 TokenBucket(limiter)을 공유한다.
+    """
+    get_http_client(max_workers)  # 연결 풀을 스레드 수에 맞춤
+    last_times = {market: get_last_candle_time(conn, market) for market in markets}
+    fetch_func = lambda market: fetch_data_since(market, last_times[market], limiter, end_time)
+    return fetch_markets_concurrently(fetch_func, markets, max_workers)
+
+def update_db_once(conn, markets, limiter, fetch_mode=FETCH_MODE, max_workers=DEFAULT_MAX_WORKERS, end_time=None):
+    """
+    markets의 마지막 저장 시각 이후 분봉을 한 번 수집/저장한다.
+    end_time이 주어지면 그 이전에 마감된 분봉까지만 수집한다.
+    """
+    cycle_start = time.monotonic()
+    # DB에 이력이 없는 종목은 20일치를 메모리에 모으지 않고 chunk 단위로 바로 저장
+    for market in markets:
+        if get_last_candle_time(conn, market) is None:
+            print(f"[INFO] {market} 데이터가 DB에 없어, 20일치 데이터를 수집합니다.")
+            stream_history_to_db(conn, market, limiter)
+    if fetch_mode == 'concurrent':
+        results = fetch_all_markets_concurrently(conn, markets, limiter, max_workers, end_time)
+        for market in markets:
+            data = results.get(market)
+            if data is not None and not data.empty:
+                update_db_with_data(conn, data, market)
+    else:
         for market in markets:
             # '가장 최근 시각' 이후의 모든 분봉을 수집
-            data = fetch_incremental_data(conn, market)
+            data = fetch_incremental_data(conn, market, end_time=end_time)
             if not data.empty:
                 update_db_with_data(conn, data, market)
+    print(f"[INFO] {len(markets)}개 종목 수집/저장 소요 시간: {time.monotonic() - cycle_start:.2f}초 ({fetch_mode})")
+
+def update_closed_minute(conn, markets, closed_minute, scheduler, limiter,
+                         fetch_mode=FETCH_MODE, max_workers=DEFAULT_MAX_WORKERS):
+    """
+    방금 마감된 분(closed_minute)까지의 분봉을 수집한다.
+    거래소가 아직 발행하지 않은 종목만 scheduler의 백오프에 따라 다시 요청한다.
+    (거래가 없던 종목은 분봉이 생기지 않으므로 재시도 후에도 남을 수 있으며, 다음 분에 함께 수집됨)
+    """
+    boundary = closed_minute + timedelta(minutes=1)
+
+    def fetch_missing(pending):
+        update_db_once(conn, pending, limiter, fetch_mode, max_workers, end_time=boundary)
+        return [market for market in pending
+                if (get_last_candle_time(conn, market) or datetime.min) < closed_minute]
+
+    missing, attempts = scheduler.collect(markets, fetch_missing)
+    print(f"[INFO] {closed_minute} (UTC) 분봉 수집: 시도 {attempts}회, 미발행 {len(missing)}개 종목, "
+          f"다음 offset {scheduler.offset:.1f}초")
+
+def run_update_cycle(conn, markets, limiter, scheduler=None,
+                     fetch_mode=FETCH_MODE, max_workers=DEFAULT_MAX_WORKERS):
+    """
+    수집 1주기. scheduler가 있으면 다음 분 마감까지 기다렸다가 마감된 분봉만 수집하고,
+    없으면(SCHEDULE_MODE='poll') 바로 수집 후 2초 대기한다.
+
+    Returns:
+    float: 수집에 걸린 시간(초, 대기 시간 제외)
+    """
+    if scheduler is None:
+        cycle_start = time.monotonic()
+        update_db_once(conn, markets, limiter, fetch_mode, max_workers)
+        elapsed = time.monotonic() - cycle_start
+        time.sleep(2)
+    else:
+        closed_minute = scheduler.wait_next_minute()
+        cycle_start = time.monotonic()
+        update_closed_minute(conn, markets, closed_minute, scheduler, limiter, fetch_mode, max_workers)
+        elapsed = time.monotonic() - cycle_start
+    return elapsed
+
+_last_latency_log = None
+
+def log_http_latency():
+    """
+    HTTP_LATENCY_LOG_SEC마다 API 엔드포인트별 요청 수와 응답 지연(p50/p99), 재시도 횟수를 출력한다.
+    """
+    global _last_latency_log
+    now = time.monotonic()
+    if _last_latency_log is not None and now - _last_latency_log < HTTP_LATENCY_LOG_SEC:
+        return
+    _last_latency_log = now
+
+    client = get_http_client()
+    api = client.snapshot()
+    for endpoint, stats in client.latency_summary(api).items():
+        print(f"[INFO] {endpoint}: {stats['count']}회, 평균 {stats['avg_ms']:.0f}ms, "
+              f"p50 <= {stats['p50_ms']}ms, p99 <= {stats['p99_ms']}ms")
+    print(f"[INFO] 재시도 횟수: {api['retry_counts']}")
+
+def update_db_periodically(conn, markets, fetch_mode=FETCH_MODE, max_workers=DEFAULT_MAX_WORKERS,
+                           schedule=SCHEDULE_MODE):
+    limiter = TokenBucket()
+    scheduler = MinuteScheduler() if schedule == 'minute' else None
+    # 종목별 MAX(candle_date_time_utc)를 한 번의 GROUP BY로 로드 (이후 루프에서는 DB 조회 없음)
+    WATERMARKS.load(conn)
+    ROLLUPS.load(conn)
+    while True:
+        print(f"[{datetime.now()}] 데이터 업데이트 시작...")
+        elapsed = run_update_cycle(conn, markets, limiter, scheduler, fetch_mode, max_workers)
+        update_rollups(conn)
 
         # 20일 이상 지난 데이터는 archive로 이동
         archive_old_data(conn)
+        log_http_latency()
+        report_cycle(elapsed)
 
         print(f"[{datetime.now()}] 데이터 업데이트 완료. 다음 업데이트까지 대기 중...")
-        time.sleep(2)
 
 # --------------------------------------------------
-#  메인 함수
+#  전체 KRW 종목을 여러 프로세스로 나눠 수집
 # --------------------------------------------------
-if __name__=="__main__":
-    markets = ["KRW-BTC", "KRW-XRP", "KRW-ETH", "KRW-ETC"]
-    conn = get_db_connection()
+def run_shard_worker(shard_index, shard_count, limiter, fetch_mode=FETCH_MODE, max_workers=DEFAULT_MAX_WORKERS):
+    """
+    shard_index번 worker 프로세스. 종목 목록 중 자기 shard의 종목만 백필/수집/저장하며,
+    UNIVERSE_REFRESH_SEC마다 목록을 다시 조회해 신규 상장 종목은 추가하고 상장 폐지 종목은 뺀다.
+    archive 이동은 shard 0만 수행한다.
 
+    Parameters:
+    limiter (SharedTokenBucket): 모든 worker가 공유하는 요청 제한기
+    """
+    conn = get_db_connection()
+    universe = MarketUniverse(UPBIT_API_URL, shard_index, shard_count)
+    if METRICS_PORT:
+        start_metrics_server(METRICS, METRICS_PORT + 1 + shard_index)
+    open_candle_events()
+    status_file = shard_status_file(shard_index)
+    scheduler = MinuteScheduler() if SCHEDULE_MODE == 'minute' else None
     try:
-        # 1) 최초 실행 시, DB가 없다면 생성 & 20일치 데이터 수집
-        initialize_db(conn, markets)
-        # 2) 그 후에는 주기적으로 DB에 누락분만 채우는 루프
-        update_db_periodically(conn, markets)
+        markets, _, _ = universe.current(time.monotonic())
+        print(f"[INFO] shard {shard_index}/{shard_count}: {len(markets)}개 종목 담당")
+        initialize_db(conn, markets, max_workers, limiter)
+        WATERMARKS.load(conn)
+        ROLLUPS.load(conn)
+
+        while True:
+            markets, added, removed = universe.current(time.monotonic())
+            if added:
+                print(f"[INFO] shard {shard_index}: 신규 종목 추가 {sorted(added)}")
+            if removed:
+                print(f"[INFO] shard {shard_index}: 종목 제외 {sorted(removed)}")
+                for market in removed:
+                    WATERMARKS.forget(market)
+
+            elapsed = run_update_cycle(conn, markets, limiter, scheduler, fetch_mode, max_workers)
+            update_rollups(conn, markets)
+            if shard_index == 0:
+                archive_old_data(conn)
+            log_http_latency()
+            report_cycle(elapsed, status_file)
     except KeyboardInterrupt:
-        print("프로그램 종료.")
-    except Exception as e:
-        print(f"[ERROR] 프로그램 실행 중 오류 발생: {e}")
+        pass
+    finally:
+        conn.close()
+
+def run_sharded_ingestion(worker_count=SHARD_WORKERS, fetch_mode=FETCH_MODE, max_workers=DEFAULT_MAX_WORKERS):
+    """
+    worker_count개 프로세스를 시작하고, 종료된 worker는 다시 시작한다.
+    테이블 생성은 worker끼리 경합하지 않도록 부모 프로세스에서 먼저 수행한다.
+    5초마다 shard 상태 파일을 모아 STATUS_FILE에 기록한다. (실행기는 이 파일의 ready를 기다림)
+    """
+    started_at = time.time()
+    conn = get_db_connection()
+    try:
+        create_table_if_not_exists(conn)
+        create_checkpoint_table(conn)
     finally:
         conn.close()
+
+    limiter = SharedTokenBucket()
+    workers = {}
+
+    def start_worker(shard_index):
+        process = multiprocessing.Process(
+            target=run_shard_worker,
+            args=(shard_index, worker_count, limiter, fetch_mode, max_workers),
+            name=f"EFB-shard-{shard_index}",
+            daemon=True,
+        )
+        process.start()
+        workers[shard_index] = process
+
+    for shard_index in range(worker_count):
+        start_worker(shard_index)
+
+    try:
+        while True:
+            time.sleep(5)
+            try:
+                write_sharded_status_file(
+                    STATUS_FILE, [shard_status_file(shard_index) for shard_index in range(worker_count)], started_at
+                )
+            except OSError as e:
+                print(f"[WARN] 상태 파일 기록 실패: {e}")
+            for shard_index, process in list(workers.items()):
+                if not process.is_alive():
+                    print(f"[WARN] shard {shard_index} worker 종료(exit code {process.exitcode}). 다시 시작합니다.")
+                    start_worker(shard_index)
+    finally:
+        for process in workers.values():
+            process.terminate()
+        for process in workers.values():
+            process.join()
+
+# --------------------------------------------------
+#  체결 WebSocket 스트림으로 1분봉 수집
+# --------------------------------------------------
+def run_websocket_ingestion(conn, markets, url=UPBIT_WEBSOCKET_URL):
+    """
+    체결 스트림을 메모리에서 1분봉으로 집계하여 분마다 한 번 upbit_minute_data에 기록한다.
+    시작/재연결 시 스트림으로 받지 못한 구간은 REST 분봉 API로 보정한다.
+    """
+    limiter = TokenBucket()
+    WATERMARKS.load(conn)
+    ROLLUPS.load(conn)
+
+    def write(market, data):
+        return update_db_with_data(conn, data, market)
+
+    def repair(since):
+        for market in markets:
+            if since is None:
+                data = fetch_incremental_data(conn, market, limiter)
+            else:
+                data = fetch_data_since(market, since, limiter)
+            if not data.empty:
+                update_db_with_data(conn, data, market)
+        print(f"[INFO] REST 누락 구간 보정 완료 (since={since})")
+
+    def after_flush():
+        update_rollups(conn)
+        archive_old_data(conn)
+        report_cycle(None)
+
+    ingestor = StreamIngestor(markets, write, repair, url=url, after_flush=after_flush)
+    asyncio.run(ingestor.run())
+
+# --------------------------------------------------
+#  메인 함수
+# --------------------------------------------------
+if __name__=="__main__":
+    if INGEST_MODE == 'sharded':
+        # 종목 목록은 거래소 API에서 조회하며, 각 worker가 자기 DB 연결로 백필/수집/저장
+        try:
+            run_sharded_ingestion()
+        except KeyboardInterrupt:
+            print("프로그램 종료.")
+    else:
+        markets = ["KRW-BTC", "KRW-XRP", "KRW-ETH", "KRW-ETC"]
+        conn = get_db_connection()
+        if METRICS_PORT:
+            start_metrics_server(METRICS, METRICS_PORT)
+        open_candle_events()
+
+        try:
+            # 1) 테이블 생성 & 최근 20일 중 비어 있는 구간 백필 (중단된 백필은 이어서)
+            initialize_db(conn, markets)
+            # 2) 그 후에는 주기적으로 DB에 누락분만 채우는 루프 (또는 체결 스트림 수집)
+            if INGEST_MODE == 'websocket':
+                run_websocket_ingestion(conn, markets)
+            else:
+                update_db_periodically(conn, markets)
+        except KeyboardInterrupt:
+            print("프로그램 종료.")
+        except Exception as e:
+            print(f"[ERROR] 프로그램 실행 중 오류 발생: {e}")
+        finally:
+            conn.close()
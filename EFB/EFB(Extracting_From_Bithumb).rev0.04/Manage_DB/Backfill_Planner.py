@@ -0,0 +1,296 @@
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timedelta
+
+import cx_Oracle
+
+from Fetch_Data.Concurrent_Fetcher import DEFAULT_MAX_WORKERS
+from Manage_DB.Watermark_Cache import MAX_CANDLES_PER_REQUEST
+
+# --------------------------------------------------
+#  누락 구간 백필 계획/실행
+#  1) upbit_minute_data + archive에서 종목별 비어 있는 분 구간을 쿼리 한 번으로 계산
+#  2) 구간을 최소 개수의 API 페이지(to, count) 요청으로 변환
+#  3) 페이지를 병렬로 수집하고, 페이지마다 BACKFILL_CHECKPOINT에 완료를 기록
+#     -> 중단 후 재실행 시 PENDING 페이지부터 이어서 수집
+# --------------------------------------------------
+
+CHECKPOINT_TABLE = 'BACKFILL_CHECKPOINT'
+
+BACKFILL_DAYS = 20
+
+ONE_MINUTE = timedelta(minutes=1)
+
+
+def create_checkpoint_table(conn):
+    cursor = conn.cursor()
+    try:
+        cursor.execute(f"SELECT 1 FROM {CHECKPOINT_TABLE} WHERE ROWNUM = 1")  # 테이블 존재 확인
+    except cx_Oracle.DatabaseError:
+        print(f"[INFO] {CHECKPOINT_TABLE} 테이블이 존재하지 않아 생성합니다.")
+        cursor.execute(f"""
+        CREATE TABLE {CHECKPOINT_TABLE} (
+            market VARCHAR2(50) NOT NULL,
+            page_to TIMESTAMP NOT NULL,
+            page_from TIMESTAMP NOT NULL,
+            candle_count NUMBER NOT NULL,
+            status VARCHAR2(10) NOT NULL,
+            updated_at TIMESTAMP,
+            PRIMARY KEY (market, page_to)
+        )
+        """)
+    finally:
+        cursor.close()
+
+
+def find_missing_ranges(conn, markets, start_time, end_time):
+    """
+    start_time ~ end_time(포함) 사이에서 종목별로 분봉이 없는 구간을 찾는다.
+    현재 테이블과 archive를 합친 뒤 LAG/LEAD로 1분보다 벌어진 곳만 가져오는 쿼리 한 번으로 계산한다.
+
+    Returns:
+    dict: {market: [(gap_start, gap_end), ...]} (양 끝 포함, UTC)
+    """
+    cursor = conn.cursor()
+    try:
+        cursor.execute("""
+            SELECT market, prev_time, candle_time, next_time
+              FROM (
+                SELECT market,
+                       candle_date_time_utc AS candle_time,
+                       LAG(candle_date_time_utc) OVER (PARTITION BY market ORDER BY candle_date_time_utc) AS prev_time,
+                       LEAD(candle_date_time_utc) OVER (PARTITION BY market ORDER BY candle_date_time_utc) AS next_time
+                  FROM (
+                    SELECT market, candle_date_time_utc
+                      FROM upbit_minute_data
+                     WHERE candle_date_time_utc BETWEEN :start_time AND :end_time
+                    UNION
+                    SELECT market, candle_date_time_utc
+                      FROM upbit_minute_data_archive
+                     WHERE candle_date_time_utc BETWEEN :start_time AND :end_time
+                  )
+              )
+             WHERE prev_time IS NULL
+                OR next_time IS NULL
+                OR candle_time - prev_time > INTERVAL '1' MINUTE
+        """, {'start_time': start_time, 'end_time': end_time})
+        rows = cursor.fetchall()
+    finally:
+        cursor.close()
+
+    wanted = set(markets)
+    gaps = {market: [] for market in markets}
+    seen = set()
+    for market, prev_time, candle_time, next_time in rows:
+        if market not in wanted:
+            continue
+        seen.add(market)
+        if prev_time is None:
+            if candle_time > start_time:
+                gaps[market].append((start_time, candle_time - ONE_MINUTE))
+        elif candle_time - prev_time > ONE_MINUTE:
+            gaps[market].append((prev_time + ONE_MINUTE, candle_time - ONE_MINUTE))
+        if next_time is None and candle_time < end_time:
+            gaps[market].append((candle_time + ONE_MINUTE, end_time))
+
+    # 구간 내 데이터가 하나도 없는 종목은 전체 구간이 비어 있음
+    for market in wanted - seen:
+        gaps[market].append((start_time, end_time))
+    return gaps
+
+
+def subtract_ranges(gaps, covered):
+    """
+    gaps에서 covered 구간(이미 수집했거나 수집 예정인 페이지 범위)을 뺀다.
+    거래가 없던 분은 API에도 분봉이 없으므로, 한 번 수집한 범위는 다시 요청하지 않기 위함.
+
+    Parameters:
+    gaps (list[tuple]): [(start, end), ...] 양 끝 포함
+    covered (list[tuple]): [(start, end), ...] 양 끝 포함
+    """
+    result = []
+    for gap_start, gap_end in gaps:
+        pieces = [(gap_start, gap_end)]
+        for cover_start, cover_end in covered:
+            next_pieces = []
+            for start, end in pieces:
+                if cover_end < start or cover_start > end:
+                    next_pieces.append((start, end))
+                    continue
+                if start < cover_start:
+                    next_pieces.append((start, cover_start - ONE_MINUTE))
+                if end > cover_end:
+                    next_pieces.append((cover_end + ONE_MINUTE, end))
+            pieces = next_pieces
+        result.extend(pieces)
+    return result
+
+
+def plan_pages(market, gaps, max_count=MAX_CANDLES_PER_REQUEST):
+    """
+    한 종목의 누락 구간을 API 페이지 요청으로 바꾼다.
+    가장 최근 구간 끝에서 시작해 max_count분 안에 들어오는 구간은 한 페이지로 묶고,
+    count는 페이지 안에서 가장 오래된 누락 분까지만 요청한다.
+
+    Returns:
+    list[dict]: [{'market', 'page_to', 'page_from', 'count'}, ...]
+                page_to는 API 'to' 값(이 시각 이전 분봉을 받음), page_from은 페이지가 덮는 가장 오래된 분
+    """
+    pages = []
+    remaining = sorted(gaps, key=lambda gap: gap[1], reverse=True)
+    while remaining:
+        page_to = remaining[0][1] + ONE_MINUTE
+        window_from = page_to - max_count * ONE_MINUTE
+        page_from = page_to
+        rest = []
+        for start, end in remaining:
+            if end < window_from:
+                rest.append((start, end))
+                continue
+            page_from = min(page_from, max(start, window_from))
+            if start < window_from:
+                rest.append((start, window_from - ONE_MINUTE))
+        count = int((page_to - page_from).total_seconds() // 60)
+        pages.append({'market': market, 'page_to': page_to, 'page_from': page_from, 'count': count})
+        remaining = sorted(rest, key=lambda gap: gap[1], reverse=True)
+    return pages
+
+
+def load_checkpoints(conn, start_time, markets=None):
+    """
+    Parameters:
+    markets (iterable, optional): 읽을 종목. None이면 전 종목
+        (sharded 모드에서는 worker마다 자기 shard 종목의 페이지만 이어서 수집해야 같은 페이지를 중복 수집/기록하지 않음)
+
+    Returns:
+    tuple: (PENDING 페이지 목록, {market: [(page_from, page_to - 1분), ...]} 완료/예정 페이지가 덮는 범위)
+    """
+    cursor = conn.cursor()
+    try:
+        cursor.execute(f"""
+            SELECT market, page_to, page_from, candle_count, status
+              FROM {CHECKPOINT_TABLE}
+             WHERE page_to > :start_time
+        """, {'start_time': start_time})
+        rows = cursor.fetchall()
+    finally:
+        cursor.close()
+
+    markets = set(markets) if markets is not None else None
+    pending = []
+    covered = {}
+    for market, page_to, page_from, count, status in rows:
+        if markets is not None and market not in markets:
+            continue
+        covered.setdefault(market, []).append((page_from, page_to - ONE_MINUTE))
+        if status == 'PENDING':
+            pending.append({'market': market, 'page_to': page_to, 'page_from': page_from, 'count': int(count)})
+    return pending, covered
+
+
+def save_pending_pages(conn, pages):
+    if not pages:
+        return
+    rows = [
+        {'market': page['market'], 'page_to': page['page_to'],
+         'page_from': page['page_from'], 'candle_count': page['count']}
+        for page in pages
+    ]
+    cursor = conn.cursor()
+    try:
+        cursor.executemany(f"""
+            MERGE INTO {CHECKPOINT_TABLE} t
+            USING (SELECT :market AS market, :page_to AS page_to FROM dual) s
+               ON (t.market = s.market AND t.page_to = s.page_to)
+             WHEN MATCHED THEN
+                UPDATE SET t.page_from = :page_from, t.candle_count = :candle_count,
+                           t.status = 'PENDING', t.updated_at = SYSTIMESTAMP
+             WHEN NOT MATCHED THEN
+                INSERT (market, page_to, page_from, candle_count, status, updated_at)
+                VALUES (:market, :page_to, :page_from, :candle_count, 'PENDING', SYSTIMESTAMP)
+        """, rows)
+        conn.commit()
+    finally:
+        cursor.close()
+
+
+def mark_page_done(conn, page):
+    cursor = conn.cursor()
+    try:
+        cursor.execute(f"""
+            UPDATE {CHECKPOINT_TABLE}
+               SET status = 'DONE', updated_at = SYSTIMESTAMP
+             WHERE market = :market AND page_to = :page_to
+        """, {'market': page['market'], 'page_to': page['page_to']})
+        conn.commit()
+    finally:
+        cursor.close()
+
+
+def purge_checkpoints(conn, before):
+    """
+    백필 구간(start_time)보다 오래된 체크포인트 삭제
+    """
+    cursor = conn.cursor()
+    try:
+        cursor.execute(f"DELETE FROM {CHECKPOINT_TABLE} WHERE page_to <= :before", {'before': before})
+        conn.commit()
+    finally:
+        cursor.close()
+
+
+def run_backfill(conn, markets, fetch_page, write_func, days=BACKFILL_DAYS,
+                 max_workers=DEFAULT_MAX_WORKERS, now_utc=None):
+    """
+    최근 days일 중 비어 있는 분 구간을 채운다.
+
+    Parameters:
+    fetch_page (callable): fetch_page(market, page_to, count) -> pd.DataFrame (스레드에서 호출, DB 접근 없음)
+    write_func (callable): write_func(market, DataFrame) (메인 스레드에서 호출)
+    days (int): 백필 대상 기간(일)
+    now_utc (datetime, optional): 기준 시각 (기본: 현재 UTC)
+
+    Returns:
+    int: 완료한 페이지 수
+    """
+    create_checkpoint_table(conn)
+
+    now_utc = now_utc or datetime.utcnow()
+    end_time = now_utc.replace(second=0, microsecond=0) - ONE_MINUTE  # 마지막으로 마감된 분
+    start_time = end_time - timedelta(days=days) + ONE_MINUTE
+    purge_checkpoints(conn, start_time)
+
+    # 이전 실행에서 끝내지 못한 페이지 + 새로 생긴 누락 구간 (이미 덮은 범위는 제외)
+    pending, covered = load_checkpoints(conn, start_time, markets)
+    gaps = find_missing_ranges(conn, markets, start_time, end_time)
+    new_pages = []
+    for market, market_gaps in gaps.items():
+        market_gaps = subtract_ranges(market_gaps, covered.get(market, []))
+        new_pages.extend(plan_pages(market, market_gaps))
+    save_pending_pages(conn, new_pages)
+
+    pages = pending + new_pages
+    if not pages:
+        print("[INFO] 백필할 누락 구간이 없습니다.")
+        return 0
+    print(f"[INFO] 백필 시작: 페이지 {len(pages)}개 (이어서 수집 {len(pending)}개, 새 계획 {len(new_pages)}개)")
+
+    done = 0
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(pages))) as executor:
+        futures = {
+            executor.submit(fetch_page, page['market'], page['page_to'], page['count']): page
+            for page in pages
+        }
+        for future in as_completed(futures):
+            page = futures[future]
+            try:
+                data = future.result()
+                if data is not None and not data.empty:
+                    write_func(page['market'], data)
+                mark_page_done(conn, page)
+                done += 1
+            except Exception as e:
+                # PENDING으로 남겨두고 다음 실행에서 다시 수집
+                print(f"[ERROR] {page['market']} {page['page_to']} 페이지 백필 실패: {e}")
+
+    print(f"[INFO] 백필 완료: {done}/{len(pages)} 페이지")
+    return done
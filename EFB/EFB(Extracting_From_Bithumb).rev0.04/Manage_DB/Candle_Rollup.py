@@ -0,0 +1,213 @@
+from datetime import datetime, timedelta
+
+import cx_Oracle
+
+# --------------------------------------------------
+#  분봉 롤업 테이블 (5m / 15m / 1h / 1d)
+#  - upbit_candle_<timeframe>: upbit_minute_data와 같은 컬럼 + candle_count(합친 1분봉 수)
+#  - 마감된 봉만 저장 (봉 끝 시각 <= closed_until). 진행 중인 봉은 저장하지 않음
+#  - 아래 단계에서 위 단계를 만듦: 1m -> 5m -> 15m -> 1h -> 1d
+#    (1일봉 한 개를 다시 계산할 때 1분봉 1440개가 아니라 1시간봉 24개만 읽음)
+#  - OHLCV: 시가 = 첫 분봉 시가, 종가 = 마지막 분봉 종가, 고가/저가 = 최대/최소, 거래량/거래대금 = 합
+#    거래가 없어 빠진 분은 건너뛰고 남은 분봉만 합침 (candle_count < 봉 길이)
+# --------------------------------------------------
+
+MINUTE_TABLE = 'upbit_minute_data'
+
+# (timeframe, 봉 길이(분), 원본 timeframe - None이면 1분봉 테이블)
+ROLLUP_TIMEFRAMES = (
+    ('5m', 5, None),
+    ('15m', 15, '5m'),
+    ('1h', 60, '15m'),
+    ('1d', 1440, '1h'),
+)
+
+TIMEFRAME_MINUTES = {'1m': 1, **{timeframe: minutes for timeframe, minutes, _ in ROLLUP_TIMEFRAMES}}
+
+# MERGE 한 번에 IN 목록으로 넘기는 최대 종목 수 (Oracle IN 목록 한도 1000)
+MARKET_CHUNK_SIZE = 500
+
+
+def rollup_table_name(timeframe):
+    return MINUTE_TABLE if timeframe == '1m' else f"upbit_candle_{timeframe}"
+
+
+def floor_time(value, minutes):
+    """
+    value가 속한 봉의 시작 시각 (UTC 0시 기준으로 minutes분 단위 내림)
+    """
+    day = value.replace(hour=0, minute=0, second=0, microsecond=0)
+    return day + timedelta(minutes=(value.hour * 60 + value.minute) // minutes * minutes)
+
+
+def create_rollup_tables(conn):
+    cursor = conn.cursor()
+    try:
+        for timeframe, _, _ in ROLLUP_TIMEFRAMES:
+            table_name = rollup_table_name(timeframe)
+            try:
+                cursor.execute(f"SELECT 1 FROM {table_name} WHERE ROWNUM = 1")  # 테이블 존재 확인
+            except cx_Oracle.DatabaseError:
+                print(f"[INFO] {table_name} 테이블이 존재하지 않아 생성합니다.")
+                cursor.execute(f"""
+                CREATE TABLE {table_name} (
+                    market VARCHAR2(50) NOT NULL,
+                    candle_date_time_utc TIMESTAMP NOT NULL,
+                    candle_date_time_kst TIMESTAMP NOT NULL,
+                    opening_price NUMBER(20, 8),
+                    high_price NUMBER(20, 8),
+                    low_price NUMBER(20, 8),
+                    trade_price NUMBER(20, 8),
+                    volume NUMBER,
+                    candle_acc_trade_price NUMBER(20, 8),
+                    candle_acc_trade_volume NUMBER(20, 8),
+                    candle_count NUMBER,
+                    PRIMARY KEY (market, candle_date_time_utc)
+                )
+                """)
+    finally:
+        cursor.close()
+
+
+def _bucket_sql(minutes):
+    # candle_date_time_utc가 속한 봉의 시작 시각 (TIMESTAMP)
+    return (f"CAST(TRUNC(CAST(candle_date_time_utc AS DATE)) AS TIMESTAMP) + NUMTODSINTERVAL("
+            f"FLOOR((EXTRACT(HOUR FROM candle_date_time_utc) * 60 + EXTRACT(MINUTE FROM candle_date_time_utc))"
+            f" / {minutes}) * {minutes}, 'MINUTE')")
+
+
+def _aggregate_sql(source_table, minutes, from_minute_table, market_filter):
+    """
+    source_table의 [:from_time, :until_time) 행을 봉 단위로 합치는 SELECT.
+    봉 끝이 :until_time 이하인 (마감된) 봉만 남긴다.
+    """
+    count_sql = "COUNT(*)" if from_minute_table else "SUM(candle_count)"
+    return f"""
+        SELECT market, bucket AS candle_date_time_utc, bucket + INTERVAL '9' HOUR AS candle_date_time_kst,
+               MIN(opening_price) KEEP (DENSE_RANK FIRST ORDER BY candle_date_time_utc) AS opening_price,
+               MAX(high_price) AS high_price,
+               MIN(low_price) AS low_price,
+               MAX(trade_price) KEEP (DENSE_RANK LAST ORDER BY candle_date_time_utc) AS trade_price,
+               SUM(volume) AS volume,
+               SUM(candle_acc_trade_price) AS candle_acc_trade_price,
+               SUM(candle_acc_trade_volume) AS candle_acc_trade_volume,
+               {count_sql} AS candle_count
+          FROM (SELECT src.*, {_bucket_sql(minutes)} AS bucket
+                  FROM {source_table} src
+                 WHERE candle_date_time_utc >= :from_time AND candle_date_time_utc < :until_time
+                       {market_filter})
+         GROUP BY market, bucket
+        HAVING bucket + NUMTODSINTERVAL({minutes}, 'MINUTE') <= :until_time
+    """
+
+
+def _market_filter(markets):
+    """
+    Returns:
+    tuple: (WHERE 절 조각, 바인드 dict). markets가 None이면 전체 종목
+    """
+    if markets is None:
+        return "", {}
+    binds = {f"m{i}": market for i, market in enumerate(markets)}
+    return f"AND market IN ({', '.join(':' + name for name in binds)})", binds
+
+
+def merge_rollup(cursor, timeframe, from_time, until_time, markets=None):
+    """
+    timeframe 롤업 테이블에 [from_time, until_time) 구간의 마감된 봉을 원본 단계에서 다시 합쳐 MERGE한다.
+    같은 구간을 다시 실행해도 결과가 같으므로, 늦게 들어온 분봉이 있으면 그 봉부터 다시 실행하면 된다.
+
+    Returns:
+    int: MERGE된 봉 수
+    """
+    _, minutes, source = next(item for item in ROLLUP_TIMEFRAMES if item[0] == timeframe)
+    source_table = rollup_table_name(source or '1m')
+    merged = 0
+    chunks = [None] if markets is None else [markets[i:i + MARKET_CHUNK_SIZE]
+                                               for i in range(0, len(markets), MARKET_CHUNK_SIZE)]
+    for chunk in chunks:
+        if chunk is not None and not chunk:
+            continue
+        market_filter, binds = _market_filter(chunk)
+        cursor.execute(f"""
+            MERGE INTO {rollup_table_name(timeframe)} r
+            USING ({_aggregate_sql(source_table, minutes, source is None, market_filter)}) s
+               ON (r.market = s.market AND r.candle_date_time_utc = s.candle_date_time_utc)
+             WHEN MATCHED THEN
+                UPDATE SET r.opening_price = s.opening_price,
+                           r.high_price = s.high_price,
+                           r.low_price = s.low_price,
+                           r.trade_price = s.trade_price,
+                           r.volume = s.volume,
+                           r.candle_acc_trade_price = s.candle_acc_trade_price,
+                           r.candle_acc_trade_volume = s.candle_acc_trade_volume,
+                           r.candle_count = s.candle_count
+             WHEN NOT MATCHED THEN
+                INSERT (market, candle_date_time_utc, candle_date_time_kst, opening_price, high_price, low_price,
+                        trade_price, volume, candle_acc_trade_price, candle_acc_trade_volume, candle_count)
+                VALUES (s.market, s.candle_date_time_utc, s.candle_date_time_kst, s.opening_price, s.high_price,
+                        s.low_price, s.trade_price, s.volume, s.candle_acc_trade_price, s.candle_acc_trade_volume,
+                        s.candle_count)
+        """, {'from_time': from_time, 'until_time': until_time, **binds})
+        merged += cursor.rowcount
+    return merged
+
+
+class CandleRollup:
+    """
+    수집 주기마다 롤업 테이블을 증분 갱신합니다.
+
+    - mark_written(): 1분봉을 기록할 때 호출하여 다시 합쳐야 할 가장 과거 시각을 기억
+    - update(): 각 timeframe에서 (지난 갱신 이후 새로 마감된 봉)과 (기록된 분봉이 속한 봉)만 다시 MERGE
+    - load(): 시작 시 롤업 테이블별 마지막 봉으로 이어서 갱신할 위치를 복원 (비어 있으면 전체 생성)
+    """
+
+    def __init__(self):
+        self.pending_since = None   # 마지막 update 이후 기록된 가장 과거 1분봉 시각
+        self.closed_until = {}      # timeframe -> 이 시각 이전에 끝나는 봉은 이미 갱신됨
+
+    def mark_written(self, first_time):
+        if self.pending_since is None or first_time < self.pending_since:
+            self.pending_since = first_time
+
+    def load(self, conn):
+        cursor = conn.cursor()
+        try:
+            for timeframe, minutes, _ in ROLLUP_TIMEFRAMES:
+                cursor.execute(f"SELECT MAX(candle_date_time_utc) FROM {rollup_table_name(timeframe)}")
+                last_bar = cursor.fetchone()[0]
+                if last_bar is None:
+                    self.closed_until.pop(timeframe, None)
+                else:
+                    self.closed_until[timeframe] = last_bar + timedelta(minutes=minutes)
+        finally:
+            cursor.close()
+
+    def update(self, conn, closed_until, markets=None):
+        """
+        Parameters:
+        closed_until (datetime): 이 시각(UTC, 분 단위) 이전의 1분봉은 모두 마감됨
+        markets (list[str], optional): 갱신할 종목 (sharded 모드에서 worker 담당 종목). None이면 전체
+
+        Returns:
+        dict: {timeframe: MERGE된 봉 수}
+        """
+        merged = {}
+        cursor = conn.cursor()
+        try:
+            for timeframe, minutes, _ in ROLLUP_TIMEFRAMES:
+                until_time = floor_time(closed_until, minutes)
+                starts = [t for t in (self.pending_since, self.closed_until.get(timeframe)) if t is not None]
+                from_time = floor_time(min(starts), minutes) if starts else datetime(1970, 1, 1)
+                if from_time < until_time:
+                    merged[timeframe] = merge_rollup(cursor, timeframe, from_time, until_time, markets)
+                self.closed_until[timeframe] = max(until_time, self.closed_until.get(timeframe, until_time))
+            conn.commit()
+            self.pending_since = None
+        except cx_Oracle.DatabaseError:
+            conn.rollback()
+            raise
+        finally:
+            cursor.close()
+        return merged
+
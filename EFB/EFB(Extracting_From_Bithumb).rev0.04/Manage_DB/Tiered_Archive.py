@@ -0,0 +1,222 @@
+import os
+from datetime import datetime, timedelta
+
+import cx_Oracle
+import numpy as np
+import pandas as pd
+
+# --------------------------------------------------
+#  계층형 보관 (hot -> archive -> cold)
+#  - hot: upbit_minute_data (최근 ARCHIVE_AFTER_DAYS일)
+#  - archive: upbit_minute_data_archive (COLD_AFTER_DAYS일까지)
+#  - cold: <COLD_ARCHIVE_DIR>/<YYYY-MM-DD>.npz (하루치 전 종목, 컬럼별 배열을 압축 저장)
+#  하루 단위로 옮기며, 이동 결과는 ARCHIVE_LOG에 기록한다.
+# --------------------------------------------------
+
+ARCHIVE_AFTER_DAYS = 20
+COLD_AFTER_DAYS = 60
+
+COLD_ARCHIVE_DIR = os.environ.get(
+    "COLD_ARCHIVE_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "Cold_Archive"),
+)
+
+ARCHIVE_LOG_TABLE = 'ARCHIVE_LOG'
+
+CANDLE_COLUMNS = [
+    'market', 'candle_date_time_utc', 'candle_date_time_kst',
+    'opening_price', 'high_price', 'low_price', 'trade_price', 'volume',
+    'candle_acc_trade_price', 'candle_acc_trade_volume',
+]
+
+
+def create_archive_log_table(conn):
+    cursor = conn.cursor()
+    try:
+        cursor.execute(f"SELECT 1 FROM {ARCHIVE_LOG_TABLE} WHERE ROWNUM = 1")  # 테이블 존재 확인
+    except cx_Oracle.DatabaseError:
+        print(f"[INFO] {ARCHIVE_LOG_TABLE} 테이블이 존재하지 않아 생성합니다.")
+        cursor.execute(f"""
+        CREATE TABLE {ARCHIVE_LOG_TABLE} (
+            archive_day DATE PRIMARY KEY,
+            stage VARCHAR2(10) NOT NULL,
+            row_count NUMBER,
+            updated_at TIMESTAMP
+        )
+        """)
+    finally:
+        cursor.close()
+
+
+def _log_stage(cursor, day, stage, row_count):
+    cursor.execute(f"""
+        MERGE INTO {ARCHIVE_LOG_TABLE} t
+        USING (SELECT :archive_day AS archive_day FROM dual) s
+           ON (t.archive_day = s.archive_day)
+         WHEN MATCHED THEN
+            UPDATE SET t.stage = :stage, t.row_count = :row_count, t.updated_at = SYSTIMESTAMP
+         WHEN NOT MATCHED THEN
+            INSERT (archive_day, stage, row_count, updated_at) VALUES (:archive_day, :stage, :row_count, SYSTIMESTAMP)
+    """, {'archive_day': day, 'stage': stage, 'row_count': row_count})
+
+
+def archive_day(conn, day):
+    """
+    day(UTC 날짜)의 분봉을 hot 테이블에서 archive 테이블로 옮긴다.
+    archive에 이미 있는 행은 건너뛰는 MERGE와 DELETE를 한 트랜잭션으로 커밋하므로,
+    중간에 중단되어도 다시 실행하면 중복 없이 이어서 처리된다.
+
+    Returns:
+    int: 옮긴 행 수
+    """
+    day_end = day + timedelta(days=1)
+    cursor = conn.cursor()
+    try:
+        cursor.execute("""
+            MERGE INTO upbit_minute_data_archive a
+            USING (
+                SELECT market, candle_date_time_utc, candle_date_time_kst,
+                       opening_price, high_price, low_price, trade_price, volume,
+                       candle_acc_trade_price, candle_acc_trade_volume
+                  FROM upbit_minute_data
+                 WHERE candle_date_time_utc >= :day_start AND candle_date_time_utc < :day_end
+            ) h
+               ON (a.market = h.market AND a.candle_date_time_utc = h.candle_date_time_utc)
+             WHEN NOT MATCHED THEN
+                INSERT (market, candle_date_time_utc, candle_date_time_kst,
+                        opening_price, high_price, low_price, trade_price, volume,
+                        candle_acc_trade_price, candle_acc_trade_volume)
+                VALUES (h.market, h.candle_date_time_utc, h.candle_date_time_kst,
+                        h.opening_price, h.high_price, h.low_price, h.trade_price, h.volume,
+                        h.candle_acc_trade_price, h.candle_acc_trade_volume)
+        """, {'day_start': day, 'day_end': day_end})
+
+        cursor.execute("""
+            DELETE FROM upbit_minute_data
+             WHERE candle_date_time_utc >= :day_start AND candle_date_time_utc < :day_end
+        """, {'day_start': day, 'day_end': day_end})
+        moved = cursor.rowcount
+
+        _log_stage(cursor, day, 'ARCHIVED', moved)
+        conn.commit()
+        return moved
+    except cx_Oracle.DatabaseError:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+
+
+def export_cold_day(conn, day, cold_dir=COLD_ARCHIVE_DIR):
+    """
+    archive 테이블의 day(UTC 날짜) 분봉을 압축 컬럼형 파일(<cold_dir>/<day>.npz)로 내보내고 archive에서 지운다.
+    파일은 임시 이름으로 쓴 뒤 교체하며, 삭제는 파일이 완성된 다음에 커밋하므로
+    중간에 중단되어도 다시 실행하면 같은 파일을 다시 만들고 이어서 처리된다.
+
+    Returns:
+    int: 내보낸 행 수
+    """
+    day_end = day + timedelta(days=1)
+    df = pd.read_sql(f"""
+        SELECT {', '.join(CANDLE_COLUMNS)}
+          FROM upbit_minute_data_archive
+         WHERE candle_date_time_utc >= :day_start AND candle_date_time_utc < :day_end
+         ORDER BY market, candle_date_time_utc
+    """, conn, params={'day_start': day, 'day_end': day_end})
+    df.columns = [column.lower() for column in df.columns]
+
+    os.makedirs(cold_dir, exist_ok=True)
+    path = os.path.join(cold_dir, f"{day:%Y-%m-%d}.npz")
+    tmp_path = f"{path}.{os.getpid()}.tmp.npz"
+    np.savez_compressed(tmp_path, **{
+        'market': df['market'].to_numpy(dtype=str),
+        'candle_date_time_utc': df['candle_date_time_utc'].to_numpy(dtype='datetime64[s]'),
+        'candle_date_time_kst': df['candle_date_time_kst'].to_numpy(dtype='datetime64[s]'),
+        **{column: df[column].to_numpy(dtype=np.float64) for column in CANDLE_COLUMNS[3:]},
+    })
+    os.replace(tmp_path, path)
+
+    cursor = conn.cursor()
+    try:
+        cursor.execute("""
+            DELETE FROM upbit_minute_data_archive
+             WHERE candle_date_time_utc >= :day_start AND candle_date_time_utc < :day_end
+        """, {'day_start': day, 'day_end': day_end})
+        _log_stage(cursor, day, 'COLD', len(df))
+        conn.commit()
+    finally:
+        cursor.close()
+    return len(df)
+
+
+def _days_before(conn, table_name, cutoff):
+    cursor = conn.cursor()
+    try:
+        cursor.execute(f"""
+            SELECT DISTINCT TRUNC(CAST(candle_date_time_utc AS DATE))
+              FROM {table_name}
+             WHERE candle_date_time_utc < :cutoff
+             ORDER BY 1
+        """, {'cutoff': cutoff})
+        return [row[0] for row in cursor.fetchall()]
+    finally:
+        cursor.close()
+
+
+def run_archive_job(conn, now_utc=None, archive_after_days=ARCHIVE_AFTER_DAYS,
+                    cold_after_days=COLD_AFTER_DAYS, cold_dir=COLD_ARCHIVE_DIR):
+    """
+    하루 단위 보관 작업. 오늘(UTC) 기준 archive_after_days일보다 오래된 날은 archive로,
+    cold_after_days일보다 오래된 날은 cold 파일로 옮긴다. 옮길 날이 없으면 아무것도 하지 않는다.
+    """
+    create_archive_log_table(conn)
+    today = (now_utc or datetime.utcnow()).replace(hour=0, minute=0, second=0, microsecond=0)
+
+    for day in _days_before(conn, 'upbit_minute_data', today - timedelta(days=archive_after_days)):
+        moved = archive_day(conn, day)
+        print(f"[INFO] {day:%Y-%m-%d} 분봉 {moved}행 archive로 이동")
+
+    for day in _days_before(conn, 'upbit_minute_data_archive', today - timedelta(days=cold_after_days)):
+        exported = export_cold_day(conn, day, cold_dir)
+        print(f"[INFO] {day:%Y-%m-%d} 분봉 {exported}행 cold 파일로 이동")
+
+
+def _load_cold(market, start, end, cold_dir):
+    frames = []
+    day = start.replace(hour=0, minute=0, second=0, microsecond=0)
+    while day < end:
+        path = os.path.join(cold_dir, f"{day:%Y-%m-%d}.npz")
+        if os.path.exists(path):
+            with np.load(path) as cold:
+                mask = cold['market'] == market
+                frames.append(pd.DataFrame({column: cold[column][mask] for column in CANDLE_COLUMNS}))
+        day += timedelta(days=1)
+    return frames
+
+
+def load_minute_data(conn, market, start, end, cold_dir=COLD_ARCHIVE_DIR):
+    """
+    hot/archive 테이블과 cold 파일을 합쳐 start <= 시각 < end 범위의 분봉을 하나의 DataFrame으로 반환한다.
+    같은 시각이 여러 계층에 있으면 (이동 도중 등) 더 최근 계층(hot > archive > cold)의 값을 사용한다.
+    (백테스트의 PRICE_SOURCE='tiered'에서 종목별 가격 조회에 사용)
+    """
+    frames = []
+    for tier, table_name in ((0, 'upbit_minute_data'), (1, 'upbit_minute_data_archive')):
+        df = pd.read_sql(f"""
+            SELECT {', '.join(CANDLE_COLUMNS)}
+              FROM {table_name}
+             WHERE market = :market AND candle_date_time_utc >= :start_time AND candle_date_time_utc < :end_time
+        """, conn, params={'market': market, 'start_time': start, 'end_time': end})
+        df.columns = [column.lower() for column in df.columns]
+        df['tier'] = tier
+        frames.append(df)
+
+    for df in _load_cold(market, start, end, cold_dir):
+        df['tier'] = 2
+        frames.append(df)
+
+    merged = pd.concat(frames, ignore_index=True)
+    merged['candle_date_time_utc'] = pd.to_datetime(merged['candle_date_time_utc'])
+    merged = merged[(merged['candle_date_time_utc'] >= start) & (merged['candle_date_time_utc'] < end)]
+    merged = merged.sort_values(['candle_date_time_utc', 'tier']).drop_duplicates('candle_date_time_utc')
+    return merged.drop(columns='tier').reset_index(drop=True)
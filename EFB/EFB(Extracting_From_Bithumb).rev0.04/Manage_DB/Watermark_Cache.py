@@ -0,0 +1,71 @@
+import threading
+from datetime import datetime
+
+# 분봉 API 1회 요청 최대 개수
+MAX_CANDLES_PER_REQUEST = 200
+
+
+class WatermarkCache:
+    """
+    종목별 마지막 저장 분봉 시각(candle_date_time_utc) 캐시.
+
+    - load(): 시작 시 GROUP BY market 쿼리 한 번으로 전체 종목 값을 채움
+    - advance(): update_db_with_data가 커밋한 행의 시각으로 전진 (뒤로 가지 않음)
+    - candles_to_request(): 마지막 시각 이후 필요한 분봉 수만큼만 요청하도록 count 계산
+    """
+
+    def __init__(self):
+        self.loaded = False
+        self._marks = {}
+        self._lock = threading.Lock()
+
+    def load(self, conn, table_name='upbit_minute_data'):
+        cursor = conn.cursor()
+        try:
+            cursor.execute(f"""
+                SELECT market, MAX(candle_date_time_utc)
+                FROM {table_name}
+                GROUP BY market
+            """)
+            rows = cursor.fetchall()
+        finally:
+            cursor.close()
+
+        with self._lock:
+            self._marks = {market: last_time for market, last_time in rows}
+            self.loaded = True
+        print(f"[INFO] 종목별 마지막 분봉 시각 {len(rows)}건 로드 완료.")
+
+    def get(self, market):
+        with self._lock:
+            return self._marks.get(market)
+
+    def advance(self, market, candle_time):
+        with self._lock:
+            current = self._marks.get(market)
+            if current is None or candle_time > current:
+                self._marks[market] = candle_time
+
+    def forget(self, market):
+        with self._lock:
+            self._marks.pop(market, None)
+
+    def snapshot(self):
+        """
+        Returns:
+        dict: {market: 마지막 저장 분봉 시각} 복사본 (지표 수집용)
+        """
+        with self._lock:
+            return dict(self._marks)
+
+
+def candles_to_request(last_time, now_utc=None):
+    """
+    last_time(포함)부터 현재 진행 중인 분봉까지의 개수 (최대 MAX_CANDLES_PER_REQUEST).
+    last_time 분봉까지 받아야 페이지 반복이 멈추므로 1개를 더한다.
+    """
+    if last_time is None:
+        return MAX_CANDLES_PER_REQUEST
+    now_utc = now_utc or datetime.utcnow()
+    minutes = int((now_utc - last_time).total_seconds() // 60)
+    return max(1, min(MAX_CANDLES_PER_REQUEST, minutes + 1))
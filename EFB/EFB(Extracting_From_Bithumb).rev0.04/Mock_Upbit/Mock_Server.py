@@ -0,0 +1,254 @@
+import gzip
+import json
+import random
+import threading
+import time
+import zlib
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+# --------------------------------------------------
+#  로컬 Upbit Mock 서버 (벤치마크/오프라인 테스트용)
+#  - GET /v1/candles/minutes/1?market=...&count=...&to=...
+#  - GET /v1/market/all (state.markets, 테스트 중 바꾸면 상장/폐지를 흉내냄)
+#  - 초당 요청 제한(rate_limit)과 Remaining-Req 헤더, 429 응답을 흉내냄
+#  - HTTP/1.1 keep-alive, Accept-Encoding: gzip이면 압축 응답
+#  - handshake_latency: 새 연결마다 지연 (실제 API의 TLS 연결 비용을 흉내냄)
+#  - error_rate: 이 비율만큼 503 응답 (재시도 동작 확인용)
+#  - recorded가 주어지면 실제 API에서 녹화한 분봉을 현재 시각 기준으로 옮겨 반복 재생
+# --------------------------------------------------
+
+TIME_FORMAT = "%Y-%m-%dT%H:%M:%S"
+
+
+def make_candle(market, candle_time):
+    """
+    종목/시각으로부터 항상 같은 값을 갖는 가짜 분봉을 만든다.
+    """
+    seed = zlib.crc32(f"{market}{candle_time:%Y%m%d%H%M}".encode())
+    base = 1000 + zlib.crc32(market.encode()) % 100000
+    trade_price = base + seed % 100
+    volume = 1 + (seed >> 8) % 1000 / 100
+    return {
+        'market': market,
+        'candle_date_time_utc': candle_time.strftime(TIME_FORMAT),
+        'candle_date_time_kst': (candle_time + timedelta(hours=9)).strftime(TIME_FORMAT),
+        'opening_price': trade_price - 1,
+        'high_price': trade_price + 2,
+        'low_price': trade_price - 2,
+        'trade_price': trade_price,
+        'timestamp': int(candle_time.timestamp() * 1000),
+        'candle_acc_trade_price': trade_price * volume,
+        'candle_acc_trade_volume': volume,
+        'unit': 1,
+    }
+
+
+def record_candles(path, market, pages, base_url="https://api.upbit.com"):
+    """
+    실제 Upbit 분봉 API 응답을 pages 페이지(페이지당 200개) 녹화하여 path에 JSON lines로 저장한다.
+    """
+    import requests
+
+    to_time = None
+    count = 0
+    with open(path, 'a', encoding='utf-8') as f:
+        for _ in range(pages):
+            params = {'market': market, 'count': 200}
+            if to_time is not None:
+                params['to'] = to_time
+            response = requests.get(f"{base_url}/v1/candles/minutes/1", params=params)
+            response.raise_for_status()
+            candles = response.json()
+            if not candles:
+                break
+            for candle in candles:
+                f.write(json.dumps(candle) + '\n')
+            count += len(candles)
+            to_time = candles[-1]['candle_date_time_utc'] + 'Z'
+            time.sleep(0.2)
+    print(f"{market} 분봉 {count}개 녹화 완료: {path}")
+
+
+def load_recorded_candles(path):
+    """
+    Returns:
+    dict: {market: [candle, ...]} 최신순
+    """
+    recorded = {}
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                candle = json.loads(line)
+                recorded.setdefault(candle['market'], []).append(candle)
+    for candles in recorded.values():
+        candles.sort(key=lambda candle: candle['candle_date_time_utc'], reverse=True)
+    return recorded
+
+
+def replay_candle(template, market, candle_time):
+    """
+    녹화된 분봉의 가격/거래량은 그대로 두고 종목과 시각만 바꾼다.
+    """
+    candle = dict(template)
+    candle['market'] = market
+    candle['candle_date_time_utc'] = candle_time.strftime(TIME_FORMAT)
+    candle['candle_date_time_kst'] = (candle_time + timedelta(hours=9)).strftime(TIME_FORMAT)
+    candle['timestamp'] = int(candle_time.timestamp() * 1000)
+    return candle
+
+
+def parse_to(value):
+    if not value:
+        return None
+    value = value.rstrip('Z').replace(' ', 'T')
+    return datetime.strptime(value[:19], TIME_FORMAT)
+
+
+class MockUpbitState:
+    """
+    초 단위 고정 윈도우로 요청 수를 세어 Upbit의 초당 요청 제한을 흉내낸다.
+    """
+
+    def __init__(self, rate_limit=10, latency=0.03, history_minutes=60 * 24 * 30, recorded=None,
+                 publish_delay=None, handshake_latency=0.0, error_rate=0.0):
+        self.rate_limit = rate_limit
+        self.handshake_latency = handshake_latency
+        self.error_rate = error_rate
+        self.connection_count = 0
+        # 분 경계 후 publish_delay초 동안은 방금 마감된 분봉(과 새 분봉)을 아직 반환하지 않음 (None이면 지연 없음)
+        self.publish_delay = publish_delay
+        # 녹화 분봉이 있으면 모든 종목에 (종목 이름이 같으면 그 종목 것을, 아니면 첫 종목 것을) 재생
+        self.recorded = recorded or {}
+        self.latency = latency
+        self.history_minutes = history_minutes
+        self.markets = [f"KRW-M{i:03d}" for i in range(200)] + ['BTC-M000', 'USDT-M000']
+        self.request_count = 0
+        self.too_many_count = 0
+        self._window = 0
+        self._window_count = 0
+        self._lock = threading.Lock()
+
+    def take(self):
+        """
+        Returns:
+        tuple: (허용 여부, 이번 초에 남은 요청 수)
+        """
+        with self._lock:
+            self.request_count += 1
+            window = int(time.time())
+            if window != self._window:
+                self._window = window
+                self._window_count = 0
+            if self._window_count >= self.rate_limit:
+                self.too_many_count += 1
+                return False, 0
+            self._window_count += 1
+            return True, self.rate_limit - self._window_count
+
+
+class MockUpbitHandler(BaseHTTPRequestHandler):
+    state = None  # start_mock_server에서 MockUpbitState로 설정
+    protocol_version = 'HTTP/1.1'  # 연결 재사용 (응답마다 Content-Length 지정)
+
+    def setup(self):
+        super().setup()
+        with self.state._lock:
+            self.state.connection_count += 1
+        if self.state.handshake_latency:
+            time.sleep(self.state.handshake_latency)
+
+    def log_message(self, format, *args):
+        pass  # 요청마다 로그를 찍지 않음
+
+    def _send_json(self, status, body, remaining):
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        if 'gzip' in self.headers.get('Accept-Encoding', ''):
+            payload = gzip.compress(payload)
+            self.send_header('Content-Encoding', 'gzip')
+        self.send_header('Content-Length', str(len(payload)))
+        self.send_header('Remaining-Req', f"group=candles; min=600; sec={remaining}")
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        query = {key: values[0] for key, values in parse_qs(url.query).items()}
+
+        allowed, remaining = self.state.take()
+        if self.state.latency:
+            time.sleep(self.state.latency)
+        if not allowed:
+            self._send_json(429, {'error': {'name': 'too_many_requests'}}, remaining)
+            return
+        if self.state.error_rate and random.random() < self.state.error_rate:
+            self._send_json(503, {'error': {'name': 'service_unavailable'}}, remaining)
+            return
+
+        if url.path == '/v1/candles/minutes/1':
+            self._send_json(200, self._candles(query), remaining)
+        elif url.path == '/v1/market/all':
+            markets = [{'market': market, 'korean_name': market, 'english_name': market} for market in self.state.markets]
+            self._send_json(200, markets, remaining)
+        else:
+            self._send_json(404, {'error': {'name': 'not_found'}}, remaining)
+
+    def _candles(self, query):
+        market = query.get('market', 'KRW-BTC')
+        count = min(int(query.get('count', 1)), 200)
+        now = datetime.now()
+        latest = now.replace(second=0, microsecond=0)  # 진행 중인 분봉
+        if self.state.publish_delay is not None and (now - latest).total_seconds() < self.state.publish_delay:
+            latest -= timedelta(minutes=2)
+        oldest = latest - timedelta(minutes=self.state.history_minutes)
+
+        # to 시각 '이전' 분봉을 최신순으로 반환
+        to_time = parse_to(query.get('to'))
+        start = latest if to_time is None else min(latest, to_time - timedelta(seconds=1)).replace(second=0)
+
+        recorded = self.state.recorded.get(market) or next(iter(self.state.recorded.values()), None)
+        candles = []
+        candle_time = start
+        while len(candles) < count and candle_time >= oldest:
+            if recorded:
+                # 가장 최근 분봉 = 녹화의 가장 최근 분봉, 녹화 길이보다 과거는 반복
+                offset = int((latest - candle_time).total_seconds() // 60)
+                candles.append(replay_candle(recorded[offset % len(recorded)], market, candle_time))
+            else:
+                candles.append(make_candle(market, candle_time))
+            candle_time -= timedelta(minutes=1)
+        return candles
+
+
+def start_mock_server(port=0, rate_limit=10, latency=0.03, history_minutes=60 * 24 * 30, recorded=None,
+                      publish_delay=None, handshake_latency=0.0, error_rate=0.0):
+    """
+    Mock 서버를 백그라운드 스레드에서 시작한다.
+
+    Parameters:
+    recorded (dict, optional): load_recorded_candles() 결과. 없으면 make_candle()로 만든 가짜 분봉을 반환
+
+    Returns:
+    tuple: (ThreadingHTTPServer, base_url, MockUpbitState). 종료 시 server.shutdown() 호출.
+    """
+    state = MockUpbitState(rate_limit=rate_limit, latency=latency, history_minutes=history_minutes,
+                           recorded=recorded, publish_delay=publish_delay,
+                           handshake_latency=handshake_latency, error_rate=error_rate)
+    handler = type('BoundMockUpbitHandler', (MockUpbitHandler,), {'state': state})
+    server = ThreadingHTTPServer(('127.0.0.1', port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}", state
+
+
+if __name__ == "__main__":
+    server, base_url, _ = start_mock_server(port=8765)
+    print(f"Mock Upbit 서버 실행 중: {base_url} (Ctrl+C로 종료)")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        server.shutdown()
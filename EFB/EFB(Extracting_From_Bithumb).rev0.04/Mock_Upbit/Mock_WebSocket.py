@@ -0,0 +1,114 @@
+import asyncio
+import json
+import random
+import threading
+import time
+import zlib
+
+import websockets
+
+from Stream_Data.Upbit_Stream import UPBIT_WEBSOCKET_URL, build_subscribe_message
+
+# --------------------------------------------------
+#  로컬 Upbit WebSocket 대역 (오프라인 테스트용)
+#  - 녹화된 체결(JSON lines, Upbit trade 메시지 형식)을 현재 시각 기준으로 옮겨 재생
+#  - 녹화 파일이 없으면 종목별 가짜 체결을 생성
+# --------------------------------------------------
+
+
+def load_recorded_ticks(path):
+    with open(path, encoding='utf-8') as f:
+        ticks = [json.loads(line) for line in f if line.strip()]
+    return sorted(ticks, key=lambda tick: tick['trade_timestamp'])
+
+
+async def record_ticks(path, markets, seconds, url=UPBIT_WEBSOCKET_URL):
+    """
+    실제 Upbit 체결 스트림을 seconds초 동안 녹화하여 path에 JSON lines로 저장한다.
+    """
+    deadline = time.time() + seconds
+    count = 0
+    async with websockets.connect(url, max_size=None) as websocket:
+        await websocket.send(build_subscribe_message(markets))
+        with open(path, 'w', encoding='utf-8') as f:
+            while time.time() < deadline:
+                try:
+                    message = await asyncio.wait_for(websocket.recv(), timeout=deadline - time.time())
+                except asyncio.TimeoutError:
+                    break
+                f.write(json.dumps(json.loads(message)) + '\n')
+                count += 1
+    print(f"체결 {count}건 녹화 완료: {path}")
+
+
+def synthetic_ticks(markets, seconds, ticks_per_sec=5):
+    """
+    녹화 파일이 없을 때 사용할 가짜 체결 (trade_timestamp는 0부터 시작하는 상대 시각)
+    """
+    rng = random.Random(0)
+    ticks = []
+    for market in markets:
+        price = 1000 + zlib.crc32(market.encode()) % 100000
+        for i in range(int(seconds * ticks_per_sec)):
+            price = max(1.0, price + rng.choice((-1, 0, 1)))
+            ticks.append({
+                'type': 'trade',
+                'code': market,
+                'trade_price': price,
+                'trade_volume': round(rng.uniform(0.001, 1.0), 6),
+                'trade_timestamp': int(i * 1000 / ticks_per_sec) + rng.randint(0, 199),
+                'ask_bid': rng.choice(('ASK', 'BID')),
+                'stream_type': 'REALTIME',
+            })
+    return sorted(ticks, key=lambda tick: tick['trade_timestamp'])
+
+
+def _make_handler(ticks, speed):
+    async def handler(websocket, *args):
+        subscribe = json.loads(await websocket.recv())
+        codes = set()
+        for item in subscribe:
+            if item.get('type') == 'trade':
+                codes.update(item.get('codes', []))
+
+        selected = [tick for tick in ticks if tick['code'] in codes]
+        if not selected:
+            return
+
+        # 첫 체결이 접속 시각에 오도록 시각을 옮겨 재생
+        start_ms = time.time() * 1000
+        first_ms = selected[0]['trade_timestamp']
+        for tick in selected:
+            offset_ms = (tick['trade_timestamp'] - first_ms) / speed
+            delay = (start_ms + offset_ms) / 1000 - time.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            message = dict(tick, trade_timestamp=int(start_ms + offset_ms), timestamp=int(time.time() * 1000))
+            await websocket.send(json.dumps(message).encode())
+
+    return handler
+
+
+def start_mock_websocket(ticks, port=0, speed=1.0):
+    """
+    Mock WebSocket 서버를 백그라운드 스레드에서 시작한다.
+
+    Parameters:
+    ticks (list[dict]): load_recorded_ticks() 또는 synthetic_ticks() 결과
+    speed (float): 재생 배속 (1.0 = 녹화 속도)
+
+    Returns:
+    str: 접속 URL (ws://127.0.0.1:port)
+    """
+    started = threading.Event()
+    address = {}
+
+    async def serve():
+        async with websockets.serve(_make_handler(ticks, speed), '127.0.0.1', port) as server:
+            address['port'] = next(iter(server.sockets)).getsockname()[1]
+            started.set()
+            await asyncio.Future()
+
+    threading.Thread(target=lambda: asyncio.run(serve()), daemon=True).start()
+    started.wait()
+    return f"ws://127.0.0.1:{address['port']}"
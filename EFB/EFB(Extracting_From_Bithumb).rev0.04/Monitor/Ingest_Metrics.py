@@ -0,0 +1,300 @@
+import json
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from Fetch_Data.Http_Client import LatencyHistogram, get_http_client
+
+# --------------------------------------------------
+#  EFB 수집 지표
+#  - 종목별 데이터 지연(현재 - 마지막 분봉 마감), API 요청 수/지연/429, upsert 행 수/초당 행 수/커밋 지연,
+#    archive 소요 시간, 수집 주기
+#  - Prometheus 텍스트 형식 HTTP 엔드포인트(/metrics)와 JSON 상태(/status, 상태 파일)로 제공
+# --------------------------------------------------
+
+# 커밋/archive 소요 시간 히스토그램 구간 상한(ms)
+COMMIT_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{value}"' for key, value in labels.items()) + "}"
+
+
+def _histogram_lines(name, snapshot, labels=None):
+    """
+    LatencyHistogram.snapshot()(ms)을 Prometheus histogram(초) 형식 줄로 변환
+    """
+    labels = labels or {}
+    lines = []
+    for bound, count in snapshot['buckets']:
+        le = "+Inf" if bound == float('inf') else f"{bound / 1000:g}"
+        lines.append(f"{name}_bucket{_format_labels({**labels, 'le': le})} {count}")
+    lines.append(f"{name}_sum{_format_labels(labels)} {snapshot['sum_ms'] / 1000:.6f}")
+    lines.append(f"{name}_count{_format_labels(labels)} {snapshot['count']}")
+    return lines
+
+
+class IngestMetrics:
+    """
+    수집 프로세스 하나의 지표. 여러 스레드에서 기록할 수 있습니다.
+
+    - record_upsert(): update_db_with_data의 chunk(executemany + commit)마다 호출
+    - record_archive(): 보관 작업 1회마다 호출
+    - cycle_done(): 수집 주기 1회가 끝날 때 호출 (초당 upsert 행 수 갱신, 첫 주기 후 ready)
+    API 요청 지표는 프로세스 공용 HTTP 클라이언트에서, 종목별 지연은 watermarks에서 읽습니다.
+    """
+
+    def __init__(self, watermarks=None):
+        self.watermarks = watermarks
+        self.started_at = time.time()
+        self.ready = False
+
+        self.upsert_rows = 0
+        self.upsert_errors = 0
+        self.upsert_rows_per_sec = 0.0
+        self.commit_latency = LatencyHistogram(COMMIT_BUCKETS_MS)
+
+        self.archive_runs = 0
+        self.archive_last_sec = None
+        self.archive_latency = LatencyHistogram(COMMIT_BUCKETS_MS + (30000, 60000, 300000))
+
+        self.cycles = 0
+        self.last_cycle_at = None
+        self.last_cycle_sec = None
+
+        self._rate_sample = (time.monotonic(), 0)
+        self._lock = threading.Lock()
+
+    def record_upsert(self, rows, errors, commit_sec):
+        with self._lock:
+            self.upsert_rows += rows
+            self.upsert_errors += errors
+        self.commit_latency.observe(commit_sec * 1000)
+
+    def record_archive(self, elapsed_sec):
+        with self._lock:
+            self.archive_runs += 1
+            self.archive_last_sec = elapsed_sec
+        self.archive_latency.observe(elapsed_sec * 1000)
+
+    def cycle_done(self, elapsed_sec):
+        now = time.monotonic()
+        with self._lock:
+            sample_time, sample_rows = self._rate_sample
+            if now > sample_time:
+                self.upsert_rows_per_sec = (self.upsert_rows - sample_rows) / (now - sample_time)
+            self._rate_sample = (now, self.upsert_rows)
+            self.cycles += 1
+            self.last_cycle_at = time.time()
+            self.last_cycle_sec = elapsed_sec
+            self.ready = True
+
+    def market_lags(self, now_utc=None):
+        """
+        Returns:
+        dict: {market: (마지막 분봉 시각, 지연(초))}. 지연 = 현재(UTC) - 마지막 분봉의 마감 시각
+        """
+        if self.watermarks is None:
+            return {}
+        now_utc = now_utc or datetime.utcnow()
+        return {
+            market: (last_time, (now_utc - last_time - timedelta(minutes=1)).total_seconds())
+            for market, last_time in self.watermarks.snapshot().items()
+            if last_time is not None
+        }
+
+    def render_prometheus(self):
+        api = get_http_client().snapshot()
+        lines = [
+            "# HELP efb_ready 1 after the first ingestion cycle has completed",
+            "# TYPE efb_ready gauge",
+            f"efb_ready {int(self.ready)}",
+            "# HELP efb_start_time_seconds Process start time (unix seconds)",
+            "# TYPE efb_start_time_seconds gauge",
+            f"efb_start_time_seconds {self.started_at:.3f}",
+            "# HELP efb_market_lag_seconds Seconds since the last stored candle closed",
+            "# TYPE efb_market_lag_seconds gauge",
+        ]
+        for market, (_, lag) in sorted(self.market_lags().items()):
+            lines.append(f"efb_market_lag_seconds{_format_labels({'market': market})} {lag:.0f}")
+
+        lines += ["# HELP efb_api_requests_total Upbit API responses by endpoint and status",
+                  "# TYPE efb_api_requests_total counter"]
+        for (endpoint, status), count in sorted(api['status_counts'].items()):
+            lines.append(f"efb_api_requests_total{_format_labels({'endpoint': endpoint, 'status': status})} {count}")
+
+        lines += ["# HELP efb_api_retries_total Upbit API retries by reason",
+                  "# TYPE efb_api_retries_total counter"]
+        for reason, count in sorted(api['retry_counts'].items()):
+            lines.append(f"efb_api_retries_total{_format_labels({'reason': reason})} {count}")
+
+        lines += ["# HELP efb_api_request_duration_seconds Upbit API request latency",
+                  "# TYPE efb_api_request_duration_seconds histogram"]
+        for endpoint, histogram in sorted(api['histograms'].items()):
+            lines += _histogram_lines("efb_api_request_duration_seconds", histogram, {'endpoint': endpoint})
+
+        lines += [
+            "# HELP efb_upsert_rows_total Candle rows merged into upbit_minute_data",
+            "# TYPE efb_upsert_rows_total counter",
+            f"efb_upsert_rows_total {self.upsert_rows}",
+            "# HELP efb_upsert_errors_total Candle rows rejected by batch errors",
+            "# TYPE efb_upsert_errors_total counter",
+            f"efb_upsert_errors_total {self.upsert_errors}",
+            "# HELP efb_upsert_rows_per_second Merged rows per second over the last cycle",
+            "# TYPE efb_upsert_rows_per_second gauge",
+            f"efb_upsert_rows_per_second {self.upsert_rows_per_sec:.3f}",
+            "# HELP efb_commit_duration_seconds executemany + commit latency per chunk",
+            "# TYPE efb_commit_duration_seconds histogram",
+        ]
+        lines += _histogram_lines("efb_commit_duration_seconds", self.commit_latency.snapshot())
+        lines += ["# HELP efb_archive_duration_seconds Archive job duration",
+                  "# TYPE efb_archive_duration_seconds histogram"]
+        lines += _histogram_lines("efb_archive_duration_seconds", self.archive_latency.snapshot())
+        lines += [
+            "# HELP efb_cycles_total Completed ingestion cycles",
+            "# TYPE efb_cycles_total counter",
+            f"efb_cycles_total {self.cycles}",
+            "# HELP efb_last_cycle_timestamp_seconds End time of the last ingestion cycle (unix seconds)",
+            "# TYPE efb_last_cycle_timestamp_seconds gauge",
+            f"efb_last_cycle_timestamp_seconds {self.last_cycle_at or 0:.3f}",
+            "# HELP efb_cycle_duration_seconds Duration of the last ingestion cycle",
+            "# TYPE efb_cycle_duration_seconds gauge",
+            f"efb_cycle_duration_seconds {self.last_cycle_sec or 0:.3f}",
+        ]
+        return "\n".join(lines) + "\n"
+
+    def status(self):
+        """
+        상태 파일 / /status 응답 내용
+
+        Returns:
+        dict: JSON으로 직렬화 가능한 상태
+        """
+        client = get_http_client()
+        api = client.snapshot()
+        lags = self.market_lags()
+        return {
+            'pid': os.getpid(),
+            'ready': self.ready,
+            'updated_at': time.time(),
+            'started_at': self.started_at,
+            'cycles': self.cycles,
+            'last_cycle_at': self.last_cycle_at,
+            'last_cycle_sec': self.last_cycle_sec,
+            'markets': {
+                market: {'last_candle_utc': last_time.isoformat(), 'lag_sec': round(lag, 1)}
+                for market, (last_time, lag) in sorted(lags.items())
+            },
+            'max_lag_sec': round(max(lag for _, lag in lags.values()), 1) if lags else None,
+            'api': {
+                'endpoints': client.latency_summary(api),
+                'responses': {f"{endpoint} {status}": count for (endpoint, status), count in api['status_counts'].items()},
+                'too_many_requests': sum(count for (_, status), count in api['status_counts'].items() if status == 429),
+                'retries': api['retry_counts'],
+            },
+            'upsert': {
+                'rows': self.upsert_rows,
+                'errors': self.upsert_errors,
+                'rows_per_sec': round(self.upsert_rows_per_sec, 3),
+                'commit_p50_ms': self.commit_latency.percentile(0.5),
+                'commit_p99_ms': self.commit_latency.percentile(0.99),
+            },
+            'archive': {'runs': self.archive_runs, 'last_sec': self.archive_last_sec},
+        }
+
+    def write_status_file(self, path):
+        """
+        상태를 JSON 파일로 기록합니다. 임시 파일에 쓴 뒤 교체하므로 읽는 쪽이 쓰다 만 파일을 보지 않습니다.
+        """
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.status(), f, ensure_ascii=False, indent=2, default=str)
+        os.replace(tmp_path, path)
+
+
+def _read_status_file(path):
+    try:
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def write_sharded_status_file(path, shard_paths, started_at):
+    """
+    sharded 모드의 부모 프로세스가 shard별 상태 파일을 모아 path에 하나의 상태 파일로 기록합니다.
+    모든 shard가 started_at 이후에 시작해 첫 수집 주기를 마쳤을 때 ready = true
+    (이전 실행이 남긴 shard 상태 파일은 준비되지 않은 것으로 봄)
+
+    Parameters:
+    shard_paths (list): shard 번호 순서의 shard 상태 파일 경로
+    started_at (float): 부모 프로세스 시작 시각 (time.time())
+
+    Returns:
+    dict: 기록한 상태
+    """
+    shards = []
+    for shard_index, shard_path in enumerate(shard_paths):
+        shard = _read_status_file(shard_path)
+        fresh = shard is not None and shard.get('started_at', 0) >= started_at - 1
+        shards.append({
+            'shard': shard_index,
+            'pid': shard.get('pid') if fresh else None,
+            'ready': bool(fresh and shard.get('ready')),
+            'cycles': shard.get('cycles', 0) if fresh else 0,
+            'max_lag_sec': shard.get('max_lag_sec') if fresh else None,
+        })
+    lags = [shard['max_lag_sec'] for shard in shards if shard['max_lag_sec'] is not None]
+    status = {
+        'pid': os.getpid(),
+        'ready': bool(shards) and all(shard['ready'] for shard in shards),
+        'updated_at': time.time(),
+        'started_at': started_at,
+        'max_lag_sec': max(lags) if lags else None,
+        'shards': shards,
+    }
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(status, f, ensure_ascii=False, indent=2, default=str)
+    os.replace(tmp_path, path)
+    return status
+
+
+def start_metrics_server(metrics, port, host='127.0.0.1'):
+    """
+    /metrics(Prometheus 텍스트)와 /status(JSON)를 백그라운드 스레드에서 제공합니다.
+
+    Returns:
+    ThreadingHTTPServer 또는 None (포트를 열 수 없을 때, 수집은 계속)
+    """
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def log_message(self, format, *args):
+            pass  # 요청마다 로그를 찍지 않음
+
+        def do_GET(self):
+            if self.path.startswith('/metrics'):
+                body, content_type = metrics.render_prometheus().encode(), 'text/plain; version=0.0.4'
+            elif self.path.startswith('/status'):
+                body, content_type = json.dumps(metrics.status(), default=str).encode(), 'application/json'
+            else:
+                self.send_error(404)
+                return
+            self.send_response(200)
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    try:
+        server = ThreadingHTTPServer((host, port), MetricsHandler)
+    except OSError as e:
+        print(f"[WARN] 지표 서버를 시작하지 못했습니다 (port {port}): {e}")
+        return None
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    print(f"[INFO] 지표 서버 시작: http://{host}:{server.server_address[1]}/metrics")
+    return server
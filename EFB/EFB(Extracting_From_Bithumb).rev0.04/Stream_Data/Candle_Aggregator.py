@@ -0,0 +1,113 @@
+import threading
+from datetime import datetime, timedelta, timezone
+
+import pandas as pd
+
+TIME_FORMAT = "%Y-%m-%dT%H:%M:%S"
+
+# 이미 DB에 기록한 분봉을 늦게 도착한 체결로 다시 갱신할 수 있도록 메모리에 남겨두는 분 수
+RETAIN_MINUTES = 2
+
+# REST API 응답(fetch_20days_data 등)과 같은 컬럼 구성
+CANDLE_COLUMNS = [
+    'candle_date_time_utc', 'candle_date_time_kst',
+    'opening_price', 'high_price', 'low_price', 'trade_price',
+    'candle_acc_trade_price', 'candle_acc_trade_volume'
+]
+
+
+def minute_of(timestamp_ms):
+    """
+    체결 시각(ms, UTC epoch)이 속한 분의 시작 시각 (tz 정보 없는 UTC datetime)
+    """
+    return datetime.fromtimestamp(timestamp_ms // 60000 * 60, tz=timezone.utc).replace(tzinfo=None)
+
+
+class MinuteCandle:
+    def __init__(self, price, volume):
+        self.open = price
+        self.high = price
+        self.low = price
+        self.close = price
+        self.acc_trade_price = price * volume
+        self.acc_trade_volume = volume
+        self.dirty = True
+
+    def add(self, price, volume):
+        self.high = max(self.high, price)
+        self.low = min(self.low, price)
+        self.close = price
+        self.acc_trade_price += price * volume
+        self.acc_trade_volume += volume
+        self.dirty = True
+
+
+class MinuteCandleAggregator:
+    """
+    체결(trade) 스트림을 종목별 1분봉(OHLCV)으로 집계합니다.
+
+    - add_trade(): 체결 1건 반영. 체결이 없는 분은 REST API와 마찬가지로 분봉이 생기지 않습니다.
+    - pop_closed(before): before 이전에 끝난 분봉 중 아직 기록하지 않았거나(새 분봉)
+      늦게 도착한 체결로 바뀐 분봉을 반환합니다.
+    - min_minute: 이 시각 이전 분봉은 버립니다 (연결 직후의 일부만 집계된 분봉 제외용).
+    """
+
+    def __init__(self, min_minute=None):
+        self.min_minute = min_minute
+        self.late_trades = 0
+        self._candles = {}  # (market, minute) -> MinuteCandle
+        self._flushed_before = None
+        self._lock = threading.Lock()
+
+    def add_trade(self, market, timestamp_ms, price, volume):
+        minute = minute_of(timestamp_ms)
+        with self._lock:
+            if self.min_minute is not None and minute < self.min_minute:
+                return
+            if (self._flushed_before is not None
+                    and minute < self._flushed_before - timedelta(minutes=RETAIN_MINUTES)):
+                # 이미 메모리에서 지운 분봉에 대한 체결 -> 잘못된 OHLC로 덮어쓰지 않도록 버림
+                self.late_trades += 1
+                return
+
+            candle = self._candles.get((market, minute))
+            if candle is None:
+                self._candles[(market, minute)] = MinuteCandle(price, volume)
+            else:
+                candle.add(price, volume)
+
+    def discard_from(self, minute):
+        """
+        minute 이후(포함) 분봉을 버립니다. 연결이 끊겨 일부 체결만 집계된 분봉 제거용.
+        """
+        with self._lock:
+            for key in [key for key in self._candles if key[1] >= minute]:
+                del self._candles[key]
+
+    def pop_closed(self, before):
+        """
+        Parameters:
+        before (datetime): 이 시각 이전에 시작한 분봉을 마감된 것으로 봄 (보통 현재 분의 시작 시각)
+
+        Returns:
+        dict: {market: pd.DataFrame(CANDLE_COLUMNS)}
+        """
+        rows = {}
+        with self._lock:
+            self._flushed_before = before
+            expire = before - timedelta(minutes=RETAIN_MINUTES)
+            for (market, minute), candle in sorted(self._candles.items()):
+                if minute >= before:
+                    continue
+                if candle.dirty:
+                    rows.setdefault(market, []).append((
+                        minute.strftime(TIME_FORMAT),
+                        (minute + timedelta(hours=9)).strftime(TIME_FORMAT),
+                        candle.open, candle.high, candle.low, candle.close,
+                        candle.acc_trade_price, candle.acc_trade_volume,
+                    ))
+                    candle.dirty = False
+            for key in [key for key in self._candles if key[1] < expire]:
+                del self._candles[key]
+
+        return {market: pd.DataFrame(values, columns=CANDLE_COLUMNS) for market, values in rows.items()}
@@ -0,0 +1,135 @@
+import asyncio
+import json
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+
+import websockets
+
+from Stream_Data.Candle_Aggregator import MinuteCandleAggregator
+
+UPBIT_WEBSOCKET_URL = "wss://api.upbit.com/websocket/v1"
+
+# 분이 끝난 뒤 늦게 도착하는 체결을 기다리는 시간(초)
+FLUSH_GRACE_SEC = 0.2
+
+# 연결이 끊겼을 때 재연결 전 대기 시간(초)
+RECONNECT_DELAY_SEC = 1.0
+
+
+def build_subscribe_message(markets):
+    """
+    Upbit WebSocket 체결(trade) 구독 요청 메시지
+    """
+    return json.dumps([
+        {'ticket': str(uuid.uuid4())},
+        {'type': 'trade', 'codes': list(markets)},
+        {'format': 'DEFAULT'},
+    ])
+
+
+def utc_minute(epoch_sec):
+    return datetime.fromtimestamp(epoch_sec // 60 * 60, tz=timezone.utc).replace(tzinfo=None)
+
+
+class StreamIngestor:
+    """
+    체결 WebSocket 스트림을 1분봉으로 집계하여 분마다 한 번 DB에 기록합니다.
+
+    - 연결(재연결) 직후의 분은 일부 체결만 받으므로 버리고, 그 구간은 REST(repair_func)로 보정합니다.
+    - DB 작업(write_func, repair_func, after_flush)은 단일 스레드 executor에서 순서대로 실행되어
+      수신 루프를 막지 않고, 같은 DB 연결을 동시에 쓰지 않습니다.
+
+    Parameters:
+    markets (list[str]): 구독할 종목
+    write_func (callable): write_func(market, DataFrame) -> 기록한 행 수
+    repair_func (callable): repair_func(since) -> None. since(UTC datetime) 이후 분봉을 REST로 다시 받아 기록.
+                            since가 None이면 DB의 마지막 시각 이후를 받음 (최초 시작)
+    after_flush (callable, optional): 분 단위 기록이 끝날 때마다 호출 (archive 등)
+    """
+
+    def __init__(self, markets, write_func, repair_func, url=UPBIT_WEBSOCKET_URL,
+                 grace=FLUSH_GRACE_SEC, after_flush=None):
+        self.markets = list(markets)
+        self.write_func = write_func
+        self.repair_func = repair_func
+        self.after_flush = after_flush
+        self.url = url
+        self.grace = grace
+        self.aggregator = MinuteCandleAggregator()
+        self.trade_count = 0
+        self._repair_since = None
+        self._repair_pending = False
+        self._db_executor = ThreadPoolExecutor(max_workers=1)
+
+    async def run(self):
+        await asyncio.gather(self._receive_loop(), self._flush_loop())
+
+    def _on_connected(self, disconnected_at=None):
+        now = time.time()
+        first_full_minute = utc_minute(now) + timedelta(minutes=1)
+        if disconnected_at is not None:
+            # 끊긴 분부터는 일부만 집계되었으므로 버리고 REST로 다시 받음
+            self.aggregator.discard_from(utc_minute(disconnected_at))
+            self._repair_since = utc_minute(disconnected_at) - timedelta(minutes=1)
+        self._repair_pending = True
+        self.aggregator.min_minute = first_full_minute
+        print(f"[INFO] WebSocket 연결됨. {first_full_minute} (UTC) 분봉부터 스트림으로 집계합니다.")
+
+    def _handle_message(self, message):
+        trade = json.loads(message)
+        if trade.get('type') != 'trade':
+            return
+        self.aggregator.add_trade(
+            trade['code'], trade['trade_timestamp'], float(trade['trade_price']), float(trade['trade_volume'])
+        )
+        self.trade_count += 1
+
+    async def _receive_loop(self):
+        disconnected_at = None
+        while True:
+            try:
+                async with websockets.connect(self.url, ping_interval=60, max_size=None) as websocket:
+                    await websocket.send(build_subscribe_message(self.markets))
+                    self._on_connected(disconnected_at)
+                    async for message in websocket:
+                        self._handle_message(message)
+            except (OSError, websockets.WebSocketException) as e:
+                print(f"[WARN] WebSocket 연결 오류: {e}")
+            disconnected_at = time.time()
+            await asyncio.sleep(RECONNECT_DELAY_SEC)
+
+    async def _flush_loop(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            now = time.time()
+            boundary = (now // 60 + 1) * 60
+            await asyncio.sleep(boundary + self.grace - now)
+            closed = self.aggregator.pop_closed(utc_minute(boundary))
+            await loop.run_in_executor(self._db_executor, self._flush, boundary, closed)
+
+    def _flush(self, boundary, closed):
+        """
+        Parameters:
+        boundary (float): 방금 끝난 분의 종료 시각 (epoch 초)
+        closed (dict): {market: DataFrame} 마감된 분봉
+        """
+        try:
+            min_minute = self.aggregator.min_minute
+            if self._repair_pending and min_minute is not None and utc_minute(boundary) >= min_minute:
+                # 스트림 분봉보다 먼저 REST 보정 (REST는 DB 마지막 시각 또는 끊긴 시각 이후를 받음)
+                self.repair_func(self._repair_since)
+                self._repair_pending = False
+
+            rows = 0
+            for market, data in closed.items():
+                rows += self.write_func(market, data)
+            if closed:
+                latency_ms = (time.time() - boundary) * 1000
+                print(f"[INFO] 분봉 {rows}행 기록 (체결 {self.trade_count}건, 분봉 마감 후 {latency_ms:.0f}ms)")
+
+            if self.after_flush is not None:
+                self.after_flush()
+        except Exception as e:
+            print(f"[ERROR] 스트림 분봉 기록 중 오류 발생: {e}")
@@ -1,23 +1,43 @@
+import json
+import os
 import subprocess
 import threading
+import time
 
 # 파일 경로 설정
-file1 = r"C:\Users\pc\Desktop\bdv\EFB\EFB(Extracting_From_Bithumb).rev0.03\Main.py"
+file1 = r"C:\Users\pc\Desktop\bdv\EFB\EFB(Extracting_From_Bithumb).rev0.04\Main.py"
 file2 = r"C:\Users\pc\Desktop\bdv\Coin_Dashboard\Coin_Dashboard.rev1.00\MAIN\Main.py"
 file3 = r"C:\Users\pc\Desktop\bdv\GUI\gui.rev0.01\gui.py"
 
-def run_first_file_and_wait_for_message(file_path, target_message):
+# EFB가 수집 주기마다 기록하는 상태 파일 (EFB Main.py의 STATUS_FILE)
+# (INGEST_MODE='sharded'이면 EFB 부모 프로세스가 shard 상태를 모아 기록하며, 모든 shard가 준비되면 ready)
+status_file1 = os.path.join(os.path.dirname(file1), "efb_status.json")
+
+def read_status(status_file):
     """
-    첫 번째 파일을 실행하고 특정 메시지가 출력될 때까지 기다림
+    상태 파일을 읽어 dict로 반환. 아직 없거나 읽을 수 없으면 None
     """
-    with subprocess.Popen(
-        ["python", file_path], stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True
-    ) as process:
-        for line in process.stdout:
-            print(line, end="")  # 첫 번째 파일의 출력을 실시간으로 보여줌
-            if target_message in line:
-                print("\n[INFO] 메시지 감지됨: 두 번째 및 세 번째 파일 실행 시작...\n")
-                return process  # 메시지 감지 후 반환
+    try:
+        with open(status_file, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def run_first_file_and_wait_until_ready(file_path, status_file, poll_sec=1.0):
+    """
+    첫 번째 파일을 실행하고, 상태 파일에 첫 수집 주기 완료(ready)가 기록될 때까지 기다림
+    (출력 문구를 파싱하지 않으므로 로그 문구가 바뀌어도 동작하며, 출력은 그대로 콘솔에 표시됨)
+    """
+    launched_at = time.time()
+    process = subprocess.Popen(["python", file_path])
+    while process.poll() is None:
+        status = read_status(status_file)
+        # 이전 실행이 남긴 상태 파일은 무시
+        if status and status.get("ready") and status.get("started_at", 0) >= launched_at - 1:
+            print("\n[INFO] 첫 번째 파일 준비 완료: 두 번째 및 세 번째 파일 실행 시작...\n")
+            return process
+        time.sleep(poll_sec)
+    raise RuntimeError(f"첫 번째 파일이 준비 전에 종료되었습니다 (exit code {process.returncode})")
 
 def run_other_files(file2, file3):
     """
@@ -31,11 +51,8 @@ def run_other_files(file2, file3):
     t3.join()
 
 def main():
-    # 첫 번째 파일에서 출력될 메시지 설정
-    target_message = "데이터 업데이트 완료. 다음 업데이트까지 대기 중..."
-    
     print("[INFO] 첫 번째 파일 실행 중...")
-    process1 = run_first_file_and_wait_for_message(file1, target_message)
+    process1 = run_first_file_and_wait_until_ready(file1, status_file1)
     
     # 두 번째와 세 번째 파일 실행
     run_other_files(file2, file3)